@@ -0,0 +1,78 @@
+import hashlib
+from typing import Callable, Dict, Optional
+from urllib.parse import parse_qsl, urlencode
+
+# Cache-Control per endpoint. Keys ending in "/" match every path below them.
+CACHE_POLICIES: Dict[str, str] = {
+    '/tenders': 'public, max-age=60, stale-while-revalidate=300',
+    '/stats': 'public, max-age=60, stale-while-revalidate=600',
+    '/offline-bundle': 'public, max-age=3600, stale-while-revalidate=86400',
+    '/tender/': 'public, max-age=300, stale-while-revalidate=3600',
+}
+
+
+def make_etag(version: str, path: str, query_string: bytes) -> str:
+    """Strong ETag for a response of ``path`` at a data version
+
+    Query parameters are sorted, so their order does not change the tag.
+    """
+    query = urlencode(sorted(parse_qsl(query_string.decode('latin-1'), keep_blank_values=True)))
+    digest = hashlib.sha1(f"{version}|{path}|{query}".encode('utf-8')).hexdigest()[:24]
+    return f'"{digest}"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Whether an If-None-Match header covers ``etag`` (weak comparison)"""
+    if if_none_match.strip() == '*':
+        return True
+    tags = (tag.strip() for tag in if_none_match.split(','))
+    return any((tag[2:] if tag.startswith('W/') else tag) == etag for tag in tags)
+
+
+class HTTPCacheMiddleware:
+    """ETag and Cache-Control for responses derived from versioned data
+
+    The ETag of a GET is computed from ``version()``, the path and the
+    query string alone. A request whose If-None-Match already holds it is
+    answered with 304 before the endpoint runs. Successful responses get
+    the ETag and the Cache-Control value of their endpoint. When
+    ``version()`` returns None (no snapshot yet), nothing is cached.
+    """
+
+    def __init__(self, app, version: Callable[[], Optional[str]], policies: Dict[str, str] = CACHE_POLICIES):
+        self.app = app
+        self.version = version
+        self.policies = policies
+
+    def _policy(self, path: str) -> Optional[str]:
+        policy = self.policies.get(path)
+        if policy is None:
+            for prefix, value in self.policies.items():
+                if prefix.endswith('/') and path.startswith(prefix):
+                    return value
+        return policy
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or scope['method'] not in ('GET', 'HEAD'):
+            return await self.app(scope, receive, send)
+
+        policy = self._policy(scope['path'])
+        version = self.version() if policy else None
+        if version is None:
+            return await self.app(scope, receive, send)
+
+        etag = make_etag(version, scope['path'], scope['query_string'])
+        cache_headers = [(b'etag', etag.encode('latin-1')), (b'cache-control', policy.encode('latin-1'))]
+
+        if_none_match = next((value for name, value in scope['headers'] if name == b'if-none-match'), None)
+        if if_none_match is not None and etag_matches(if_none_match.decode('latin-1'), etag):
+            await send({'type': 'http.response.start', 'status': 304, 'headers': cache_headers})
+            await send({'type': 'http.response.body', 'body': b''})
+            return
+
+        async def send_with_cache_headers(message):
+            if message['type'] == 'http.response.start' and message['status'] == 200:
+                message['headers'] = list(message.get('headers', [])) + cache_headers
+            await send(message)
+
+        await self.app(scope, receive, send_with_cache_headers)
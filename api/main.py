@@ -1,18 +1,74 @@
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, HTTPException, Query, Response
 from fastapi.middleware.cors import CORSMiddleware
-from typing import List, Optional, Dict
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, Field
+from typing import TYPE_CHECKING, Awaitable, Callable, Hashable, List, Optional, Dict
 from datetime import datetime, timedelta
 import pytz
-from scraper.tender_scraper import TenderScraper
+from api.models import TENDER_VIEWS, OfflineBundle, Tender, TenderPage, TenderStats
+from api.http_cache import HTTPCacheMiddleware
+from api.response_cache import ResponseCache
+from scraper.snapshot import SnapshotReader, DEFAULT_SNAPSHOT_PATH
+from scraper.async_store import AsyncTenderStore
+import asyncio
 import json
+import logging
 import os
+import time
+
+# The scraper, classifier and similarity index pull in pandas, BeautifulSoup,
+# SQLAlchemy, scikit-learn and spaCy. They are imported where first used so
+# a cold start only pays for FastAPI and the snapshot reader.
+if TYPE_CHECKING:
+    from classifier.micro_batcher import MicroBatcher
+    from classifier.similarity_index import TenderSimilarityIndex
+    from classifier.tender_classifier import TenderClassifier
+
+logger = logging.getLogger(__name__)
+
+# Lazy start (set on Vercel): nothing is loaded before the first request
+# that needs it, and the database schema is left to ``python -m scraper.migrate``
+LAZY_START = os.environ.get("API_LAZY_START", "0") == "1"
 
 app = FastAPI(
     title="Tenders Ville API",
     description="Mobile-optimized API for accessing Kenyan tender information",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
+)
+
+def create_scraper():
+    from scraper.tender_scraper import TenderScraper
+    return TenderScraper(create_schema=not LAZY_START)
+
+# Read-only snapshot published by the refresh job; live scraping is only
+# used until the first snapshot exists
+snapshot = SnapshotReader(DEFAULT_SNAPSHOT_PATH)
+
+# Blocking reads and scrapes run on a bounded thread pool, off the event
+# loop. The scraper is only created once the snapshot fallback needs it.
+store = AsyncTenderStore(
+    snapshot=snapshot,
+    max_workers=int(os.environ.get("DB_POOL_WORKERS", 8)),
+    scraper_factory=create_scraper
 )
 
+# Snapshot responses change with a new snapshot, and with the clock since
+# they carry day counts, so time is cut into RESPONSE_CACHE_TTL windows
+RESPONSE_CACHE_TTL = float(os.environ.get("RESPONSE_CACHE_TTL", 60))
+
+def data_version() -> Optional[str]:
+    """Version of the data behind snapshot responses, None while scraping live"""
+    if not snapshot.available():
+        return None
+    return f"{snapshot.version}:{int(time.time() // RESPONSE_CACHE_TTL)}"
+
+# Serialized snapshot responses of the current data version
+response_cache = ResponseCache(max_bytes=int(os.environ.get("RESPONSE_CACHE_MB", 64)) * 1024 * 1024)
+
+# ETag/304 and Cache-Control for snapshot responses
+app.add_middleware(HTTPCacheMiddleware, version=data_version)
+
 # Enable CORS for mobile app access
 app.add_middleware(
     CORSMiddleware,
@@ -22,8 +78,101 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize scraper
-scraper = TenderScraper()
+
+# Classifier artifact, memory-mapped once per worker at startup
+CLASSIFIER_MODEL_PATH = os.environ.get("CLASSIFIER_MODEL_PATH", "tender_classifier_model.joblib")
+classifier: Optional["TenderClassifier"] = None
+classify_batcher: Optional["MicroBatcher"] = None
+classifier_lock = asyncio.Lock()
+
+# "Similar tenders" index over the classifier's TF-IDF space, kept in step
+# with the published snapshot
+similarity_index: Optional["TenderSimilarityIndex"] = None
+similarity_lock = asyncio.Lock()
+
+class TenderText(BaseModel):
+    id: Optional[str] = None
+    title: str = ""
+    description: str = ""
+
+class TenderTextBatch(BaseModel):
+    tenders: List[TenderText] = Field(..., max_length=1000)
+
+@app.on_event("startup")
+async def preload():
+    """Load the classifier at startup, unless starting lazily"""
+    if LAZY_START:
+        return
+    if await load_classifier() is not None:
+        # Build the similarity index in the background so startup is not delayed
+        asyncio.create_task(current_similarity_index())
+
+async def load_classifier() -> Optional["MicroBatcher"]:
+    """Load the classifier once per worker and warm its spaCy pipelines"""
+    global classifier, classify_batcher
+    async with classifier_lock:
+        if classify_batcher is not None:
+            return classify_batcher
+        if not os.path.exists(CLASSIFIER_MODEL_PATH):
+            logger.warning(f"No classifier model at {CLASSIFIER_MODEL_PATH}, /classify disabled")
+            return None
+        
+        from classifier.micro_batcher import MicroBatcher
+        from classifier.tender_classifier import TenderClassifier
+        
+        model = TenderClassifier()
+        await store.run(model.load_model, CLASSIFIER_MODEL_PATH, mmap_mode='r')
+        
+        # Concurrent /classify requests are grouped into one classify_tenders call
+        batcher = MicroBatcher(
+            lambda tenders: model.classify_tenders(tenders),
+            max_batch_size=int(os.environ.get("CLASSIFY_BATCH_SIZE", 64)),
+            max_wait_ms=float(os.environ.get("CLASSIFY_BATCH_WAIT_MS", 5))
+        )
+        await batcher.submit({'title': 'warm up', 'description': ''})
+        classifier, classify_batcher = model, batcher
+        return batcher
+
+async def current_similarity_index() -> Optional["TenderSimilarityIndex"]:
+    """Build the similarity index on first use and fold in newer snapshots"""
+    global similarity_index
+    if not snapshot.available() or await load_classifier() is None:
+        return None
+    
+    async with similarity_lock:
+        if similarity_index is not None and similarity_index.version == snapshot.version:
+            return similarity_index
+        
+        version = snapshot.version
+        _, tenders = await store.query_snapshot()
+        if similarity_index is None:
+            from classifier.similarity_index import TenderSimilarityIndex
+            index = TenderSimilarityIndex(classifier)
+            await store.run(index.build, tenders, version)
+            similarity_index = index
+        else:
+            # Only new tenders and tenders whose title changed are embedded
+            rows, summaries = similarity_index.rows, similarity_index.summaries
+            changed = [
+                t for t in tenders
+                if t['reference'] not in rows or summaries[rows[t['reference']]].get('title') != t.get('title')
+            ]
+            await store.run(similarity_index.add, changed, version)
+    return similarity_index
+
+@app.on_event("shutdown")
+async def stop_classifier():
+    if classify_batcher is not None:
+        await classify_batcher.stop()
+
+async def cached_response(key: Hashable, render: Callable[[], Awaitable[BaseModel]]) -> Response:
+    """Serve a snapshot response from the cache, rendering it on a miss"""
+    version = data_version()
+    body = response_cache.get(version, key)
+    if body is None:
+        body = (await render()).model_dump_json(exclude_unset=True).encode('utf-8')
+        response_cache.put(version, key, body)
+    return Response(content=body, media_type="application/json")
 
 @app.get("/")
 async def root():
@@ -36,14 +185,28 @@ async def root():
         "status": "online"
     }
 
-@app.get("/tenders")
+def tender_fields(fields: Optional[str], view: str) -> Optional[List[str]]:
+    """Fields to return per tender, from ``fields=`` or else ``view=``"""
+    if not fields:
+        return TENDER_VIEWS[view]
+    
+    requested = list(dict.fromkeys(f.strip() for f in fields.split(',') if f.strip()))
+    unknown = [f for f in requested if f not in Tender.model_fields]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    # The reference is always included so a list item can be opened
+    return ['reference'] + [f for f in requested if f != 'reference']
+
+@app.get("/tenders", response_model=TenderPage, response_model_exclude_unset=True)
 async def get_tenders(
     status: Optional[str] = Query(None, enum=["open", "closing_soon", "closed"]),
     entity: Optional[str] = None,
     category: Optional[str] = None,
     days_remaining: Optional[int] = None,
     page: int = Query(1, ge=1),
-    limit: int = Query(20, ge=1, le=100)
+    limit: int = Query(20, ge=1, le=100),
+    fields: Optional[str] = None,
+    view: str = Query("full", enum=list(TENDER_VIEWS))
 ) -> Dict:
     """
     Get tenders with optional filters
@@ -54,16 +217,38 @@ async def get_tenders(
     - **days_remaining**: Filter by days remaining until closing
     - **page**: Page number for pagination
     - **limit**: Number of items per page
+    - **fields**: Comma-separated tender fields to return, e.g. `title,closing_date`
+    - **view**: `compact` for list screens (reference, title, entity, closing date and status) or `full`
     """
+    projection = tender_fields(fields, view)
     try:
-        # Get all tenders
-        all_tenders = []
+        if snapshot.available():
+            async def render() -> TenderPage:
+                total, page_tenders = await store.query_snapshot(
+                    status=status,
+                    entity=entity,
+                    category=category,
+                    days_remaining=days_remaining,
+                    offset=(page - 1) * limit,
+                    limit=limit,
+                    fields=projection
+                )
+                return TenderPage(
+                    total=total,
+                    page=page,
+                    limit=limit,
+                    total_pages=(total + limit - 1) // limit,
+                    tenders=page_tenders
+                )
+            
+            return await cached_response(
+                ('tenders', status, entity, category, days_remaining, page, limit,
+                 tuple(projection) if projection else None),
+                render
+            )
         
-        # Get tenders from both sources
-        mygov_tenders = scraper.scrape_mygov_tenders()
-        ppip_tenders = scraper.scrape_ppip_tenders()
-        all_tenders.extend(mygov_tenders)
-        all_tenders.extend(ppip_tenders)
+        # Get tenders from both sources, with cross-source duplicates collapsed
+        all_tenders = await store.scrape_all_tenders()
         
         # Apply filters
         filtered_tenders = all_tenders
@@ -98,6 +283,8 @@ async def get_tenders(
         
         # Get page of results
         page_tenders = filtered_tenders[start_idx:end_idx]
+        if projection:
+            page_tenders = [{f: t[f] for f in projection if f in t} for t in page_tenders]
         
         return {
             "total": total,
@@ -110,7 +297,28 @@ async def get_tenders(
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/tender/{tender_id}")
+@app.get("/tender/{tender_id:path}/similar")
+async def get_similar_tenders(tender_id: str, k: int = Query(10, ge=1, le=50)) -> Dict:
+    """
+    Get tenders similar to a specific tender
+    
+    - **tender_id**: The unique identifier of the tender
+    - **k**: Number of similar tenders to return
+    """
+    index = await current_similarity_index()
+    if index is None:
+        raise HTTPException(status_code=503, detail="Similarity index not available")
+    
+    similar = index.similar_to(tender_id, k)
+    if similar is None:
+        raise HTTPException(status_code=404, detail="Tender not found")
+    
+    return {
+        "reference": tender_id,
+        "similar": [{**summary, "score": round(score, 4)} for summary, score in similar]
+    }
+
+@app.get("/tender/{tender_id}", response_model=Tender, response_model_exclude_unset=True)
 async def get_tender(tender_id: str) -> Dict:
     """
     Get detailed information about a specific tender
@@ -118,16 +326,25 @@ async def get_tender(tender_id: str) -> Dict:
     - **tender_id**: The unique identifier of the tender
     """
     try:
+        if snapshot.available():
+            async def render() -> Tender:
+                tender = await store.get_snapshot_tender(tender_id)
+                if not tender:
+                    raise HTTPException(status_code=404, detail="Tender not found")
+                return Tender(**tender)
+            
+            return await cached_response(('tender', tender_id), render)
+        
         # Search in both sources
-        all_tenders = []
-        mygov_tenders = scraper.scrape_mygov_tenders()
-        ppip_tenders = scraper.scrape_ppip_tenders()
-        all_tenders.extend(mygov_tenders)
-        all_tenders.extend(ppip_tenders)
+        all_tenders = await store.scrape_all_tenders()
         
-        # Find tender by ID
+        # Find tender by ID, including references of collapsed duplicates
         tender = next(
-            (t for t in all_tenders if t.get('reference') == tender_id),
+            (
+                t for t in all_tenders
+                if t.get('reference') == tender_id
+                or any(d.get('reference') == tender_id for d in t.get('duplicates', []))
+            ),
             None
         )
         
@@ -136,76 +353,118 @@ async def get_tender(tender_id: str) -> Dict:
             
         return tender
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/stats")
-async def get_stats() -> Dict:
+async def tender_stats() -> TenderStats:
+    """Statistics from the snapshot, or from a live scrape before one exists"""
+    if snapshot.available():
+        return TenderStats(**await store.get_snapshot_stats())
+    
+    # Get all tenders
+    all_tenders = await store.scrape_all_tenders()
+    
+    # Calculate statistics
+    total = len(all_tenders)
+    open_tenders = len([t for t in all_tenders if t.get('status') == 'open'])
+    closing_soon = len([t for t in all_tenders if t.get('status') == 'closing_soon'])
+    closed = len([t for t in all_tenders if t.get('status') == 'closed'])
+    
+    # Get unique entities and categories
+    entities = len(set(t.get('procuring_entity') for t in all_tenders if t.get('procuring_entity')))
+    categories = len(set(t.get('category') for t in all_tenders if t.get('category')))
+    
+    return TenderStats(
+        total_tenders=total,
+        open_tenders=open_tenders,
+        closing_soon=closing_soon,
+        closed_tenders=closed,
+        unique_entities=entities,
+        unique_categories=categories,
+        last_updated=datetime.now(pytz.timezone('Africa/Nairobi')).isoformat()
+    )
+
+@app.get("/stats", response_model=TenderStats, response_model_exclude_unset=True)
+async def get_stats():
     """Get statistics about available tenders"""
     try:
-        # Get all tenders
-        all_tenders = []
-        mygov_tenders = scraper.scrape_mygov_tenders()
-        ppip_tenders = scraper.scrape_ppip_tenders()
-        all_tenders.extend(mygov_tenders)
-        all_tenders.extend(ppip_tenders)
-        
-        # Calculate statistics
-        total = len(all_tenders)
-        open_tenders = len([t for t in all_tenders if t.get('status') == 'open'])
-        closing_soon = len([t for t in all_tenders if t.get('status') == 'closing_soon'])
-        closed = len([t for t in all_tenders if t.get('status') == 'closed'])
-        
-        # Get unique entities and categories
-        entities = len(set(t.get('procuring_entity') for t in all_tenders if t.get('procuring_entity')))
-        categories = len(set(t.get('category') for t in all_tenders if t.get('category')))
-        
-        return {
-            "total_tenders": total,
-            "open_tenders": open_tenders,
-            "closing_soon": closing_soon,
-            "closed_tenders": closed,
-            "unique_entities": entities,
-            "unique_categories": categories,
-            "last_updated": datetime.now(pytz.timezone('Africa/Nairobi')).isoformat()
-        }
+        if snapshot.available():
+            return await cached_response(('stats',), tender_stats)
+        return await tender_stats()
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/offline-bundle")
-async def get_offline_bundle() -> Dict:
-    """
-    Get a bundle of data for offline access
-    Includes recent tenders and basic statistics
-    """
-    try:
+async def offline_bundle() -> OfflineBundle:
+    """Active tenders and basic statistics for offline use"""
+    if snapshot.available():
+        # Only include non-closed tenders to reduce bundle size
+        _, active_tenders = await store.query_snapshot(status='active')
+    else:
         # Get recent tenders
-        all_tenders = []
-        mygov_tenders = scraper.scrape_mygov_tenders()
-        ppip_tenders = scraper.scrape_ppip_tenders()
-        all_tenders.extend(mygov_tenders)
-        all_tenders.extend(ppip_tenders)
+        all_tenders = await store.scrape_all_tenders()
         
         # Only include non-closed tenders to reduce bundle size
         active_tenders = [
             t for t in all_tenders 
             if t.get('status') in ['open', 'closing_soon']
         ]
+    
+    now = datetime.now(pytz.timezone('Africa/Nairobi'))
+    return OfflineBundle(
+        tenders=active_tenders,
+        stats=await tender_stats(),
+        bundle_created=now.isoformat(),
+        valid_until=(now + timedelta(days=1)).isoformat()
+    )
+
+@app.get("/offline-bundle", response_model=OfflineBundle, response_model_exclude_unset=True)
+async def get_offline_bundle():
+    """
+    Get a bundle of data for offline access
+    Includes recent tenders and basic statistics
+    """
+    try:
+        if snapshot.available():
+            return await cached_response(('offline-bundle',), offline_bundle)
+        return await offline_bundle()
         
-        # Get basic stats
-        stats = await get_stats()
-        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/classify")
+async def classify(tender: TenderText) -> Dict:
+    """
+    Classify a single tender
+    
+    Concurrent requests are micro-batched into a single model call.
+    """
+    batcher = await load_classifier()
+    if batcher is None:
+        raise HTTPException(status_code=503, detail="Classifier model not loaded")
+    try:
+        return await batcher.submit(tender.model_dump())
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/classify/batch")
+async def classify_batch(batch: TenderTextBatch) -> Dict:
+    """Classify up to 1000 tenders in one request"""
+    batcher = await load_classifier()
+    if batcher is None:
+        raise HTTPException(status_code=503, detail="Classifier model not loaded")
+    try:
+        results = await asyncio.get_running_loop().run_in_executor(
+            batcher.executor,
+            classifier.classify_tenders,
+            [tender.model_dump() for tender in batch.tenders]
+        )
         return {
-            "tenders": active_tenders,
-            "stats": stats,
-            "bundle_created": datetime.now(pytz.timezone('Africa/Nairobi')).isoformat(),
-            "valid_until": (
-                datetime.now(pytz.timezone('Africa/Nairobi')) + 
-                timedelta(days=1)
-            ).isoformat()
+            "model_version": classifier.model_version,
+            "results": results
         }
-        
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -0,0 +1,68 @@
+"""Response models of the public API
+
+Only the fields listed here are serialized. Fields such as
+``offline_available`` and ``last_updated``, which the live scraper adds to
+every tender, are dropped from responses. Fields a tender does not carry,
+for example outside a requested projection, are left out rather than
+sent as null.
+"""
+from typing import Dict, List, Optional, Union
+
+from pydantic import BaseModel
+
+
+class DuplicateListing(BaseModel):
+    reference: Optional[str] = None
+    source: Optional[str] = None
+
+
+class Tender(BaseModel):
+    reference: Optional[str] = None
+    title: Optional[str] = None
+    description: Optional[str] = None
+    procuring_entity: Optional[str] = None
+    procurement_method: Optional[str] = None
+    category: Optional[str] = None
+    value: Optional[Union[str, float]] = None
+    currency: Optional[str] = None
+    document_url: Optional[str] = None
+    closing_date: Optional[str] = None
+    published_date: Optional[str] = None
+    source: Optional[str] = None
+    days_remaining: Optional[int] = None
+    status: Optional[str] = None
+    duplicates: Optional[List[DuplicateListing]] = None
+
+
+# Predefined projections for ``/tenders?view=``; None keeps every field
+TENDER_VIEWS: Dict[str, Optional[List[str]]] = {
+    'compact': ['reference', 'title', 'procuring_entity', 'closing_date', 'days_remaining', 'status'],
+    'full': None,
+}
+
+
+class TenderPage(BaseModel):
+    total: int
+    page: int
+    limit: int
+    total_pages: int
+    tenders: List[Tender]
+
+
+class TenderStats(BaseModel):
+    total_tenders: int
+    open_tenders: int
+    closing_soon: int
+    closed_tenders: int
+    unique_entities: int
+    unique_categories: int
+    by_source: Dict[str, int] = {}
+    by_category: Dict[str, int] = {}
+    last_updated: Optional[str] = None
+
+
+class OfflineBundle(BaseModel):
+    tenders: List[Tender]
+    stats: TenderStats
+    bundle_created: str
+    valid_until: str
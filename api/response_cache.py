@@ -0,0 +1,50 @@
+from collections import OrderedDict
+from typing import Hashable, Optional
+
+
+class ResponseCache:
+    """Serialized JSON bodies of snapshot responses, in LRU order
+
+    A snapshot never changes once published, so a page rendered from it can
+    be served again as bytes, without querying or serializing. Entries
+    belong to the data version they were rendered from, and the whole cache
+    is dropped when the version changes. The total size of the cached
+    bodies is capped at ``max_bytes``.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.version: Optional[str] = None
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, bytes]" = OrderedDict()
+
+    def _switch(self, version: Optional[str]):
+        if version != self.version:
+            self._entries.clear()
+            self.size = 0
+            self.version = version
+
+    def get(self, version: Optional[str], key: Hashable) -> Optional[bytes]:
+        self._switch(version)
+        body = self._entries.get(key)
+        if body is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return body
+
+    def put(self, version: Optional[str], key: Hashable, body: bytes):
+        self._switch(version)
+        if len(body) > self.max_bytes:
+            return
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self.size -= len(previous)
+        self._entries[key] = body
+        self.size += len(body)
+        while self.size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.size -= len(evicted)
@@ -0,0 +1,328 @@
+"""Load test of the API against local stand-ins for MyGov and tenders.go.ke
+
+Starts stub portals serving synthetic MyGov HTML and PPIP OCDS releases,
+with --portal-tenders tenders each and --latency seconds per response.
+TenderScraper is pointed at them through MYGOV_TENDERS_URL and
+PPIP_BASE_URL. In snapshot mode, one refresh ingests the portals and
+publishes a snapshot, as the refresh job does in production. Live mode
+skips that, so every request scrapes the stubs.
+
+The API then runs under gunicorn with uvicorn workers, as in the Procfile,
+or under plain uvicorn. Each endpoint is driven at every --concurrency
+level for --duration seconds. The report gives throughput, p50/p95/p99
+latency, errors and the peak RSS of the server processes. --output saves
+the results as JSON, to compare against a previous run before deploying.
+
+Usage: python -m benchmarks.bench_api_load [--concurrency 1 8 32] [--server uvicorn] [--mode live]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from html import escape
+from typing import Dict, List, Tuple
+
+import aiohttp
+import numpy as np
+from aiohttp import web
+
+from benchmarks.synthetic import generate_tenders
+
+logging.basicConfig(level=logging.WARNING)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Name -> path; {page} and {reference} are filled in per request
+ENDPOINTS = {
+    'tenders': '/tenders?limit=20&page={page}',
+    'tenders-compact': '/tenders?limit=100&view=compact&page={page}',
+    'tender': '/tender/{reference}',
+    'stats': '/stats',
+    'offline-bundle': '/offline-bundle',
+}
+
+
+class StubPortals:
+    """MyGov's tenders table and the PPIP OCDS API over synthetic tenders
+
+    Payloads are rendered once up front, so the stubs cost next to nothing
+    and the latency seen by the scraper is the configured one.
+    """
+
+    def __init__(self, n: int, latency: float = 0.0):
+        self.latency = latency
+        self.requests = 0
+        now = datetime.now()
+        tenders = generate_tenders(2 * n, duplicate_rate=0.1, seed=48)
+        for i, tender in enumerate(tenders):
+            tender['reference'] = tender['reference'].replace('/', '-')
+            tender['closing_date'] = now + timedelta(days=i % 80 - 20, hours=10)
+        mygov = [t for i, t in enumerate(tenders) if t['source'] == 'mygov' and i % 2 == 0][:n]
+        taken = {id(t) for t in mygov}
+        ppip = [t for t in tenders if id(t) not in taken][:n]
+        self.references = [t['reference'] for t in mygov + ppip]
+        self.mygov_html = self._render_mygov(mygov).encode('utf-8')
+        self.ppip_json = json.dumps(self._render_ppip(ppip, now)).encode('utf-8')
+
+    @staticmethod
+    def _render_mygov(tenders: List[Dict]) -> str:
+        rows = []
+        for tender in tenders:
+            rows.append(
+                "<tr>"
+                f"<td class=\"views-field-counter\">{escape(tender['reference'])}</td>"
+                f"<td class=\"views-field-title\">{escape(tender['title'])}</td>"
+                f"<td class=\"views-field-field-ten\">{escape(tender['procuring_entity'])}</td>"
+                "<td class=\"views-field-field-tender-documents\">"
+                f"<a href=\"https://www.mygov.go.ke/docs/{escape(tender['reference'])}.pdf\">Download</a></td>"
+                f"<td class=\"views-field-field-tender-closing-date\">{tender['closing_date']:%d %B %Y}</td>"
+                "</tr>"
+            )
+        return (
+            "<html><body><table id=\"datatable\"><thead><tr><th>No</th><th>Tender</th>"
+            "<th>Entity</th><th>Documents</th><th>Closing</th></tr></thead>"
+            f"<tbody>{''.join(rows)}</tbody></table></body></html>"
+        )
+
+    @staticmethod
+    def _render_ppip(tenders: List[Dict], now: datetime) -> Dict:
+        releases = []
+        for tender in tenders:
+            releases.append({
+                'ocid': f"ocds-stub-{tender['reference']}",
+                'date': (now - timedelta(days=14)).isoformat(),
+                'buyer': {'name': tender['procuring_entity']},
+                'tender': {
+                    'id': tender['reference'],
+                    'title': tender['title'],
+                    'description': tender['description'],
+                    'status': 'active',
+                    'mainProcurementCategory': tender['category'].lower(),
+                    'procurementMethod': 'open',
+                    'value': {'amount': tender['value'], 'currency': 'KES'},
+                    'tenderPeriod': {'endDate': tender['closing_date'].isoformat()},
+                    'documents': [{'url': f"https://tenders.go.ke/docs/{tender['reference']}.pdf"}],
+                },
+            })
+        return {'releases': releases}
+
+    async def mygov(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        await asyncio.sleep(self.latency)
+        return web.Response(body=self.mygov_html, content_type='text/html')
+
+    async def ppip(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        await asyncio.sleep(self.latency)
+        return web.Response(body=self.ppip_json, content_type='application/json')
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get('/all-tenders', self.mygov)
+        app.router.add_get('/api/ocds/tenders', self.ppip)
+        return app
+
+
+def serve_in_thread(app: web.Application) -> str:
+    """Serve ``app`` from its own event loop thread and return its base URL"""
+    loop = asyncio.new_event_loop()
+    runner = web.AppRunner(app)
+    loop.run_until_complete(runner.setup())
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    loop.run_until_complete(site.start())
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    port = site._server.sockets[0].getsockname()[1]
+    return f"http://127.0.0.1:{port}"
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _tree_rss_mb(pid: int) -> float:
+    """Resident memory of a process and all its descendants, from /proc"""
+    total_kb = 0
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        try:
+            with open(f"/proc/{current}/status") as f:
+                total_kb += next((int(line.split()[1]) for line in f if line.startswith('VmRSS:')), 0)
+            for task in os.listdir(f"/proc/{current}/task"):
+                with open(f"/proc/{current}/task/{task}/children") as f:
+                    pending.extend(int(child) for child in f.read().split())
+        except (FileNotFoundError, ProcessLookupError):
+            continue
+    return total_kb / 1024
+
+
+def start_api(args, env: Dict[str, str], workdir: str) -> Tuple[subprocess.Popen, str]:
+    port = _free_port()
+    if args.server == 'gunicorn':
+        command = [
+            sys.executable, '-m', 'gunicorn', 'api.main:app',
+            '--workers', str(args.workers),
+            '--worker-class', 'uvicorn.workers.UvicornWorker',
+            '--bind', f"127.0.0.1:{port}",
+            '--log-level', 'warning',
+        ]
+    else:
+        command = [
+            sys.executable, '-m', 'uvicorn', 'api.main:app',
+            '--workers', str(args.workers),
+            '--host', '127.0.0.1', '--port', str(port),
+            '--log-level', 'warning',
+        ]
+    server = subprocess.Popen(command, cwd=workdir, env=env, start_new_session=True)
+    return server, f"http://127.0.0.1:{port}"
+
+
+async def wait_until_ready(base_url: str, server: subprocess.Popen, timeout: float = 120.0):
+    deadline = time.monotonic() + timeout
+    async with aiohttp.ClientSession() as session:
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise RuntimeError(f"API server exited with code {server.returncode}")
+            try:
+                async with session.get(f"{base_url}/") as response:
+                    if response.status == 200:
+                        return
+            except aiohttp.ClientError:
+                pass
+            await asyncio.sleep(0.2)
+    raise TimeoutError("API server did not start")
+
+
+async def drive(session: aiohttp.ClientSession,
+                base_url: str,
+                path: str,
+                references: List[str],
+                concurrency: int,
+                duration: float,
+                server_pid: int) -> Dict:
+    """Hammer one endpoint with ``concurrency`` clients for ``duration`` seconds"""
+    latencies: List[float] = []
+    errors = 0
+    peak_rss = _tree_rss_mb(server_pid)
+    deadline = time.monotonic() + duration
+    rng = random.Random(concurrency)
+
+    async def client():
+        nonlocal errors
+        while time.monotonic() < deadline:
+            url = base_url + path.format(page=rng.randint(1, 10), reference=rng.choice(references))
+            start = time.perf_counter()
+            try:
+                async with session.get(url) as response:
+                    await response.read()
+                    if response.status >= 400:
+                        errors += 1
+            except aiohttp.ClientError:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    async def sample_memory():
+        nonlocal peak_rss
+        while time.monotonic() < deadline:
+            peak_rss = max(peak_rss, _tree_rss_mb(server_pid))
+            await asyncio.sleep(0.2)
+
+    start = time.perf_counter()
+    await asyncio.gather(sample_memory(), *(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    timings = np.array(latencies) * 1000 if latencies else np.zeros(1)
+    return {
+        'requests': len(latencies),
+        'rps': len(latencies) / elapsed,
+        'p50_ms': float(np.percentile(timings, 50)),
+        'p95_ms': float(np.percentile(timings, 95)),
+        'p99_ms': float(np.percentile(timings, 99)),
+        'errors': errors,
+        'peak_rss_mb': peak_rss,
+    }
+
+
+async def run(args, base_url: str, server: subprocess.Popen, references: List[str]) -> List[Dict]:
+    await wait_until_ready(base_url, server)
+    endpoints = {name: ENDPOINTS[name] for name in args.endpoints}
+    results = []
+
+    print(f"{'conc':>4} {'endpoint':<16} {'requests':>8} {'req/s':>8} {'p50 ms':>8} "
+          f"{'p95 ms':>8} {'p99 ms':>8} {'errors':>6} {'RSS MB':>7}")
+    connector = aiohttp.TCPConnector(limit=0)
+    async with aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=120)) as session:
+        for concurrency in args.concurrency:
+            for name, path in endpoints.items():
+                result = await drive(session, base_url, path, references, concurrency, args.duration, server.pid)
+                results.append({'concurrency': concurrency, 'endpoint': name, **result})
+                print(f"{concurrency:>4} {name:<16} {result['requests']:>8} {result['rps']:>8.1f} "
+                      f"{result['p50_ms']:>8.1f} {result['p95_ms']:>8.1f} {result['p99_ms']:>8.1f} "
+                      f"{result['errors']:>6} {result['peak_rss_mb']:>7.0f}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--portal-tenders', type=int, default=1000, help="Tenders served by each stub portal")
+    parser.add_argument('--latency', type=float, default=0.2, help="Stub portal response time in seconds")
+    parser.add_argument('--mode', choices=['snapshot', 'live'], default='snapshot')
+    parser.add_argument('--server', choices=['gunicorn', 'uvicorn'], default='gunicorn')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32, 64])
+    parser.add_argument('--duration', type=float, default=10.0, help="Seconds per endpoint and concurrency level")
+    parser.add_argument('--endpoints', nargs='+', choices=list(ENDPOINTS), default=list(ENDPOINTS))
+    parser.add_argument('--output', help="Write the results to this JSON file")
+    args = parser.parse_args()
+
+    portals = StubPortals(args.portal_tenders, args.latency)
+    portal_url = serve_in_thread(portals.app())
+    workdir = tempfile.mkdtemp(prefix='bench-api-')
+    env = {
+        **os.environ,
+        'MYGOV_TENDERS_URL': f"{portal_url}/all-tenders",
+        'PPIP_BASE_URL': portal_url,
+        'TENDERS_SNAPSHOT_PATH': os.path.join(workdir, 'tenders_snapshot.db'),
+        'PYTHONPATH': os.pathsep.join(filter(None, [ROOT, os.environ.get('PYTHONPATH')])),
+    }
+
+    if args.mode == 'snapshot':
+        os.environ.update(env)
+        from scraper.tender_scraper import TenderScraper
+
+        start = time.perf_counter()
+        scraper = TenderScraper(f"sqlite:///{os.path.join(workdir, 'tenders.db')}")
+        scraper.refresh(env['TENDERS_SNAPSHOT_PATH'])
+        scraper.db_session.remove()
+        print(f"Refresh from stub portals: {time.perf_counter() - start:.1f} s")
+
+    server, base_url = start_api(args, env, workdir)
+    try:
+        results = asyncio.run(run(args, base_url, server, portals.references))
+    finally:
+        os.killpg(server.pid, signal.SIGTERM)
+        server.wait(timeout=30)
+    print(f"Stub portal requests: {portals.requests}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                'settings': {k: v for k, v in vars(args).items() if k != 'output'},
+                'results': results,
+            }, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""Load test: blocking handler calls vs. AsyncTenderStore
+
+Fires concurrent requests at a synthetic tenders database. It compares
+calling TenderScraper directly inside async handlers, which is what the
+API used to do, with going through AsyncTenderStore. A heartbeat task
+measures how long the event loop is stalled.
+
+Usage: python -m benchmarks.bench_async_store [--tenders 20000] [--concurrency 32]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict
+
+from benchmarks.synthetic import generate_tenders
+from scraper.async_store import AsyncTenderStore
+from scraper.tender_scraper import TenderRecord, TenderScraper
+
+logging.basicConfig(level=logging.WARNING)
+
+
+def populate(scraper: TenderScraper, n: int):
+    now = datetime.utcnow()
+    rows = []
+    for i, tender in enumerate(generate_tenders(n, duplicate_rate=0.0, seed=n)):
+        rows.append({
+            'reference': tender['reference'],
+            'title': tender['title'],
+            'description': tender['description'],
+            'procuring_entity': tender['procuring_entity'],
+            'category': tender['category'],
+            'closing_date': now + timedelta(days=i % 60 - 20),
+            'source': tender['source'],
+            'is_processed': False,
+        })
+    scraper.db_session.bulk_insert_mappings(TenderRecord, rows)
+    scraper.db_session.commit()
+    scraper.db_session.remove()
+
+
+async def _heartbeat(stop: asyncio.Event, lags: list, interval: float = 0.005):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - start - interval)
+
+
+async def drive(handler: Callable, concurrency: int, requests: int) -> Dict:
+    stop = asyncio.Event()
+    lags: list = []
+    heartbeat = asyncio.create_task(_heartbeat(stop, lags))
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            await handler()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await heartbeat
+
+    return {
+        'requests_per_second': requests / elapsed,
+        'max_loop_stall_ms': max(lags, default=0.0) * 1000,
+    }
+
+
+async def main_async(args):
+    db_path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+    scraper = TenderScraper(f"sqlite:///{db_path}")
+    populate(scraper, args.tenders)
+    store = AsyncTenderStore(scraper, max_workers=args.workers)
+
+    cases = {
+        'stats': (
+            lambda: _blocking(scraper.get_tender_stats),
+            store.get_tender_stats,
+        ),
+        'tenders?status=closing_soon': (
+            lambda: _blocking(scraper.get_mobile_tenders, status='closing_soon'),
+            lambda: store.get_mobile_tenders(status='closing_soon'),
+        ),
+    }
+
+    print(f"{'endpoint':<28} {'mode':<9} {'req/s':>8} {'max stall ms':>13}")
+    for name, (blocking, non_blocking) in cases.items():
+        for mode, handler in (('blocking', blocking), ('async', non_blocking)):
+            result = await drive(handler, args.concurrency, args.requests)
+            print(f"{name:<28} {mode:<9} {result['requests_per_second']:>8.1f} {result['max_loop_stall_ms']:>13.1f}")
+
+    store.close()
+
+
+async def _blocking(func: Callable, *args, **kwargs):
+    """An async handler that calls the data layer directly on the event loop"""
+    return func(*args, **kwargs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tenders', type=int, default=20000)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--workers', type=int, default=8)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""TenderClassifier throughput and latency benchmark suite
+
+Runs on the deterministic synthetic corpus from benchmarks.synthetic and
+reports:
+
+- per-stage throughput and p50/p99 single-item latency for
+  preprocess_text, vectorization, prediction and extract_entities
+- classify_tender in a loop vs. classify_tenders
+- training time and peak traced memory at each corpus size
+
+Results are compared with a stored baseline; the run exits non-zero when
+any metric is worse than the baseline by more than --tolerance, or when a
+baseline metric was not measured. Without a baseline the comparison is
+skipped. Record one on the reference machine with --update-baseline.
+
+Usage: python -m benchmarks.bench_classifier [--sizes 1000 10000 100000] [--update-baseline]
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import generate_tenders
+from classifier.tender_classifier import ESTIMATORS, TenderClassifier
+
+logging.basicConfig(level=logging.WARNING)
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), 'baselines', 'classifier.json')
+
+
+def _latencies(func: Callable, items: List) -> Dict[str, float]:
+    """p50/p99 latency in milliseconds of calling ``func`` on each item"""
+    timings = []
+    for item in items:
+        start = time.perf_counter()
+        func(item)
+        timings.append((time.perf_counter() - start) * 1000)
+    return {
+        'p50_ms': float(np.percentile(timings, 50)),
+        'p99_ms': float(np.percentile(timings, 99)),
+    }
+
+
+def _throughput(func: Callable, n: int) -> float:
+    """Items per second of one batched call covering ``n`` items"""
+    start = time.perf_counter()
+    func()
+    return n / (time.perf_counter() - start)
+
+
+def bench_stages(classifier: TenderClassifier, tenders: List[Dict]) -> Dict[str, float]:
+    texts = [classifier._tender_text(t) for t in tenders]
+    processed = classifier.preprocess_tenders(tenders)
+    X = classifier.vectorizer.transform(processed)
+
+    # Load the NER pipeline outside the timed region
+    classifier.extract_entities(texts[0])
+
+    stages = {
+        'preprocess': (
+            classifier.preprocess_text, texts,
+            lambda: classifier.preprocess_tenders(tenders)
+        ),
+        'vectorize': (
+            lambda text: classifier.vectorizer.transform([text]), processed,
+            lambda: classifier.vectorizer.transform(processed)
+        ),
+        'predict': (
+            lambda i: classifier.classifier.predict_proba(X[i]), list(range(X.shape[0])),
+            lambda: classifier.classifier.predict_proba(X)
+        ),
+        'extract_entities': (
+            classifier.extract_entities, texts,
+            lambda: list(classifier.nlp.pipe(texts))
+        ),
+        'classify': (
+            classifier.classify_tender, tenders,
+            lambda: classifier.classify_tenders(tenders)
+        ),
+    }
+
+    metrics = {}
+    for name, (single, items, batched) in stages.items():
+        for key, value in _latencies(single, items).items():
+            metrics[f'{name}.{key}'] = value
+        metrics[f'{name}.items_per_s'] = _throughput(batched, len(items))
+    return metrics
+
+
+def bench_training(size: int, estimator: str) -> Dict[str, float]:
+    training_data = pd.DataFrame(generate_tenders(size, duplicate_rate=0.0, seed=size))
+    classifier = TenderClassifier(estimator=estimator)
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    classifier.train(training_data)
+    seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        f'train_{size}.seconds': seconds,
+        f'train_{size}.peak_mb': peak / 1e6,
+    }
+
+
+def compare(metrics: Dict[str, float], baseline: Dict[str, float], tolerance: float) -> List[str]:
+    """Metrics that regressed by more than ``tolerance`` against the baseline"""
+    regressions = [f"{name}: not measured" for name in sorted(baseline) if name not in metrics]
+    for name, value in metrics.items():
+        if name not in baseline:
+            continue
+        expected = baseline[name]
+        higher_is_better = name.endswith('_per_s')
+        if higher_is_better and value < expected * (1 - tolerance):
+            regressions.append(f"{name}: {value:.3f} < baseline {expected:.3f}")
+        elif not higher_is_better and value > expected * (1 + tolerance):
+            regressions.append(f"{name}: {value:.3f} > baseline {expected:.3f}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--sample', type=int, default=500, help="Tenders used for the per-stage measurements")
+    parser.add_argument('--estimator', default='random_forest', choices=list(ESTIMATORS))
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    parser.add_argument('--update-baseline', action='store_true')
+    args = parser.parse_args()
+
+    # Keep one-off pipeline loading out of the first training measurement
+    TenderClassifier(estimator=args.estimator).preprocess_text("warm up")
+
+    metrics: Dict[str, float] = {}
+    for size in args.sizes:
+        metrics.update(bench_training(size, args.estimator))
+
+    classifier = TenderClassifier(estimator=args.estimator)
+    classifier.train(pd.DataFrame(generate_tenders(min(args.sizes), duplicate_rate=0.0, seed=1)))
+    metrics.update(bench_stages(classifier, generate_tenders(args.sample, duplicate_rate=0.0, seed=2)))
+
+    for name in sorted(metrics):
+        print(f"{name:<32} {metrics[name]:>12.3f}")
+
+    if args.update_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, 'w') as f:
+            json.dump(metrics, f, indent=2, sort_keys=True)
+        print(f"Baseline written to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        # Timings only mean something against the reference machine
+        print(f"SKIPPED regression check: no baseline at {args.baseline}. "
+              f"Record one on the reference machine with --update-baseline")
+        return
+
+    with open(args.baseline) as f:
+        regressions = compare(metrics, json.load(f), args.tolerance)
+    if regressions:
+        print("Performance regressions:")
+        for regression in regressions:
+            print(f"  {regression}")
+        sys.exit(1)
+    print("No regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
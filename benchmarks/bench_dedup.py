@@ -0,0 +1,70 @@
+"""Precision/recall and throughput of TenderDeduplicator on synthetic tenders
+
+Usage: python -m benchmarks.bench_dedup [--sizes 1000 10000 50000]
+"""
+import argparse
+import itertools
+import logging
+import time
+from collections import defaultdict
+from typing import Dict, List, Set, Tuple
+
+from benchmarks.synthetic import generate_tenders
+from scraper.deduplicator import TenderDeduplicator
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def _pairs(clusters: List[List[int]]) -> Set[Tuple[int, int]]:
+    pairs = set()
+    for members in clusters:
+        pairs.update(itertools.combinations(sorted(members), 2))
+    return pairs
+
+
+def evaluate(size: int, duplicate_rate: float = 0.2) -> Dict:
+    tenders = generate_tenders(size, duplicate_rate=duplicate_rate, seed=size)
+
+    truth: Dict[int, List[int]] = defaultdict(list)
+    for idx, tender in enumerate(tenders):
+        truth[tender['_cluster']].append(idx)
+    true_pairs = _pairs([m for m in truth.values() if len(m) > 1])
+
+    deduplicator = TenderDeduplicator()
+    start = time.perf_counter()
+    found_pairs = _pairs(deduplicator.find_clusters(tenders))
+    elapsed = time.perf_counter() - start
+
+    true_positives = len(found_pairs & true_pairs)
+    precision = true_positives / len(found_pairs) if found_pairs else 1.0
+    recall = true_positives / len(true_pairs) if true_pairs else 1.0
+
+    return {
+        'tenders': size,
+        'true_pairs': len(true_pairs),
+        'found_pairs': len(found_pairs),
+        'precision': precision,
+        'recall': recall,
+        'seconds': elapsed,
+        'tenders_per_second': size / elapsed if elapsed else float('inf'),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 50000])
+    parser.add_argument('--duplicate-rate', type=float, default=0.2)
+    args = parser.parse_args()
+
+    print(f"{'tenders':>8} {'pairs':>7} {'found':>7} {'precision':>9} {'recall':>7} {'seconds':>8} {'tenders/s':>10}")
+    for size in args.sizes:
+        r = evaluate(size, args.duplicate_rate)
+        print(
+            f"{r['tenders']:>8} {r['true_pairs']:>7} {r['found_pairs']:>7} "
+            f"{r['precision']:>9.3f} {r['recall']:>7.3f} {r['seconds']:>8.2f} {r['tenders_per_second']:>10.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""Outbound API calls with per-tender notifications vs. digests
+
+Counts the messages needed to deliver one busy day of tenders to every
+subscriber. It also checks that each digest message fits its platform's
+limit and that every tender is covered exactly once.
+
+Usage: python -m benchmarks.bench_digest [--tenders 500] [--chats 20]
+"""
+import argparse
+import time
+
+from benchmarks.synthetic import generate_tenders
+from notifier.digest import DIGEST_DEFAULTS, MESSAGE_LIMITS, build_digest
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tenders', type=int, default=500)
+    parser.add_argument('--chats', type=int, default=20)
+    args = parser.parse_args()
+
+    tenders = generate_tenders(args.tenders, duplicate_rate=0.0, seed=5)
+    for tender in tenders:
+        tender['url'] = f"https://tenders.go.ke/tender/{tender['reference']}"
+
+    targets = [('telegram', str(chat_id)) for chat_id in range(args.chats)] + [('twitter', '')]
+
+    print(f"{'platform':<10} {'max msgs':>8} {'per-tender':>10} {'digest':>7} {'reduction':>9} {'build ms':>8}")
+    for platform in MESSAGE_LIMITS:
+        chats = sum(1 for p, _ in targets if p == platform)
+        for max_messages in (None, 10, 5):
+            start = time.perf_counter()
+            digest = build_digest(tenders, platform, max_messages, DIGEST_DEFAULTS['more_url'])
+            build_ms = (time.perf_counter() - start) * 1000
+
+            assert all(len(text) <= MESSAGE_LIMITS[platform] for text, _ in digest)
+            covered = sorted(i for _, indices in digest for i in indices)
+            assert covered == list(range(len(tenders)))
+
+            per_tender = len(tenders) * chats
+            digest_calls = len(digest) * chats
+            print(
+                f"{platform:<10} {str(max_messages or '-'):>8} {per_tender:>10} {digest_calls:>7} "
+                f"{per_tender / digest_calls:>8.0f}x {build_ms:>8.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
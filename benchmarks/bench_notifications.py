@@ -0,0 +1,179 @@
+"""NotificationAgent.notify_all throughput against local mock Telegram/Twitter servers
+
+The mock Telegram server answers sendMessage after --latency-ms and, like
+the real API, replies 429 with retry_after when a chat receives more than
+one message per second or the bot sends more than 30 per second. Twitter
+is a blocking client posting to the same server. The concurrent notify_all
+is compared with the old loop: chats one by one, Twitter on the event
+loop, then a one second sleep per tender.
+
+Usage: python -m benchmarks.bench_notifications [--tenders 20] [--chats 20] [--sequential]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import defaultdict, deque
+
+import requests
+from aiohttp import web
+
+from benchmarks.synthetic import generate_tenders
+from notifier.notification_agent import NotificationAgent
+
+# notifier.notification_agent configures INFO logging on import
+logging.getLogger().setLevel(logging.WARNING)
+
+
+class MockPlatforms:
+    """aiohttp app imitating Telegram's sendMessage and Twitter's statuses/update"""
+
+    def __init__(self, latency_ms: float, chat_limit: int = 1, global_limit: int = 30):
+        self.latency = latency_ms / 1000
+        self.chat_limit = chat_limit
+        self.global_limit = global_limit
+        self.sent = defaultdict(int)
+        self.rejected = 0
+        self._recent = defaultdict(deque)
+        self.app = web.Application()
+        self.app.router.add_post('/bot{token}/getMe', self.get_me)
+        self.app.router.add_post('/bot{token}/sendMessage', self.send_message)
+        self.app.router.add_post('/1.1/statuses/update.json', self.update_status)
+
+    def _over_limit(self, key: str, limit: int) -> bool:
+        now = time.monotonic()
+        recent = self._recent[key]
+        # Allow a little client-side jitter, as the real API does
+        while recent and now - recent[0] >= 0.95:
+            recent.popleft()
+        if len(recent) >= limit:
+            return True
+        recent.append(now)
+        return False
+
+    async def get_me(self, request):
+        return web.json_response({'ok': True, 'result': {'id': 1, 'is_bot': True, 'first_name': 'bench', 'username': 'bench_bot'}})
+
+    async def send_message(self, request):
+        data = dict(await request.post()) if request.content_type != 'application/json' else await request.json()
+        chat_id = int(data['chat_id'])
+        limited = self._over_limit(f'chat:{chat_id}', self.chat_limit) or self._over_limit('global', self.global_limit)
+        await asyncio.sleep(self.latency)
+        if limited:
+            self.rejected += 1
+            return web.json_response(
+                {'ok': False, 'error_code': 429, 'description': 'Too Many Requests',
+                 'parameters': {'retry_after': 1}},
+                status=429
+            )
+        self.sent['telegram'] += 1
+        return web.json_response({'ok': True, 'result': {
+            'message_id': self.sent['telegram'],
+            'date': int(time.time()),
+            'chat': {'id': chat_id, 'type': 'private' if chat_id > 0 else 'group'},
+            'text': data.get('text', '')
+        }})
+
+    async def update_status(self, request):
+        await asyncio.sleep(self.latency)
+        self.sent['twitter'] += 1
+        return web.json_response({'id': self.sent['twitter']})
+
+
+class MockTwitterClient:
+    """Blocking stand-in for tweepy.API that posts to the mock server"""
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url
+        self.session = requests.Session()
+
+    def update_status(self, status: str):
+        self.session.post(f"{self.base_url}/1.1/statuses/update.json", data={'status': status}).raise_for_status()
+
+
+async def sequential_notify(agent: NotificationAgent, tenders, sleep: float):
+    """The original notify_all loop, kept for comparison"""
+    for tender in tenders:
+        message = agent.format_tender_message(tender, 'telegram')
+        for chat_id in agent.config['telegram']['chat_ids']:
+            try:
+                await agent.telegram_bot.send_message(chat_id=chat_id, text=message)
+            except Exception:
+                pass
+        agent.send_twitter_update(tender)
+        await asyncio.sleep(sleep)
+
+
+def serve_in_thread(app: web.Application) -> str:
+    """Serve ``app`` from its own event loop thread and return its base URL
+
+    A separate loop keeps the server responsive while the old loop blocks
+    the client's event loop on Twitter calls.
+    """
+    loop = asyncio.new_event_loop()
+    runner = web.AppRunner(app)
+    loop.run_until_complete(runner.setup())
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    loop.run_until_complete(site.start())
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    port = site._server.sockets[0].getsockname()[1]
+    return f"http://127.0.0.1:{port}"
+
+
+async def run(args, platforms: MockPlatforms, base_url: str):
+
+    config = {
+        'telegram': {'token': 'bench', 'base_url': f"{base_url}/bot", 'chat_ids': list(range(1, args.chats + 1))},
+        'twitter': {'consumer_key': 'x', 'consumer_secret': 'x', 'access_token': 'x', 'access_token_secret': 'x'},
+        # The real Twitter budget (300 per 3 hours) would dominate the run
+        'rate_limits': {'twitter': {'rate': args.twitter_rate, 'burst': 1}},
+    }
+    with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False) as f:
+        json.dump(config, f)
+    try:
+        agent = NotificationAgent(f.name)
+    finally:
+        os.unlink(f.name)
+    agent.twitter_api = MockTwitterClient(base_url)
+    await agent.telegram_bot.initialize()
+
+    tenders = generate_tenders(args.tenders, duplicate_rate=0.0, seed=3)
+    messages = args.tenders * (args.chats + 1)
+
+    start = time.perf_counter()
+    if args.sequential:
+        await sequential_notify(agent, tenders, args.sleep)
+    else:
+        stats = await agent.notify_all(tenders)
+        print(f"stats: {stats}")
+    seconds = time.perf_counter() - start
+
+    print(f"{'mode':<12} {'messages':>8} {'seconds':>8} {'msg/s':>7} {'429s':>5}")
+    mode = 'sequential' if args.sequential else 'concurrent'
+    print(f"{mode:<12} {messages:>8} {seconds:>8.1f} {messages / seconds:>7.1f} {platforms.rejected:>5}")
+    print(f"delivered: telegram={platforms.sent['telegram']} twitter={platforms.sent['twitter']}")
+
+    await agent.telegram_bot.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tenders', type=int, default=20)
+    parser.add_argument('--chats', type=int, default=20)
+    parser.add_argument('--latency-ms', type=float, default=50.0)
+    parser.add_argument('--twitter-rate', type=float, default=5.0, help="Twitter posts per second allowed in the run")
+    parser.add_argument('--sequential', action='store_true', help="Run the old one-by-one loop instead")
+    parser.add_argument('--sleep', type=float, default=1.0, help="Per-tender sleep of the old loop")
+    args = parser.parse_args()
+
+    platforms = MockPlatforms(args.latency_ms)
+    base_url = serve_in_thread(platforms.app)
+    asyncio.run(run(args, platforms, base_url))
+
+
+if __name__ == "__main__":
+    main()
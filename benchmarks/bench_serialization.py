@@ -0,0 +1,114 @@
+"""CPU time per /tenders response: stdlib JSON vs. typed models vs. cached bytes
+
+Publishes a synthetic snapshot and renders pages of --limit tenders the
+way the API used to (jsonable_encoder and json.dumps) and the way it does
+now: validated into TenderPage and serialized by pydantic-core on a cache
+miss, or returned as cached bytes on a hit. It then compares uncached
+pages of the full and compact views. Each case is timed with the process
+CPU clock.
+
+Usage: python -m benchmarks.bench_serialization [--tenders 20000] [--limit 100]
+"""
+import argparse
+import logging
+import os
+import tempfile
+import time
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+from api.models import TENDER_VIEWS, TenderPage
+from api.response_cache import ResponseCache
+from benchmarks.bench_async_store import populate
+from scraper.snapshot import SnapshotReader, publish_snapshot
+from scraper.tender_scraper import TenderScraper
+
+logging.basicConfig(level=logging.WARNING)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tenders', type=int, default=20000)
+    parser.add_argument('--limit', type=int, default=100)
+    parser.add_argument('--requests', type=int, default=2000)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    scraper = TenderScraper(f"sqlite:///{os.path.join(directory, 'bench.db')}")
+    populate(scraper, args.tenders)
+    snapshot_path = os.path.join(directory, 'snapshot.db')
+    publish_snapshot(scraper.db_session, snapshot_path)
+    reader = SnapshotReader(snapshot_path)
+    reader.available()
+
+    pages = max(1, min(50, args.tenders // args.limit))
+    cache = ResponseCache()
+
+    def query(page: int) -> dict:
+        total, tenders = reader.query_tenders(offset=page * args.limit, limit=args.limit)
+        return {
+            'total': total,
+            'page': page + 1,
+            'limit': args.limit,
+            'total_pages': (total + args.limit - 1) // args.limit,
+            'tenders': tenders,
+        }
+
+    results = [query(page) for page in range(pages)]
+
+    def stdlib_json(page: int) -> bytes:
+        return JSONResponse(jsonable_encoder(results[page])).body
+
+    def model_orjson(page: int) -> bytes:
+        return ORJSONResponse(TenderPage(**results[page]).model_dump()).body
+
+    def model_json(page: int) -> bytes:
+        return TenderPage(**results[page]).model_dump_json().encode('utf-8')
+
+    def cached(page: int) -> bytes:
+        body = cache.get(reader.version, page)
+        if body is None:
+            body = TenderPage(**query(page)).model_dump_json().encode('utf-8')
+            cache.put(reader.version, page, body)
+        return body
+
+    def timed(render, requests: int) -> float:
+        start = time.process_time()
+        for i in range(requests):
+            render(i % pages)
+        return (time.process_time() - start) / requests * 1e6
+
+    for page in range(pages):
+        cached(page)
+    assert all(len(stdlib_json(page)) > len(model_json(page)) * 0.5 for page in range(pages))
+
+    query_us = timed(query, min(args.requests, 200))
+    print(f"{args.tenders} tenders, limit={args.limit}, {args.requests} responses over {pages} pages")
+    print(f"snapshot query: {query_us:.0f} us/response, skipped on a cache hit")
+    print(f"{'serialization':<34} {'us/response':>11} {'with query':>10} {'speedup':>8}")
+    baseline = None
+    for name, render, queried in [
+        ("dict + jsonable_encoder + json", stdlib_json, True),
+        ("TenderPage + orjson", model_orjson, True),
+        ("TenderPage.model_dump_json (miss)", model_json, True),
+        ("cached bytes (hit)", cached, False),
+    ]:
+        serialize_us = timed(render, args.requests)
+        total_us = serialize_us + (query_us if queried else 0.0)
+        baseline = baseline or total_us
+        print(f"{name:<34} {serialize_us:>11.0f} {total_us:>10.0f} {baseline / total_us:>7.0f}x")
+
+    print(f"\n{'view (uncached)':<34} {'us/response':>11} {'bytes':>10}")
+    for view, fields in TENDER_VIEWS.items():
+        def render_view(page: int) -> bytes:
+            total, tenders = reader.query_tenders(offset=page * args.limit, limit=args.limit, fields=fields)
+            return TenderPage(
+                total=total, page=page + 1, limit=args.limit, total_pages=pages, tenders=tenders
+            ).model_dump_json(exclude_unset=True).encode('utf-8')
+
+        size = sum(len(render_view(page)) for page in range(pages)) // pages
+        print(f"{view:<34} {timed(render_view, min(args.requests, 200)):>11.0f} {size:>10}")
+
+if __name__ == "__main__":
+    main()
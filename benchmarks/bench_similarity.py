@@ -0,0 +1,56 @@
+"""Query latency of TenderSimilarityIndex at increasing corpus sizes
+
+Usage: python -m benchmarks.bench_similarity [--sizes 10000 100000]
+"""
+import argparse
+import logging
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import generate_tenders
+from classifier.similarity_index import TenderSimilarityIndex
+from classifier.tender_classifier import TenderClassifier
+
+logging.basicConfig(level=logging.WARNING)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--k', type=int, default=10)
+    args = parser.parse_args()
+
+    classifier = TenderClassifier(estimator='sgd')
+    classifier.train(pd.DataFrame(generate_tenders(2000, duplicate_rate=0.0, seed=1)))
+
+    print(f"{'tenders':>8} {'build s':>8} {'add/s':>8} {'p50 ms':>7} {'p99 ms':>7}")
+    for size in args.sizes:
+        tenders = generate_tenders(size, duplicate_rate=0.0, seed=size)
+        index = TenderSimilarityIndex(classifier)
+
+        start = time.perf_counter()
+        index.build(tenders[:-1000])
+        build_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        index.add(tenders[-1000:])
+        add_rate = 1000 / (time.perf_counter() - start)
+
+        references = [t['reference'] for t in tenders[:args.queries]]
+        timings = []
+        for reference in references:
+            start = time.perf_counter()
+            index.similar_to(reference, args.k)
+            timings.append((time.perf_counter() - start) * 1000)
+
+        print(
+            f"{size:>8} {build_seconds:>8.1f} {add_rate:>8.0f} "
+            f"{np.percentile(timings, 50):>7.2f} {np.percentile(timings, 99):>7.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Peak memory and latency of TenderClassifier with sparse features
+
+For each estimator this trains on synthetic tenders and reports the peak
+traced memory during training, next to the size the dense feature matrix
+would have had. It also reports per-tender latency of classify_tenders.
+
+Usage: python -m benchmarks.bench_sparse [--tenders 10000] [--estimators sgd linear_svm]
+"""
+import argparse
+import logging
+import time
+import tracemalloc
+
+import pandas as pd
+
+from benchmarks.synthetic import generate_tenders
+from classifier.tender_classifier import ESTIMATORS, TenderClassifier
+
+logging.basicConfig(level=logging.WARNING)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tenders', type=int, default=10000)
+    parser.add_argument('--estimators', nargs='+', default=list(ESTIMATORS), choices=list(ESTIMATORS))
+    args = parser.parse_args()
+
+    training_data = pd.DataFrame(generate_tenders(args.tenders, duplicate_rate=0.0, seed=1))
+    tenders = generate_tenders(1000, duplicate_rate=0.0, seed=2)
+
+    print(f"{'estimator':<20} {'features MB':>11} {'dense MB':>9} {'train peak MB':>13} {'train s':>8} {'ms/tender':>10}")
+    for name in args.estimators:
+        classifier = TenderClassifier(estimator=name)
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        classifier.train(training_data)
+        train_seconds = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        n_features = len(classifier.vectorizer.vocabulary_)
+        features = classifier.vectorizer.transform(
+            classifier._tender_text(t) for t in training_data.to_dict('records')
+        )
+        sparse_mb = (features.data.nbytes + features.indices.nbytes + features.indptr.nbytes) / 1e6
+        dense_mb = args.tenders * n_features * 8 / 1e6
+
+        start = time.perf_counter()
+        classifier.classify_tenders(tenders)
+        latency_ms = (time.perf_counter() - start) * 1000 / len(tenders)
+
+        print(
+            f"{name:<20} {sparse_mb:>11.1f} {dense_mb:>9.1f} {peak / 1e6:>13.1f} "
+            f"{train_seconds:>8.2f} {latency_ms:>10.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
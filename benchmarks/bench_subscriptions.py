@@ -0,0 +1,114 @@
+"""Subscription matching: inverted index vs. checking every rule
+
+Builds --subscriptions random alert rules over the synthetic vocabulary
+and matches --tenders new tenders against them. Brute force is timed on
+a sample and extrapolated. The sample also checks that both approaches
+return the same matches.
+
+Usage: python -m benchmarks.bench_subscriptions [--tenders 10000] [--subscriptions 100000]
+"""
+import argparse
+import random
+import time
+from datetime import datetime
+
+import pytz
+
+from benchmarks.synthetic import CATEGORIES, ENTITIES, LOCATIONS, generate_tenders
+from notifier.subscriptions import SubscriptionIndex, _closing_date, _normalize_entity, _tender_value, _tokens
+
+KEYWORDS = sorted({
+    word for subjects in CATEGORIES.values() for subject in subjects
+    for word in subject.split() if len(word) > 3
+}) + [subject for subjects in CATEGORIES.values() for subject in subjects] + LOCATIONS
+
+
+def random_rule(rng: random.Random) -> dict:
+    rule = {}
+    kind = rng.random()
+    if kind < 0.5:
+        rule['keywords'] = rng.sample(KEYWORDS, rng.randint(1, 3))
+        if rng.random() < 0.3:
+            rule['categories'] = [rng.choice(list(CATEGORIES))]
+    elif kind < 0.75:
+        rule['entities'] = rng.sample(ENTITIES, rng.randint(1, 2))
+    elif kind < 0.95:
+        rule['categories'] = [rng.choice(list(CATEGORIES))]
+    if rng.random() < 0.3:
+        low = rng.choice([0, 1e6, 1e7, 5e7])
+        rule['min_value'] = low
+        rule['max_value'] = low * 10 if low else 5e6
+    if rng.random() < 0.3 or not rule:
+        rule['closing_within_days'] = rng.choice([7, 14, 30, 90])
+    return rule
+
+
+def brute_force(index: SubscriptionIndex, tender: dict, now: datetime) -> set:
+    """Check every rule against the tender, one at a time"""
+    tokens = _tokens(f"{tender.get('title') or ''} {tender.get('description') or ''}")
+    text = f" {' '.join(tokens)} "
+    category = (tender.get('category') or '').strip().lower()
+    entity = _normalize_entity(tender.get('procuring_entity'))
+    value = _tender_value(tender)
+    closing_date = _closing_date(tender)
+    days_left = (closing_date - now).total_seconds() / 86400 if closing_date else None
+
+    matched = set()
+    for i, rule in enumerate(index.rules):
+        if rule['categories'] and category not in rule['categories']:
+            continue
+        if rule['entities'] and entity not in rule['entities']:
+            continue
+        if rule['keywords'] and not any(f" {keyword} " in text for keyword in rule['keywords']):
+            continue
+        if rule['min_value'] is not None and (value is None or value < rule['min_value']):
+            continue
+        if rule['max_value'] is not None and (value is None or value > rule['max_value']):
+            continue
+        if rule['closing_within_days'] is not None and (
+                days_left is None or not 0 <= days_left <= rule['closing_within_days']):
+            continue
+        matched.add(i)
+    return matched
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tenders', type=int, default=10000)
+    parser.add_argument('--subscriptions', type=int, default=100000)
+    parser.add_argument('--sample', type=int, default=100, help="Tenders matched by brute force")
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    now = pytz.timezone('Africa/Nairobi').localize(datetime(2024, 7, 1))
+    tenders = generate_tenders(args.tenders, duplicate_rate=0.0, seed=11)
+
+    start = time.perf_counter()
+    index = SubscriptionIndex()
+    for i in range(args.subscriptions):
+        index.add(('telegram', str(i)), **random_rule(rng))
+    build_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    matches = [index.match(tender, now) for tender in tenders]
+    index_seconds = time.perf_counter() - start
+
+    sample = tenders[:args.sample]
+    start = time.perf_counter()
+    expected = [brute_force(index, tender, now) for tender in sample]
+    brute_seconds = (time.perf_counter() - start) * len(tenders) / len(sample)
+
+    mismatches = sum(set(got.tolist()) != want for got, want in zip(matches, expected))
+    total_matches = sum(len(m) for m in matches)
+
+    print(f"subscriptions: {args.subscriptions}, tenders: {args.tenders}")
+    print(f"index build:          {build_seconds:8.2f} s")
+    print(f"inverted index match: {index_seconds:8.2f} s ({args.tenders / index_seconds:,.0f} tenders/s)")
+    print(f"brute force match:    {brute_seconds:8.2f} s (extrapolated from {len(sample)} tenders)")
+    print(f"speedup:              {brute_seconds / index_seconds:8.1f}x")
+    print(f"matches per tender:   {total_matches / len(tenders):8.1f}")
+    print(f"sample mismatches:    {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""Throughput of tender value extraction: per-text parse_amount vs. column mode
+
+Usage: python -m benchmarks.bench_value_extraction [--tenders 100000]
+"""
+import argparse
+import time
+
+import pandas as pd
+
+from benchmarks.synthetic import generate_tenders
+from classifier.value_extraction import extract_amount_column, parse_amount
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tenders', type=int, default=100000)
+    args = parser.parse_args()
+
+    tenders = generate_tenders(args.tenders, duplicate_rate=0.0, seed=3)
+    texts = pd.Series([t['description'] for t in tenders])
+    expected = pd.Series([t['value'] for t in tenders])
+
+    start = time.perf_counter()
+    per_text = [parse_amount(text) for text in texts]
+    loop_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    column = extract_amount_column(texts)
+    column_seconds = time.perf_counter() - start
+
+    # "KES 5.5M" style amounts are rounded to 0.1M in the text
+    accurate = ((column - expected).abs() <= expected * 0.05 + 1).mean()
+
+    print(f"parse_amount loop:     {args.tenders / loop_seconds:>10.0f} texts/s")
+    print(f"extract_amount_column: {args.tenders / column_seconds:>10.0f} texts/s")
+    print(f"within 5% of truth:    {accurate:>10.1%}")
+    assert per_text == [None if pd.isna(v) else v for v in column]
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""Deterministic synthetic tender corpus shared by the benchmark scripts"""
+import random
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+ENTITIES = [
+    'Ministry of Health', 'Ministry of Education', 'Kenya Power and Lighting Company',
+    'Kenya Rural Roads Authority', 'Kenya Urban Roads Authority', 'Nairobi City County',
+    'Mombasa County Government', 'Kenya Ports Authority', 'Kenya Revenue Authority',
+    'National Treasury', 'Kenyatta National Hospital', 'University of Nairobi',
+    'Kenya Medical Supplies Authority', 'Athi Water Works Development Agency',
+    'Kenya Airports Authority', 'Kisumu County Government', 'Nakuru County Government',
+    'Kenya Wildlife Service', 'Teachers Service Commission', 'Kenya National Highways Authority'
+]
+
+CATEGORIES = {
+    'Works': [
+        'construction of classroom blocks', 'rehabilitation of access roads',
+        'drilling and equipping of boreholes', 'construction of perimeter wall',
+        'upgrading of rural roads to bitumen standard', 'renovation of office block',
+        'construction of footbridge', 'installation of street lighting'
+    ],
+    'Goods': [
+        'supply and delivery of office furniture', 'supply of medical equipment',
+        'supply of laboratory reagents', 'supply and delivery of motor vehicles',
+        'supply of computers and accessories', 'supply of pharmaceuticals',
+        'supply of school textbooks', 'supply of transformers and meters'
+    ],
+    'Services': [
+        'provision of cleaning services', 'provision of security services',
+        'provision of insurance cover', 'consultancy for feasibility study',
+        'provision of catering services', 'maintenance of ICT equipment',
+        'provision of courier services', 'audit of financial statements'
+    ],
+}
+
+LOCATIONS = ['Nairobi', 'Mombasa', 'Kisumu', 'Nakuru', 'Eldoret', 'Garissa', 'Machakos', 'Nyeri']
+
+AMOUNT_FORMATS = ['KES {:,.2f}', 'Ksh {:,.0f}', 'KShs. {:,.0f}', 'KES {:.1f}M']
+
+
+def _amount_text(rng: random.Random, value: float) -> str:
+    fmt = rng.choice(AMOUNT_FORMATS)
+    if fmt.endswith('M'):
+        return fmt.format(value / 1_000_000)
+    return fmt.format(value)
+
+
+def _perturb_title(rng: random.Random, title: str) -> str:
+    """Rewrite a title the way a second portal would list it"""
+    variants = [
+        lambda t: t.upper(),
+        lambda t: t.replace(' and ', ' & '),
+        lambda t: f"Tender for {t}",
+        lambda t: f"{t} - {rng.choice(LOCATIONS)}",
+        lambda t: t.replace('supply and delivery', 'supply & delivery').title(),
+        lambda t: t.rstrip('s') + '.',
+    ]
+    for variant in rng.sample(variants, rng.randint(1, 2)):
+        title = variant(title)
+    return title
+
+
+def generate_tenders(n: int, duplicate_rate: float = 0.2, seed: int = 0) -> List[Dict]:
+    """Generate ``n`` tenders, a share of which are cross-listed duplicates
+
+    Every tender carries ``_cluster`` (ground-truth identity shared by
+    duplicate listings) and ``_category`` (ground-truth label).
+    """
+    rng = random.Random(seed)
+    base_date = datetime(2024, 7, 1)
+    tenders: List[Dict] = []
+    cluster = 0
+
+    while len(tenders) < n:
+        category = rng.choice(list(CATEGORIES))
+        subject = rng.choice(CATEGORIES[category])
+        location = rng.choice(LOCATIONS)
+        entity = rng.choice(ENTITIES)
+        value = round(rng.uniform(50_000, 500_000_000), 2)
+        closing = base_date + timedelta(days=rng.randint(0, 365), hours=10)
+        lot = rng.randint(1, 9999)
+
+        title = f"{subject} in {location} lot {lot}"
+        description = (
+            f"The {entity} invites sealed bids for the {subject} at {location}. "
+            f"Estimated budget {_amount_text(rng, value)}. "
+            f"Bidders must be registered with the relevant authorities."
+        )
+        tender = {
+            'reference': f"{entity[:3].upper()}/{closing.year}/{cluster:06d}",
+            'title': title,
+            'description': description,
+            'procuring_entity': entity,
+            'category': category,
+            'closing_date': closing.isoformat(),
+            'value': value,
+            'currency': 'KES',
+            'source': 'mygov',
+            '_cluster': cluster,
+            '_category': category,
+        }
+        tenders.append(tender)
+
+        if len(tenders) < n and rng.random() < duplicate_rate:
+            duplicate = dict(tender)
+            duplicate.update({
+                'reference': f"ocds-{rng.randint(10**6, 10**7)}-{cluster}",
+                'title': _perturb_title(rng, title),
+                'procuring_entity': entity.upper() if rng.random() < 0.5 else f"The {entity}",
+                'source': 'ppip',
+            })
+            tenders.append(duplicate)
+
+        cluster += 1
+
+    rng.shuffle(tenders)
+    return tenders
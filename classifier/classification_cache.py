@@ -0,0 +1,200 @@
+import argparse
+import hashlib
+import json
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from scraper.tender_scraper import TenderClassificationRecord, TenderRecord, TenderScraper
+from classifier.tender_classifier import TenderClassifier
+
+logger = logging.getLogger(__name__)
+
+
+def fingerprint(tender: Dict) -> str:
+    """Hash of the text the classifier sees for a tender"""
+    text = f"{tender.get('title') or ''}\x1f{tender.get('description') or ''}"
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+class ClassificationCache:
+    """Classification results persisted next to the tenders table
+
+    Entries are keyed by the tender's text fingerprint and the model
+    version, so a tender is only classified again when its title or
+    description changes or a different model is loaded.
+    """
+
+    def __init__(self, db_session):
+        self.db_session = db_session
+
+    def get_many(self, fingerprints: List[str], model_version: str) -> Dict[str, Dict]:
+        """Cached results for the given fingerprints under one model version"""
+        results = {}
+        # Stay well below SQLite's bound parameter limit
+        for start in range(0, len(fingerprints), 500):
+            records = self.db_session.query(TenderClassificationRecord).filter(
+                TenderClassificationRecord.model_version == model_version,
+                TenderClassificationRecord.fingerprint.in_(fingerprints[start:start + 500])
+            ).all()
+            for record in records:
+                results[record.fingerprint] = self._to_result(record)
+        return results
+
+    def put_many(self, entries: List[Dict], model_version: str, commit: bool = True):
+        """Store results; each entry carries ``fingerprint`` and ``tender_id``
+
+        With ``commit=False`` the results are only added to the session, so
+        the caller can commit them together with its own changes.
+        """
+        self.db_session.add_all(self._to_record(entry, model_version) for entry in entries)
+        if not commit:
+            return
+        try:
+            self.db_session.commit()
+        except Exception as e:
+            logger.error(f"Failed to cache classifications: {str(e)}")
+            self.db_session.rollback()
+
+    @staticmethod
+    def _to_record(entry: Dict, model_version: str) -> TenderClassificationRecord:
+        return TenderClassificationRecord(
+            tender_id=entry.get('tender_id'),
+            fingerprint=entry['fingerprint'],
+            model_version=model_version,
+            category=entry['category'],
+            confidence=entry['confidence'],
+            entities=json.dumps(entry['entities']),
+            risk_level=entry['risk_level'],
+            estimated_value=entry['estimated_value']
+        )
+
+    def has_version(self, model_version: str) -> bool:
+        """Whether any results from this model version are cached"""
+        return self.db_session.query(TenderClassificationRecord.id).filter(
+            TenderClassificationRecord.model_version == model_version
+        ).first() is not None
+
+    def has_stale(self, model_version: str) -> bool:
+        """Whether results from another model version are cached"""
+        return self.db_session.query(TenderClassificationRecord.id).filter(
+            TenderClassificationRecord.model_version != model_version
+        ).first() is not None
+
+    def purge_stale(self, model_version: str, older_than: Optional[datetime] = None) -> int:
+        """Drop results produced by any other model version
+
+        With ``older_than``, only results cached before then are dropped, so
+        a model that is still being served keeps its recent entries.
+        """
+        query = self.db_session.query(TenderClassificationRecord).filter(
+            TenderClassificationRecord.model_version != model_version
+        )
+        if older_than is not None:
+            query = query.filter(TenderClassificationRecord.created_at < older_than)
+        deleted = query.delete(synchronize_session=False)
+        self.db_session.commit()
+        return deleted
+
+    @staticmethod
+    def _to_result(record: TenderClassificationRecord) -> Dict:
+        return {
+            'tender_id': record.tender_id,
+            'category': record.category,
+            'confidence': record.confidence,
+            'entities': json.loads(record.entities) if record.entities else {},
+            'risk_level': record.risk_level,
+            'estimated_value': record.estimated_value
+        }
+
+
+def classify_pending(scraper: TenderScraper,
+                     classifier: TenderClassifier,
+                     batch_size: int = 256) -> Dict[str, int]:
+    """Classify new or changed tenders, reusing cached results where possible
+
+    Walks ``get_unprocessed_tenders``, serves unchanged texts from the
+    cache, classifies the rest in batches and marks every tender as
+    processed, committing once per batch. The first run with a new model
+    marks every tender unprocessed again so all are reclassified; results
+    from older models are left for ``ClassificationCache.purge_stale``.
+    """
+    if not classifier.is_trained:
+        raise ValueError("Classifier must be trained before prediction")
+
+    cache = ClassificationCache(scraper.db_session)
+    version = classifier.model_version
+    if not cache.has_version(version) and cache.has_stale(version):
+        scraper.db_session.query(TenderRecord).update({TenderRecord.is_processed: False})
+        scraper.db_session.commit()
+        logger.info(f"Model changed to {version}, reclassifying all tenders")
+
+    stats = {'processed': 0, 'cached': 0, 'classified': 0, 'failed': 0}
+
+    records = scraper.get_unprocessed_tenders()
+    for start in range(0, len(records), batch_size):
+        batch = records[start:start + batch_size]
+        tenders = [
+            {'id': record.id, 'title': record.title, 'description': record.description}
+            for record in batch
+        ]
+        fingerprints = [fingerprint(tender) for tender in tenders]
+        cached = cache.get_many(fingerprints, version)
+
+        misses = [
+            (tender, fp) for tender, fp in zip(tenders, fingerprints) if fp not in cached
+        ]
+        new_entries = []
+        if misses:
+            results = classifier.classify_tenders([tender for tender, _ in misses], batch_size=batch_size)
+            for (tender, fp), result in zip(misses, results):
+                # Identical texts within a batch only need storing once
+                if fp not in cached:
+                    cached[fp] = result
+                    new_entries.append({**result, 'fingerprint': fp})
+
+        # Results and processed flags land together, so a failed batch is
+        # picked up again on the next run
+        try:
+            cache.put_many(new_entries, version, commit=False)
+            scraper.mark_many_as_processed([tender['id'] for tender in tenders], commit=False)
+            scraper.db_session.commit()
+        except Exception as e:
+            logger.error(f"Failed to store classifications: {str(e)}")
+            scraper.db_session.rollback()
+            stats['failed'] += len(tenders)
+            continue
+
+        stats['classified'] += len(new_entries)
+        stats['cached'] += len(tenders) - len(misses)
+        stats['processed'] += len(tenders)
+
+    logger.info(
+        f"Processed {stats['processed']} tenders: {stats['cached']} from cache, "
+        f"{stats['classified']} classified, {stats['failed']} failed"
+    )
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Classify new or changed tenders")
+    parser.add_argument('model', nargs='?', default='tender_classifier_model.joblib')
+    parser.add_argument('--purge-stale-days', type=float,
+                        help="Also drop results of other model versions cached more than this many days ago; "
+                             "run with this from a scheduled job")
+    args = parser.parse_args()
+
+    scraper = TenderScraper()
+    classifier = TenderClassifier()
+    classifier.load_model(args.model)
+    classify_pending(scraper, classifier)
+
+    if args.purge_stale_days is not None:
+        cutoff = datetime.utcnow() - timedelta(days=args.purge_stale_days)
+        purged = ClassificationCache(scraper.db_session).purge_stale(classifier.model_version, older_than=cutoff)
+        logger.info(f"Dropped {purged} cached results from other model versions")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -0,0 +1,224 @@
+import argparse
+import logging
+import os
+import uuid
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.linear_model import SGDClassifier
+from sqlalchemy import DateTime, bindparam, create_engine, text
+
+from classifier.tender_classifier import TenderClassifier
+
+logger = logging.getLogger(__name__)
+
+# ``labelled_at`` is when a tender's category was last set; it drives the
+# watermark. Parquet exports may still call it ``updated_at``.
+TRAINING_COLUMNS = ['title', 'description', 'category', 'labelled_at']
+
+
+class IncrementalTenderClassifier(TenderClassifier):
+    """TenderClassifier that learns from a stream of labelled chunks
+
+    Features come from a stateless HashingVectorizer, so there is no
+    vocabulary to refit, and the SGD estimator is updated with
+    ``partial_fit``. Memory stays bounded by the chunk size however much
+    history has accumulated. ``watermark`` records the newest ``labelled_at``
+    seen, so the next run only reads tenders labelled since then.
+
+    The label set is fixed on the first update, because the estimator's
+    classes cannot grow afterwards. Pass ``categories`` up front when later
+    chunks may introduce labels the first one lacks; a chunk with an
+    unknown label raises instead of being learned from only in part.
+    """
+
+    def __init__(self, categories: Optional[List[str]] = None, n_features: int = 2 ** 18):
+        super().__init__(estimator='sgd')
+        self.vectorizer = HashingVectorizer(
+            n_features=n_features,
+            ngram_range=(1, 2),
+            stop_words='english',
+            alternate_sign=False,
+            dtype=np.float32
+        )
+        self.classifier = SGDClassifier(
+            loss='log_loss',
+            alpha=1e-5,
+            random_state=42
+        )
+        self.estimator = 'sgd_incremental'
+        if categories:
+            self.category_mapping = {cat: idx for idx, cat in enumerate(categories)}
+            self._category_names = {v: k for k, v in self.category_mapping.items()}
+        self.watermark: Optional[datetime] = None
+        self.samples_seen = 0
+
+    def prepare_features(self, tenders: List[Dict]):
+        """Hash preprocessed text into a sparse feature matrix"""
+        return self.vectorizer.transform(self.preprocess_tenders(tenders))
+
+    def partial_train(self, chunk: pd.DataFrame) -> int:
+        """Update the model with one chunk of labelled tenders
+
+        Returns the number of tenders learned from. Before the update the
+        chunk is scored against the current model, which gives a running
+        held-out accuracy without a separate test split.
+        """
+        chunk = chunk[chunk['category'].notna()]
+        if not self.category_mapping:
+            categories = sorted(chunk['category'].unique())
+            self.category_mapping = {cat: idx for idx, cat in enumerate(categories)}
+            self._category_names = {v: k for k, v in self.category_mapping.items()}
+
+        known = chunk['category'].isin(self.category_mapping)
+        if not known.all():
+            unknown = sorted(chunk.loc[~known, 'category'].unique())
+            raise ValueError(
+                f"{int((~known).sum())} tenders have categories the model was not started with: "
+                f"{unknown}. Train a new checkpoint with the full category list."
+            )
+        if chunk.empty:
+            return 0
+
+        X = self.prepare_features(chunk.to_dict('records'))
+        y = chunk['category'].map(self.category_mapping).to_numpy()
+
+        if self.is_trained:
+            logger.info(f"Progressive accuracy: {self.classifier.score(X, y):.3f} on {len(y)} tenders")
+
+        self.classifier.partial_fit(X, y, classes=np.arange(len(self.category_mapping)))
+        self.samples_seen += len(y)
+        self.is_trained = True
+
+        if 'labelled_at' in chunk and chunk['labelled_at'].notna().any():
+            newest = pd.to_datetime(chunk['labelled_at']).max().to_pydatetime()
+            if self.watermark is None or newest > self.watermark:
+                self.watermark = newest
+        return len(y)
+
+    def train_stream(self, chunks: Iterable[pd.DataFrame]) -> int:
+        """Update the model from a stream of chunks, returning the tender count"""
+        logger.info("Starting incremental classifier training...")
+        total = sum(self.partial_train(chunk) for chunk in chunks)
+        if total:
+            # New knowledge means a new version, which invalidates cached results
+            self.model_version = uuid.uuid4().hex[:16]
+        logger.info(f"Learned from {total} tenders ({self.samples_seen} in total)")
+        return total
+
+    def train(self, training_data: pd.DataFrame, chunksize: int = 5000):
+        """Train from a DataFrame, one chunk at a time"""
+        self.train_stream(
+            training_data.iloc[start:start + chunksize]
+            for start in range(0, len(training_data), chunksize)
+        )
+
+    def _model_data(self) -> Dict:
+        return {
+            **super()._model_data(),
+            'watermark': self.watermark,
+            'samples_seen': self.samples_seen
+        }
+
+    def _restore(self, model_data: Dict, path: str):
+        super()._restore(model_data, path)
+        self.watermark = model_data.get('watermark')
+        self.samples_seen = model_data.get('samples_seen', 0)
+
+
+# Tenders stored before labels were timestamped count as labelled on insert
+_LABELLED_AT = "COALESCE(category_updated_at, created_at)"
+
+
+def db_categories(db_url: str = "sqlite:///tenders.db") -> List[str]:
+    """Every category label in the tenders DB, to start a new model with"""
+    engine = create_engine(db_url)
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT DISTINCT category FROM tenders WHERE category IS NOT NULL"))
+        return sorted(category for category, in rows)
+
+
+def iter_db_chunks(db_url: str = "sqlite:///tenders.db",
+                   since: Optional[datetime] = None,
+                   chunksize: int = 5000) -> Iterator[pd.DataFrame]:
+    """Stream tenders labelled after ``since`` from the tenders DB
+
+    Only a new or changed category counts; re-scrapes and processing
+    flags, which also bump ``updated_at``, do not bring a tender back.
+    """
+    engine = create_engine(db_url)
+    query = (
+        f"SELECT title, description, category, {_LABELLED_AT} AS labelled_at "
+        "FROM tenders WHERE category IS NOT NULL"
+    )
+    params = {}
+    if since is not None:
+        query += f" AND {_LABELLED_AT} > :since"
+        params['since'] = since
+    query += " ORDER BY labelled_at"
+    statement = text(query)
+    if since is not None:
+        # Bind as DateTime so SQLite compares it in the stored format
+        statement = statement.bindparams(bindparam('since', type_=DateTime))
+
+    with engine.connect() as conn:
+        yield from pd.read_sql_query(
+            statement, conn, params=params, chunksize=chunksize, parse_dates=['labelled_at']
+        )
+
+
+def iter_parquet_chunks(paths: Iterable[str],
+                        since: Optional[datetime] = None,
+                        chunksize: int = 5000) -> Iterator[pd.DataFrame]:
+    """Stream labelled tenders from Parquet files, one record batch at a time"""
+    import pyarrow.parquet as pq
+
+    for path in paths:
+        parquet_file = pq.ParquetFile(path)
+        names = parquet_file.schema_arrow.names
+        columns = [c for c in TRAINING_COLUMNS if c in names]
+        renames = {}
+        if 'labelled_at' not in names and 'updated_at' in names:
+            columns.append('updated_at')
+            renames['updated_at'] = 'labelled_at'
+        for batch in parquet_file.iter_batches(batch_size=chunksize, columns=columns):
+            chunk = batch.to_pandas().rename(columns=renames)
+            if since is not None and 'labelled_at' in chunk:
+                chunk = chunk[pd.to_datetime(chunk['labelled_at']) > since]
+            if not chunk.empty:
+                yield chunk
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incrementally train the tender classifier")
+    parser.add_argument('--checkpoint', default='tender_classifier_incremental.joblib')
+    parser.add_argument('--db-url', default="sqlite:///tenders.db")
+    parser.add_argument('--parquet', nargs='*', help="Read training chunks from Parquet files instead of the DB")
+    parser.add_argument('--chunksize', type=int, default=5000)
+    args = parser.parse_args()
+
+    if os.path.exists(args.checkpoint):
+        classifier = IncrementalTenderClassifier()
+        classifier.load_model(args.checkpoint)
+        logger.info(f"Resuming from checkpoint with watermark {classifier.watermark}")
+    else:
+        # Fix the label set from the whole DB, not just the first chunk
+        classifier = IncrementalTenderClassifier(None if args.parquet else db_categories(args.db_url))
+
+    if args.parquet:
+        chunks = iter_parquet_chunks(args.parquet, classifier.watermark, args.chunksize)
+    else:
+        chunks = iter_db_chunks(args.db_url, classifier.watermark, args.chunksize)
+
+    if classifier.train_stream(chunks):
+        classifier.save_model(args.checkpoint)
+    else:
+        logger.info("No newly labelled tenders since the last checkpoint")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -0,0 +1,117 @@
+import asyncio
+import logging
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Any, Callable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    """Coalesce concurrent single-item requests into batched calls
+
+    ``submit`` queues one item and waits for its result. A background task
+    gathers queued items until ``max_batch_size`` is reached or the oldest
+    has waited ``max_wait_ms``. It then runs ``process_batch`` once for the
+    whole group on ``executor``. By default that is a single thread, so the
+    wrapped model is never called concurrently.
+
+    Queued items live only in memory. ``stop`` refuses new items and flushes
+    the queue; anything still unprocessed after ``drain_timeout`` fails with
+    ``RuntimeError`` and is counted in a warning, so callers are never left
+    waiting.
+    """
+
+    def __init__(self,
+                 process_batch: Callable[[List[Any]], List[Any]],
+                 max_batch_size: int = 64,
+                 max_wait_ms: float = 5.0,
+                 executor: Optional[Executor] = None):
+        self.process_batch = process_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.executor = executor or ThreadPoolExecutor(max_workers=1, thread_name_prefix='micro-batcher')
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._in_flight: List[Tuple[Any, asyncio.Future]] = []
+        self._stopping = False
+
+    def start(self):
+        """Start the batching task on the running event loop"""
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._in_flight = []
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self, drain_timeout: Optional[float] = 10.0):
+        """Process the queued items, then stop the batching task
+
+        Items still queued or in flight after ``drain_timeout`` seconds are
+        failed rather than dropped silently. ``None`` waits indefinitely.
+        """
+        if self._worker is None:
+            return
+        self._stopping = True
+        try:
+            await asyncio.wait_for(self._queue.join(), drain_timeout)
+        except asyncio.TimeoutError:
+            pass
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+
+        dropped = self._in_flight
+        while not self._queue.empty():
+            dropped.append(self._queue.get_nowait())
+        pending = [future for _, future in dropped if not future.done()]
+        for future in pending:
+            future.set_exception(RuntimeError("MicroBatcher stopped before the item was processed"))
+        if pending:
+            logger.warning(f"Dropped {len(pending)} queued items on shutdown")
+        self._in_flight = []
+        self._stopping = False
+
+    async def submit(self, item: Any) -> Any:
+        """Queue one item and wait for its result"""
+        if self._stopping:
+            raise RuntimeError("MicroBatcher is stopping")
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, future))
+        return await future
+
+    async def _collect(self) -> List[Tuple[Any, asyncio.Future]]:
+        # Gathered into _in_flight so stop() can fail a half-collected batch
+        batch = self._in_flight = [await self._queue.get()]
+        deadline = asyncio.get_running_loop().time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - asyncio.get_running_loop().time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            items = [item for item, _ in batch]
+            try:
+                results = await loop.run_in_executor(self.executor, self.process_batch, items)
+            except Exception as e:
+                logger.error(f"Batch of {len(items)} failed: {str(e)}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+            else:
+                for (_, future), result in zip(batch, results):
+                    if not future.done():
+                        future.set_result(result)
+            self._in_flight = []
+            for _ in batch:
+                self._queue.task_done()
@@ -0,0 +1,114 @@
+import logging
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from sklearn.decomposition import TruncatedSVD
+
+from classifier.tender_classifier import TenderClassifier
+
+logger = logging.getLogger(__name__)
+
+# Fields kept per tender so results can be rendered without another lookup
+SUMMARY_FIELDS = ['reference', 'title', 'procuring_entity', 'category', 'closing_date', 'source']
+
+
+class TenderSimilarityIndex:
+    """Top-k "similar tenders" over the classifier's TF-IDF space
+
+    The TF-IDF vectors of the trained classifier are projected onto
+    ``n_components`` dimensions with a truncated SVD (LSA). The rows are
+    L2-normalized and kept in one contiguous float32 matrix, so a query
+    is a single matrix-vector product plus ``argpartition``. With the
+    default 128 dimensions that is a few milliseconds at 100k tenders.
+    The projection is fitted once in ``build``. ``add`` projects new or
+    changed tenders into spare capacity of the matrix, so ingestion never
+    triggers a rebuild.
+    """
+
+    def __init__(self, classifier: TenderClassifier, n_components: int = 128, random_state: int = 42):
+        if not classifier.is_trained:
+            raise ValueError("Classifier must be trained before building a similarity index")
+        self.classifier = classifier
+        self.n_components = n_components
+        self.svd = TruncatedSVD(n_components=n_components, random_state=random_state)
+        self.vectors = np.zeros((0, n_components), dtype=np.float32)
+        self.size = 0
+        self.summaries: List[Dict] = []
+        self.rows: Dict[str, int] = {}
+        self.version: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def _embed(self, tenders: List[Dict]) -> np.ndarray:
+        X = self.classifier.vectorizer.transform(self.classifier.preprocess_tenders(tenders))
+        vectors = self.svd.transform(X).astype(np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def build(self, tenders: List[Dict], version: Optional[str] = None):
+        """Fit the projection and index ``tenders`` from scratch"""
+        X = self.classifier.vectorizer.transform(self.classifier.preprocess_tenders(tenders))
+        n_components = min(self.n_components, X.shape[1] - 1, max(len(tenders) - 1, 1))
+        if n_components != self.svd.n_components:
+            self.svd.set_params(n_components=n_components)
+        self.svd.fit(X)
+
+        with self._lock:
+            self.vectors = np.zeros((max(len(tenders), 1024), n_components), dtype=np.float32)
+            self.size = 0
+            self.summaries = []
+            self.rows = {}
+        self.add(tenders, version)
+        logger.info(f"Built similarity index over {self.size} tenders ({n_components} dimensions)")
+
+    def add(self, tenders: Iterable[Dict], version: Optional[str] = None) -> int:
+        """Index new tenders and re-embed changed ones, returning the count"""
+        tenders = [t for t in tenders if t.get('reference')]
+        if tenders:
+            vectors = self._embed(tenders)
+            with self._lock:
+                for tender, vector in zip(tenders, vectors):
+                    row = self.rows.get(tender['reference'])
+                    if row is None:
+                        row = self._append_row()
+                        self.rows[tender['reference']] = row
+                        self.summaries.append({})
+                    self.vectors[row] = vector
+                    self.summaries[row] = {field: tender.get(field) for field in SUMMARY_FIELDS}
+        if version is not None:
+            self.version = version
+        return len(tenders)
+
+    def _append_row(self) -> int:
+        if self.size == len(self.vectors):
+            # Grow geometrically so appends stay amortized O(1)
+            grown = np.zeros((max(2 * len(self.vectors), 1024), self.vectors.shape[1]), dtype=np.float32)
+            grown[:self.size] = self.vectors[:self.size]
+            self.vectors = grown
+        self.size += 1
+        return self.size - 1
+
+    def _top_k(self, query: np.ndarray, k: int, exclude: Optional[int] = None) -> List[Tuple[Dict, float]]:
+        with self._lock:
+            scores = self.vectors[:self.size] @ query
+            summaries = self.summaries
+        if exclude is not None:
+            scores[exclude] = -np.inf
+        k = min(k, len(scores) - (exclude is not None))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(summaries[i], float(scores[i])) for i in top]
+
+    def similar_to(self, reference: str, k: int = 10) -> Optional[List[Tuple[Dict, float]]]:
+        """Tenders most similar to an indexed tender, or None if it is unknown"""
+        row = self.rows.get(reference)
+        if row is None:
+            return None
+        return self._top_k(self.vectors[row].copy(), k, exclude=row)
+
+    def similar_to_tender(self, tender: Dict, k: int = 10) -> List[Tuple[Dict, float]]:
+        """Indexed tenders most similar to an arbitrary tender"""
+        return self._top_k(self._embed([tender])[0], k)
@@ -2,48 +2,141 @@ import pandas as pd
 import numpy as np
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+from sklearn.svm import LinearSVC
+from sklearn.calibration import CalibratedClassifierCV
 from sklearn.model_selection import train_test_split
+from scipy import sparse
+from classifier.value_extraction import extract_amounts, parse_amount
 import spacy
 import logging
-from typing import List, Dict, Tuple
+from typing import Iterable, Iterator, List, Dict, Optional, Tuple
 import joblib
-import os
+import hashlib
+import threading
+import uuid
+from datetime import datetime
+import sklearn
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Estimators that accept the sparse TF-IDF matrix directly. All of them
+# expose predict_proba, which the confidence score relies on.
+ESTIMATORS = {
+    'random_forest': lambda: RandomForestClassifier(
+        n_estimators=100,
+        random_state=42
+    ),
+    'logistic_regression': lambda: LogisticRegression(
+        max_iter=1000,
+        random_state=42
+    ),
+    'linear_svm': lambda: CalibratedClassifierCV(
+        LinearSVC(random_state=42, dual='auto'),
+        cv=3
+    ),
+    'sgd': lambda: SGDClassifier(
+        loss='log_loss',
+        alpha=1e-5,
+        random_state=42
+    ),
+}
+
+SPACY_MODEL = "en_core_web_sm"
+
+# Bump when the layout of saved model artifacts changes
+MODEL_FORMAT_VERSION = 2
+
+# Components each profile leaves out. Preprocessing only needs the
+# tokenizer and its lexical flags (is_stop, is_punct); the small English
+# NER has its own embedding layer, so it runs without the rest.
+PIPELINE_EXCLUDES = {
+    'ner': ['tok2vec', 'tagger', 'parser', 'senter', 'attribute_ruler', 'lemmatizer'],
+}
+
+_pipelines = {}
+_pipelines_lock = threading.Lock()
+
+def load_pipeline(profile: str):
+    """Load a spaCy pipeline profile once per process and share it
+
+    ``tokenizer`` is a blank English pipeline, so it needs no model
+    download. ``ner`` is the small English model stripped down to the
+    entity recognizer.
+    """
+    pipeline = _pipelines.get(profile)
+    if pipeline is not None:
+        return pipeline
+    
+    with _pipelines_lock:
+        if profile not in _pipelines:
+            if profile == 'tokenizer':
+                _pipelines[profile] = spacy.blank("en")
+            elif profile in PIPELINE_EXCLUDES:
+                try:
+                    _pipelines[profile] = spacy.load(SPACY_MODEL, exclude=PIPELINE_EXCLUDES[profile])
+                except OSError:
+                    # Download if not available
+                    from spacy.cli import download
+                    logger.warning(f"spaCy model {SPACY_MODEL} not installed, downloading it")
+                    download(SPACY_MODEL)
+                    _pipelines[profile] = spacy.load(SPACY_MODEL, exclude=PIPELINE_EXCLUDES[profile])
+            else:
+                raise ValueError(f"Unknown spaCy pipeline profile '{profile}'")
+            logger.info(f"Loaded spaCy '{profile}' pipeline: {_pipelines[profile].pipe_names}")
+        return _pipelines[profile]
+
 class TenderClassifier:
-    def __init__(self):
-        # Load spaCy's English model for NER
-        try:
-            self.nlp = spacy.load("en_core_web_sm")
-        except OSError:
-            # Download if not available
-            os.system("python -m spacy download en_core_web_sm")
-            self.nlp = spacy.load("en_core_web_sm")
+    def __init__(self, estimator: str = 'random_forest'):
+        if estimator not in ESTIMATORS:
+            raise ValueError(f"Unknown estimator '{estimator}', expected one of {sorted(ESTIMATORS)}")
         
         self.vectorizer = TfidfVectorizer(
             max_features=5000,
             ngram_range=(1, 2),
-            stop_words='english'
-        )
-        self.classifier = RandomForestClassifier(
-            n_estimators=100,
-            random_state=42
+            stop_words='english',
+            dtype=np.float32
         )
+        self.estimator = estimator
+        self.classifier = ESTIMATORS[estimator]()
         self.category_mapping = {}
+        self._category_names = {}
+        self.model_version: Optional[str] = None
+        self.metadata: Dict = {}
         self.is_trained = False
 
+    @property
+    def tokenizer(self):
+        """Tokenizer-only pipeline used for classification preprocessing"""
+        return load_pipeline('tokenizer')
+
+    @property
+    def nlp(self):
+        """NER-only pipeline used for entity extraction, loaded on first use"""
+        return load_pipeline('ner')
+
+    @staticmethod
+    def _tokens_from_doc(doc) -> str:
+        """Lowercased tokens of a parsed doc, without stopwords and punctuation"""
+        return " ".join(token.lower_ for token in doc if not token.is_stop and not token.is_punct)
+
+    @staticmethod
+    def _tender_text(tender: Dict) -> str:
+        """Combine relevant fields for classification"""
+        return f"{tender.get('title', '')} {tender.get('description', '')}"
+
     def preprocess_text(self, text: str) -> str:
         """Preprocess text for classification"""
-        doc = self.nlp(text.lower())
-        # Remove stopwords and punctuation
-        tokens = [token.text for token in doc if not token.is_stop and not token.is_punct]
-        return " ".join(tokens)
+        return self._tokens_from_doc(self.tokenizer.make_doc(text))
 
     def extract_entities(self, text: str) -> Dict[str, List[str]]:
         """Extract named entities from text using spaCy"""
-        doc = self.nlp(text)
+        return self._entities_from_doc(self.nlp(text))
+
+    @staticmethod
+    def _entities_from_doc(doc) -> Dict[str, List[str]]:
+        """Group a parsed doc's named entities by type"""
         entities = {
             'organizations': [],
             'locations': [],
@@ -63,17 +156,19 @@ class TenderClassifier:
         
         return entities
 
-    def prepare_features(self, tenders: List[Dict]) -> Tuple[np.ndarray, List[str]]:
+    def preprocess_tenders(self, tenders: Iterable[Dict]) -> List[str]:
+        """Preprocess many tenders with the tokenizer-only pipeline"""
+        return [
+            self._tokens_from_doc(doc)
+            for doc in self.tokenizer.tokenizer.pipe(self._tender_text(tender) for tender in tenders)
+        ]
+
+    def prepare_features(self, tenders: List[Dict]) -> sparse.csr_matrix:
         """Prepare features for classification"""
-        texts = []
-        for tender in tenders:
-            # Combine relevant fields for classification
-            text = f"{tender.get('title', '')} {tender.get('description', '')}"
-            texts.append(self.preprocess_text(text))
+        texts = self.preprocess_tenders(tenders)
         
-        # Transform texts to TF-IDF features
-        X = self.vectorizer.fit_transform(texts)
-        return X.toarray()
+        # Transform texts to TF-IDF features, kept sparse
+        return self.vectorizer.fit_transform(texts).tocsr()
 
     def train(self, training_data: pd.DataFrame):
         """Train the classifier using historical tender data"""
@@ -86,6 +181,7 @@ class TenderClassifier:
         if not self.category_mapping:
             unique_categories = training_data['category'].unique()
             self.category_mapping = {cat: idx for idx, cat in enumerate(unique_categories)}
+        self._category_names = {v: k for k, v in self.category_mapping.items()}
         
         y = training_data['category'].map(self.category_mapping)
         
@@ -104,39 +200,83 @@ class TenderClassifier:
         logger.info(f"Training score: {train_score:.3f}")
         logger.info(f"Test score: {test_score:.3f}")
         
+        # Every trained model gets a new version, which invalidates cached results
+        self.model_version = uuid.uuid4().hex[:16]
         self.is_trained = True
 
     def classify_tender(self, tender: Dict) -> Dict:
         """Classify a single tender and extract relevant information"""
+        return self.classify_tenders([tender])[0]
+
+    def classify_tenders(self,
+                         tenders: Iterable[Dict],
+                         batch_size: int = 256,
+                         n_process: int = 1) -> List[Dict]:
+        """Classify many tenders at once
+
+        Texts are streamed once through the NER-only pipeline with
+        ``nlp.pipe``; the same docs give both the classification tokens and
+        the entities. Each batch is then vectorized and predicted in a
+        single call.
+        """
+        return list(self.iter_classify_tenders(tenders, batch_size, n_process))
+
+    def iter_classify_tenders(self,
+                              tenders: Iterable[Dict],
+                              batch_size: int = 256,
+                              n_process: int = 1) -> Iterator[Dict]:
+        """Lazily classify a stream of tenders, one batch at a time
+
+        All texts go through a single ``nlp.pipe`` call, so worker processes
+        are started once rather than per batch; its docs are regrouped into
+        batches for vectorizing and prediction.
+        """
         if not self.is_trained:
             raise ValueError("Classifier must be trained before prediction")
-        
-        # Prepare text for classification
-        text = f"{tender.get('title', '')} {tender.get('description', '')}"
-        processed_text = self.preprocess_text(text)
-        
-        # Transform text to features
-        X = self.vectorizer.transform([processed_text]).toarray()
-        
-        # Predict category
-        category_idx = self.classifier.predict(X)[0]
-        category = {v: k for k, v in self.category_mapping.items()}[category_idx]
-        
-        # Extract entities
-        entities = self.extract_entities(text)
-        
-        # Calculate confidence score
-        confidence_scores = self.classifier.predict_proba(X)[0]
-        confidence = confidence_scores.max()
-        
-        return {
-            'tender_id': tender.get('id'),
-            'category': category,
-            'confidence': float(confidence),
-            'entities': entities,
-            'risk_level': self._assess_risk(confidence, entities),
-            'estimated_value': self._estimate_value(entities.get('money', []))
-        }
+
+        docs = self.nlp.pipe(
+            ((self._tender_text(tender), tender) for tender in tenders),
+            as_tuples=True, batch_size=batch_size, n_process=n_process
+        )
+        batch: List[Tuple] = []
+        for doc, tender in docs:
+            batch.append((doc, tender))
+            if len(batch) >= batch_size:
+                yield from self._classify_docs(batch)
+                batch = []
+        if batch:
+            yield from self._classify_docs(batch)
+
+    def _classify_docs(self, batch: List[Tuple]) -> List[Dict]:
+        docs = [doc for doc, _ in batch]
+        tenders = [tender for _, tender in batch]
+        texts = [doc.text for doc in docs]
+
+        # Transform texts to features and predict the whole batch at once
+        X = self.vectorizer.transform([self._tokens_from_doc(doc) for doc in docs])
+        probabilities = self.classifier.predict_proba(X)
+        best = probabilities.argmax(axis=1)
+        labels = self.classifier.classes_.take(best)
+        confidences = probabilities[np.arange(len(tenders)), best]
+
+        # Currency amounts come straight from the text; MONEY entities are
+        # only a fallback for amounts written without a currency
+        text_values = extract_amounts(texts)
+
+        results = []
+        for tender, doc, label, confidence, value in zip(tenders, docs, labels, confidences, text_values):
+            entities = self._entities_from_doc(doc)
+            if value is None:
+                value = self._estimate_value(entities.get('money', []))
+            results.append({
+                'tender_id': tender.get('id'),
+                'category': self._category_names[label],
+                'confidence': float(confidence),
+                'entities': entities,
+                'risk_level': self._assess_risk(confidence, entities),
+                'estimated_value': value
+            })
+        return results
 
     def _assess_risk(self, confidence: float, entities: Dict) -> str:
         """Assess risk level based on confidence and entities"""
@@ -151,39 +291,98 @@ class TenderClassifier:
         if not money_entities:
             return None
         
-        # Extract numerical values from money entities
-        values = []
-        for money in money_entities:
-            try:
-                # Remove currency symbols and convert to float
-                value = float(''.join(filter(str.isdigit, money)))
-                values.append(value)
-            except ValueError:
-                continue
+        # Parse amounts like "KES 5.5M" or "Ksh 1,200,000.50"
+        values = [parse_amount(money, require_currency=False) for money in money_entities]
+        values = [value for value in values if value is not None]
         
         return max(values) if values else None
 
-    def save_model(self, path: str):
-        """Save trained model and vectorizer"""
-        if not self.is_trained:
-            raise ValueError("Cannot save untrained model")
-        
-        model_data = {
+    def feature_schema(self) -> Dict:
+        """Description of the features the model expects"""
+        params = self.vectorizer.get_params()
+        return {
+            'vectorizer': type(self.vectorizer).__name__,
+            'n_features': (
+                len(self.vectorizer.vocabulary_) if hasattr(self.vectorizer, 'vocabulary_')
+                else params.get('n_features')
+            ),
+            'ngram_range': list(params.get('ngram_range', (1, 1))),
+            'preprocessing': 'spacy-blank-en-lower-nostop-nopunct',
+            'categories': [self._category_names[i] for i in sorted(self._category_names)]
+        }
+
+    def _model_data(self) -> Dict:
+        """Everything needed to restore a trained classifier"""
+        return {
+            'metadata': {
+                'format_version': MODEL_FORMAT_VERSION,
+                'model_version': self.model_version,
+                'estimator': self.estimator,
+                'feature_schema': self.feature_schema(),
+                'sklearn_version': sklearn.__version__,
+                'created_at': datetime.utcnow().isoformat()
+            },
             'classifier': self.classifier,
             'vectorizer': self.vectorizer,
-            'category_mapping': self.category_mapping
+            'category_mapping': self.category_mapping,
+            'estimator': self.estimator,
+            'model_version': self.model_version
         }
-        joblib.dump(model_data, path)
-        logger.info(f"Model saved to {path}")
 
-    def load_model(self, path: str):
-        """Load trained model and vectorizer"""
-        model_data = joblib.load(path)
+    def _restore(self, model_data: Dict, path: str):
+        metadata = model_data.get('metadata', {})
+        if metadata.get('format_version', 1) > MODEL_FORMAT_VERSION:
+            raise ValueError(
+                f"Model format {metadata['format_version']} is newer than supported "
+                f"format {MODEL_FORMAT_VERSION}"
+            )
+        if metadata.get('sklearn_version') and metadata['sklearn_version'] != sklearn.__version__:
+            logger.warning(
+                f"Model was saved with scikit-learn {metadata['sklearn_version']}, "
+                f"running {sklearn.__version__}"
+            )
+        self.metadata = metadata
         self.classifier = model_data['classifier']
         self.vectorizer = model_data['vectorizer']
         self.category_mapping = model_data['category_mapping']
+        self.estimator = model_data.get('estimator', 'random_forest')
+        self._category_names = {v: k for k, v in self.category_mapping.items()}
+        self.model_version = model_data.get('model_version') or self._file_digest(path)
         self.is_trained = True
-        logger.info(f"Model loaded from {path}")
+
+    def save_model(self, path: str, compress: int = 0):
+        """Save trained model and vectorizer
+
+        Uncompressed artifacts (the default) can be memory-mapped on load.
+        Pass a joblib ``compress`` level of 1-9 to trade that for size.
+        """
+        if not self.is_trained:
+            raise ValueError("Cannot save untrained model")
+        
+        joblib.dump(self._model_data(), path, compress=compress)
+        logger.info(f"Model saved to {path}")
+
+    def load_model(self, path: str, mmap_mode: Optional[str] = None):
+        """Load trained model and vectorizer
+
+        With ``mmap_mode='r'`` the large numpy arrays of an uncompressed
+        artifact (linear model coefficients, IDF weights) are mapped
+        read-only from the file, so every worker on the host shares the
+        same pages. Only serving processes should opt in: a mapped model
+        cannot be updated in place or saved back over its own file.
+        Compressed artifacts are always read into memory.
+        """
+        self._restore(joblib.load(path, mmap_mode=mmap_mode), path)
+        logger.info(f"Model {self.model_version} loaded from {path}")
+
+    @staticmethod
+    def _file_digest(path: str) -> str:
+        """Version models saved without one by their content"""
+        digest = hashlib.sha1()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+        return digest.hexdigest()[:16]
 
 def main():
     # Example usage
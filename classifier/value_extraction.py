@@ -0,0 +1,83 @@
+import re
+from typing import Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# Kenyan currency notations: KES, Ksh, Kshs, KShs. with optional dot
+_CURRENCY = r'(?:KES|KSHS?|Kenya\s+Shillings)'
+_NUMBER = r'\d{1,3}(?:,\d{3})+(?:\.\d+)?|\d+(?:\.\d+)?'
+_SCALE = r'billion|million|thousand|bn|mn|[bmk]'
+
+# Either "KES 5.5M" (currency first) or "5,000,000/= Kenya Shillings". A
+# number just before a currency that is itself followed by a number
+# ("Tender 2024 KES 1,000,000") is not the amount.
+AMOUNT_PATTERN = re.compile(
+    rf'\b{_CURRENCY}\.?\s*(?P<number>{_NUMBER})(?:\s*(?P<scale>{_SCALE})\b)?'
+    rf'|(?<![\d,.])(?P<number_suffix>{_NUMBER})(?:\s*(?P<scale_suffix>{_SCALE})\b)?\s*(?:/=|/-)?\s*{_CURRENCY}\b(?!\.?\s*\d)',
+    re.IGNORECASE
+)
+
+# Bare amounts, for strings already known to be money (spaCy MONEY entities)
+_BARE_AMOUNT_PATTERN = re.compile(
+    rf'(?P<number>{_NUMBER})(?:\s*(?P<scale>{_SCALE})\b)?',
+    re.IGNORECASE
+)
+
+SCALES = {
+    'k': 1e3, 'thousand': 1e3,
+    'm': 1e6, 'mn': 1e6, 'million': 1e6,
+    'b': 1e9, 'bn': 1e9, 'billion': 1e9,
+}
+
+
+def _to_value(number: str, scale: Optional[str]) -> float:
+    return float(number.replace(',', '')) * SCALES.get((scale or '').lower(), 1.0)
+
+
+def parse_amount(text: Optional[str], require_currency: bool = True) -> Optional[float]:
+    """Largest currency amount mentioned in a text, in KES
+
+    With ``require_currency=False`` bare numbers count too, which suits
+    strings that are already known to be money amounts.
+    """
+    if not text:
+        return None
+
+    values = []
+    for match in AMOUNT_PATTERN.finditer(text):
+        if match.group('number'):
+            values.append(_to_value(match.group('number'), match.group('scale')))
+        else:
+            values.append(_to_value(match.group('number_suffix'), match.group('scale_suffix')))
+
+    if not values and not require_currency:
+        values = [
+            _to_value(match.group('number'), match.group('scale'))
+            for match in _BARE_AMOUNT_PATTERN.finditer(text)
+        ]
+    return max(values) if values else None
+
+
+def extract_amounts(texts: Iterable[Optional[str]]) -> List[Optional[float]]:
+    """Batch version of ``parse_amount`` over many texts"""
+    return [parse_amount(text) for text in texts]
+
+
+def extract_amount_column(texts: pd.Series) -> pd.Series:
+    """Largest currency amount per row of a text column, NaN where there is none
+
+    All rows are matched in one ``str.extractall`` pass and reduced with a
+    grouped max, so there is no per-row Python loop.
+    """
+    matches = texts.fillna('').astype(str).str.extractall(AMOUNT_PATTERN)
+    if matches.empty:
+        return pd.Series(np.nan, index=texts.index, dtype=float)
+
+    numbers = matches['number'].fillna(matches['number_suffix'])
+    scales = matches['scale'].fillna(matches['scale_suffix']).str.lower()
+    amounts = (
+        numbers.str.replace(',', '', regex=False).astype(float)
+        * scales.map(SCALES).fillna(1.0)
+    )
+    return amounts.groupby(level=0).max().reindex(texts.index)
@@ -0,0 +1,142 @@
+"""Long-lived Python worker for the unified-api Netlify function
+
+Speaks a framed JSON protocol on stdin/stdout. Every frame is a 4-byte
+big-endian length followed by that many bytes of UTF-8 JSON.
+
+    request:  {"id": 7, "op": "scrape-tenders", "params": {...}}
+    response: {"id": 7, "ok": true, "result": ...}
+              {"id": 7, "ok": false, "error": "...", "status": 500}
+
+Requests are answered in the order they arrive, so a client may pipeline
+several before reading any response. The scraper and classifier are loaded
+once at startup, and the worker announces itself with an
+``{"id": 0, "ready": true}`` frame when they are.
+"""
+import json
+import logging
+import os
+import struct
+import sys
+from typing import Any, BinaryIO, Callable, Dict, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+logger = logging.getLogger(__name__)
+
+HEADER = struct.Struct('>I')
+
+
+def read_frame(stream: BinaryIO) -> Optional[Dict]:
+    """Next message, or None once the client has closed the stream"""
+    header = stream.read(HEADER.size)
+    if len(header) < HEADER.size:
+        return None
+    (length,) = HEADER.unpack(header)
+    body = stream.read(length)
+    if len(body) < length:
+        return None
+    return json.loads(body)
+
+
+def write_frame(stream: BinaryIO, message: Dict):
+    data = json.dumps(message, default=str).encode('utf-8')
+    stream.write(HEADER.pack(len(data)) + data)
+    stream.flush()
+
+
+class UnsupportedOperation(Exception):
+    pass
+
+
+class Worker:
+    """Operation handlers sharing one TenderScraper and TenderClassifier"""
+
+    def __init__(self):
+        self._scraper = None
+        self._classifier = None
+        self.handlers: Dict[str, Callable[[Dict], Any]] = {
+            'ping': lambda params: {'pid': os.getpid()},
+            'scrape-tenders': self.scrape_tenders,
+            'predict-price': self.predict_price,
+        }
+
+    @property
+    def scraper(self):
+        if self._scraper is None:
+            from scraper.tender_scraper import TenderScraper
+            self._scraper = TenderScraper(os.environ.get('TENDERS_DB_URL', "sqlite:///tenders.db"))
+        return self._scraper
+
+    @property
+    def classifier(self):
+        if self._classifier is None:
+            from classifier.tender_classifier import TenderClassifier
+            classifier = TenderClassifier()
+            classifier.load_model(os.environ.get('CLASSIFIER_MODEL_PATH', 'tender_classifier_model.joblib'), mmap_mode='r')
+            # Warm-up loads the spaCy pipeline and touches the mapped arrays
+            classifier.classify_tenders([{'title': 'warm up', 'description': ''}])
+            self._classifier = classifier
+        return self._classifier
+
+    def preload(self):
+        """Load everything up front so the first request is not slow"""
+        self.scraper
+        try:
+            self.classifier
+        except Exception as e:
+            logger.warning(f"Classifier not loaded: {str(e)}")
+
+    def scrape_tenders(self, params: Dict) -> Dict:
+        if str(params.get('refresh', '')).lower() in ('1', 'true', 'yes'):
+            tenders = self.scraper.scrape_all_tenders()
+        else:
+            days_remaining = params.get('days_remaining')
+            tenders = self.scraper.get_mobile_tenders(
+                status=params.get('status'),
+                category=params.get('category'),
+                entity=params.get('entity'),
+                days_remaining=int(days_remaining) if days_remaining else None
+            )
+        return {'success': True, 'count': len(tenders), 'tenders': tenders}
+
+    def predict_price(self, params: Dict) -> Dict:
+        """Estimated value, category and risk level from the tender classifier"""
+        tenders = params.get('tenders') or [params]
+        results = self.classifier.classify_tenders(tenders)
+        return {'success': True, 'model_version': self.classifier.model_version, 'results': results}
+
+    def handle(self, request: Dict) -> Dict:
+        handler = self.handlers.get(request.get('op'))
+        try:
+            if handler is None:
+                raise UnsupportedOperation(f"Unsupported operation: {request.get('op')}")
+            return {'id': request.get('id'), 'ok': True, 'result': handler(request.get('params') or {})}
+        except UnsupportedOperation as e:
+            return {'id': request.get('id'), 'ok': False, 'error': str(e), 'status': 501}
+        except Exception as e:
+            logger.exception(f"{request.get('op')} failed")
+            return {'id': request.get('id'), 'ok': False, 'error': str(e), 'status': 500}
+
+
+def main():
+    # The protocol owns the real stdout; stray prints from libraries go to stderr
+    protocol_out = os.fdopen(os.dup(sys.stdout.fileno()), 'wb')
+    sys.stdout = sys.stderr
+    protocol_in = sys.stdin.buffer
+
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr)
+    worker = Worker()
+    worker.preload()
+    write_frame(protocol_out, {'id': 0, 'ready': True, 'pid': os.getpid()})
+
+    while True:
+        request = read_frame(protocol_in)
+        if request is None:
+            break
+        write_frame(protocol_out, worker.handle(request))
+
+
+if __name__ == "__main__":
+    main()
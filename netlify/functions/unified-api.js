@@ -1,31 +1,210 @@
 const { datasets } = require('@huggingface/hub');
 
-// Import Python functions
+// Python functions run in a pool of long-lived workers
 const { spawn } = require('child_process');
 const path = require('path');
 
-async function runPythonFunction(scriptPath, data) {
-  return new Promise((resolve, reject) => {
-    const process = spawn('python', [scriptPath, JSON.stringify(data)]);
-    let result = '';
-    let error = '';
+const PYTHON = process.env.PYTHON || 'python';
+const WORKER_SCRIPT = path.join(__dirname, 'python_worker.py');
+const POOL_SIZE = parseInt(process.env.PYTHON_WORKERS) || 2;
+const REQUEST_TIMEOUT_MS = parseInt(process.env.PYTHON_WORKER_TIMEOUT_MS) || 60000;
+const MAX_RESTART_DELAY_MS = 30000;
+const RETIRE_GRACE_MS = parseInt(process.env.PYTHON_WORKER_RETIRE_GRACE_MS) || 5000;
 
-    process.stdout.on('data', (data) => {
-      result += data.toString();
+// One worker process. Messages are framed as a 4-byte big-endian length
+// followed by UTF-8 JSON, and requests are pipelined: each one is written
+// as soon as it arrives and matched to its response by id.
+//
+// A request that times out is failed on its own. The worker then drains:
+// it takes no new requests, answers the ones already sent, and is retired
+// once none are left. Retiring closes stdin so the worker can finish and
+// exit, and kills it only if it is still running after RETIRE_GRACE_MS.
+class PythonWorker {
+  constructor(scriptPath) {
+    this.pending = new Map();
+    this.nextId = 1;
+    this.buffer = Buffer.alloc(0);
+    this.alive = true;
+    this.draining = false;
+    this.onDrain = null;
+    this.process = spawn(PYTHON, [scriptPath], { stdio: ['pipe', 'pipe', 'pipe'] });
+
+    this.ready = new Promise((resolve, reject) => {
+      this.resolveReady = resolve;
+      this.rejectReady = reject;
     });
+    // Avoid unhandled rejections for workers that die before anyone waits
+    this.ready.catch(() => {});
 
-    process.stderr.on('data', (data) => {
-      error += data.toString();
+    this.process.stdout.on('data', (chunk) => this.onData(chunk));
+    this.process.stderr.on('data', (chunk) => process.stderr.write(chunk));
+    this.process.stdin.on('error', () => {});
+    this.process.on('exit', (code, signal) => {
+      this.alive = false;
+      const error = new Error(`Python worker exited (${signal || code})`);
+      this.rejectReady(error);
+      for (const { reject, timer } of this.pending.values()) {
+        clearTimeout(timer);
+        reject(error);
+      }
+      this.pending.clear();
     });
+  }
 
-    process.on('close', (code) => {
-      if (code !== 0) {
-        reject(new Error(error));
-      } else {
-        resolve(JSON.parse(result));
+  onData(chunk) {
+    this.buffer = Buffer.concat([this.buffer, chunk]);
+    while (this.buffer.length >= 4) {
+      const length = this.buffer.readUInt32BE(0);
+      if (this.buffer.length < 4 + length) {
+        break;
       }
+      const frame = this.buffer.subarray(4, 4 + length).toString('utf8');
+      this.buffer = this.buffer.subarray(4 + length);
+      let message;
+      try {
+        message = JSON.parse(frame);
+      } catch (error) {
+        this.onBadFrame(frame, error);
+        continue;
+      }
+      this.onMessage(message);
+    }
+  }
+
+  // The frame length was intact, so later frames still line up; only the
+  // request this one answers fails. The worker writes the id first.
+  onBadFrame(frame, error) {
+    const match = /^\{\s*"id"\s*:\s*(\d+)/.exec(frame);
+    const id = match ? Number(match[1]) : null;
+    process.stderr.write(`Unreadable frame from Python worker (request ${id}): ${error.message}\n`);
+    this.fail(id, new Error(`Invalid response from Python worker: ${error.message}`));
+  }
+
+  fail(id, error) {
+    const request = this.pending.get(id);
+    if (!request) {
+      return;
+    }
+    this.pending.delete(id);
+    clearTimeout(request.timer);
+    request.reject(error);
+    this.retireIfDrained();
+  }
+
+  onMessage(message) {
+    if (message.ready) {
+      this.resolveReady();
+      return;
+    }
+    const request = this.pending.get(message.id);
+    if (!request) {
+      return;
+    }
+    this.pending.delete(message.id);
+    clearTimeout(request.timer);
+    if (message.ok) {
+      request.resolve(message.result);
+    } else {
+      const error = new Error(message.error);
+      error.statusCode = message.status || 500;
+      request.reject(error);
+    }
+    this.retireIfDrained();
+  }
+
+  send(op, params, timeoutMs = REQUEST_TIMEOUT_MS) {
+    const id = this.nextId++;
+    const body = Buffer.from(JSON.stringify({ id, op, params }), 'utf8');
+    const header = Buffer.alloc(4);
+    header.writeUInt32BE(body.length, 0);
+
+    return new Promise((resolve, reject) => {
+      const timer = setTimeout(() => {
+        // Requests queued behind a stuck one would stall, so stop routing
+        // new ones here; those already sent keep their own timeouts
+        this.drain();
+        this.fail(id, new Error(`Python worker timed out on ${op}`));
+      }, timeoutMs);
+      this.pending.set(id, { resolve, reject, timer });
+      this.process.stdin.write(Buffer.concat([header, body]));
     });
-  });
+  }
+
+  drain() {
+    if (this.draining) {
+      return;
+    }
+    this.draining = true;
+    if (this.onDrain) {
+      this.onDrain();
+    }
+    this.retireIfDrained();
+  }
+
+  retireIfDrained() {
+    if (!this.draining || this.pending.size > 0 || !this.alive) {
+      return;
+    }
+    this.process.stdin.end();
+    setTimeout(() => this.kill(), RETIRE_GRACE_MS).unref();
+  }
+
+  kill() {
+    if (this.alive) {
+      this.process.kill('SIGKILL');
+    }
+  }
+}
+
+// Fixed-size pool that keeps imports, the scraper and the classifier warm
+// across invocations. Requests go to the live worker with the fewest in
+// flight. A draining worker is replaced straight away, and crashed workers
+// are restarted with exponential backoff.
+class PythonWorkerPool {
+  constructor(scriptPath, size) {
+    this.scriptPath = scriptPath;
+    this.workers = new Array(size).fill(null);
+    this.restarts = new Array(size).fill(0);
+    this.workers.forEach((_, slot) => this.start(slot));
+  }
+
+  start(slot) {
+    const worker = new PythonWorker(this.scriptPath);
+    this.workers[slot] = worker;
+    worker.ready.then(() => { this.restarts[slot] = 0; }, () => {});
+    worker.onDrain = () => {
+      if (this.workers[slot] === worker) {
+        this.start(slot);
+      }
+    };
+    worker.process.on('exit', () => {
+      if (this.workers[slot] !== worker) {
+        return;
+      }
+      const delay = Math.min(MAX_RESTART_DELAY_MS, 250 * 2 ** this.restarts[slot]);
+      this.restarts[slot] += 1;
+      setTimeout(() => this.start(slot), delay).unref();
+    });
+  }
+
+  async call(op, params) {
+    const live = this.workers.filter((worker) => worker.alive && !worker.draining);
+    if (live.length === 0) {
+      throw new Error('No Python workers available');
+    }
+    const worker = live.reduce((best, worker) => (worker.pending.size < best.pending.size ? worker : best));
+    await worker.ready;
+    return worker.send(op, params);
+  }
+}
+
+let pool = null;
+
+async function runPythonFunction(op, data) {
+  if (!pool) {
+    pool = new PythonWorkerPool(WORKER_SCRIPT, POOL_SIZE);
+  }
+  return pool.call(op, data);
 }
 
 exports.handler = async function(event, context) {
@@ -55,30 +234,21 @@ exports.handler = async function(event, context) {
         };
 
       case 'predict-price':
-        const priceResult = await runPythonFunction(
-          path.join(__dirname, 'price-analysis.py'),
-          JSON.parse(event.body)
-        );
+        const priceResult = await runPythonFunction('predict-price', JSON.parse(event.body));
         return {
           statusCode: 200,
           body: JSON.stringify(priceResult)
         };
 
       case 'match-suppliers':
-        const suppliersResult = await runPythonFunction(
-          path.join(__dirname, 'supplier-matching.py'),
-          JSON.parse(event.body)
-        );
+        const suppliersResult = await runPythonFunction('match-suppliers', JSON.parse(event.body));
         return {
           statusCode: 200,
           body: JSON.stringify(suppliersResult)
         };
 
       case 'scrape-tenders':
-        const scrapeResult = await runPythonFunction(
-          path.join(__dirname, 'scraper.py'),
-          params
-        );
+        const scrapeResult = await runPythonFunction('scrape-tenders', params);
         return {
           statusCode: 200,
           body: JSON.stringify(scrapeResult)
@@ -95,7 +265,7 @@ exports.handler = async function(event, context) {
     }
   } catch (error) {
     return {
-      statusCode: 500,
+      statusCode: error.statusCode || 500,
       body: JSON.stringify({
         success: false,
         error: error.message
@@ -0,0 +1,193 @@
+import argparse
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from notifier.notification_agent import NotificationAgent
+from notifier.outbox import NotificationOutbox
+from scraper.tender_scraper import TenderScraper
+
+logger = logging.getLogger(__name__)
+
+# Hard message size limits of each platform, in characters
+MESSAGE_LIMITS = {'telegram': 4096, 'twitter': 280}
+
+# Overridable under "digest" in the notifier config
+DIGEST_DEFAULTS = {
+    'window_minutes': 60,
+    'max_messages': {'telegram': None, 'twitter': 5},
+    'more_url': 'https://tenders.go.ke',
+}
+
+
+def digest_window_end(now: datetime, window_minutes: int) -> datetime:
+    """End of the digest window containing ``now``, aligned to the day"""
+    midnight = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    elapsed = int((now - midnight).total_seconds() // 60)
+    return midnight + timedelta(minutes=(elapsed // window_minutes + 1) * window_minutes)
+
+
+def format_digest_line(tender: Dict, platform: str = 'telegram') -> str:
+    """One compact line describing a tender inside a digest"""
+    title = (tender.get('title') or 'N/A').strip()
+    entity = tender.get('procuring_entity') or tender.get('entity') or 'N/A'
+    closing_date = str(tender.get('closing_date') or 'N/A')[:10]
+
+    if platform == 'telegram':
+        title = title[:120]
+        url = tender.get('url') or tender.get('document_url')
+        heading = f"[{title}]({url})" if url else f"*{title}*"
+        return f"• {heading}\n  {entity} · closes {closing_date} · `{tender.get('reference', 'N/A')}`"
+    return f"• {title[:80]} ({entity[:40]}), closes {closing_date}"
+
+
+def pack_messages(lines: List[str],
+                  limit: int,
+                  title: str,
+                  max_messages: Optional[int] = None,
+                  more_url: str = '') -> List[Tuple[str, List[int]]]:
+    """Pack lines into as few messages of at most ``limit`` characters as possible
+
+    Returns (text, line indices) per message. Every message starts with
+    ``title`` and a part counter. With ``max_messages`` the tail is replaced
+    by a final "and N more" message, which also accounts for the lines it
+    summarizes.
+    """
+    # Room for the title, a " (12/34)" counter and the joining newline
+    reserved = len(title) + 12
+    body_limit = limit - reserved
+    parts: List[Tuple[List[str], List[int]]] = []
+    size = body_limit + 1
+
+    for index, line in enumerate(lines):
+        if len(line) > body_limit:
+            line = line[:body_limit - 1] + '…'
+        if size + 1 + len(line) > body_limit:
+            parts.append(([], []))
+            size = -1
+        parts[-1][0].append(line)
+        parts[-1][1].append(index)
+        size += 1 + len(line)
+
+    if max_messages is not None and len(parts) > max_messages:
+        kept = parts[:max_messages - 1]
+        rest = [index for _, indices in parts[max_messages - 1:] for index in indices]
+        summary = f"…and {len(rest)} more tenders. Browse them all: {more_url}".strip()
+        parts = kept + [([summary[:body_limit]], rest)]
+
+    messages = []
+    for number, (body, indices) in enumerate(parts, start=1):
+        counter = f" ({number}/{len(parts)})" if len(parts) > 1 else ''
+        messages.append((f"{title}{counter}\n" + '\n'.join(body), indices))
+    return messages
+
+
+def build_digest(tenders: List[Dict],
+                 platform: str,
+                 max_messages: Optional[int] = None,
+                 more_url: str = '',
+                 kind: str = 'new') -> List[Tuple[str, List[int]]]:
+    """Digest messages for one subscriber, with the tenders each one covers"""
+    lines = [format_digest_line(tender, platform) for tender in tenders]
+    noun = 'tender' if len(tenders) == 1 else 'tenders'
+    if kind.startswith('reminder:'):
+        days = int(kind.split(':', 1)[1])
+        heading = f"⏰ {len(tenders)} {noun} closing {'tomorrow' if days == 1 else f'in {days} days'}"
+    else:
+        heading = f"📢 {len(tenders)} new {noun}"
+    title = f"*{heading}*" if platform == 'telegram' else f"{heading} 🧵"
+    return pack_messages(lines, MESSAGE_LIMITS[platform], title, max_messages, more_url)
+
+
+async def drain_digests(outbox: NotificationOutbox,
+                        agent: NotificationAgent,
+                        batch_size: int = 5000) -> Dict[str, int]:
+    """Send every due outbox row as part of one digest per subscriber
+
+    Each digest message marks the rows it covers as sent as soon as it is
+    delivered. When a later message fails, only its rows are retried.
+    """
+    settings = {**DIGEST_DEFAULTS, **agent.config.get('digest', {})}
+    stats = {'tenders': 0, 'messages': 0, 'retrying': 0, 'dead': 0}
+
+    while True:
+        batch = outbox.claim_batch(batch_size)
+        if not batch:
+            break
+
+        groups: Dict[Tuple[str, str, str], List[Dict]] = defaultdict(list)
+        for item in batch:
+            groups[(item['platform'], item['chat_id'], item['kind'])].append(item)
+
+        async def send_digest(platform: str, chat_id: str, kind: str, items: List[Dict]):
+            digest = build_digest(
+                [item['tender'] for item in items],
+                platform,
+                settings['max_messages'].get(platform),
+                settings['more_url'],
+                kind
+            )
+            sent = await agent.send_messages(platform, chat_id, [text for text, _ in digest])
+            delivered = [items[i]['id'] for _, indices in digest[:sent] for i in indices]
+            outbox.mark_sent(delivered)
+            stats['tenders'] += len(delivered)
+            stats['messages'] += sent
+            for _, indices in digest[sent:]:
+                for i in indices:
+                    status = outbox.mark_failed(items[i]['id'], "digest delivery failed")
+                    stats['dead' if status == 'dead' else 'retrying'] += 1
+
+        await asyncio.gather(*(
+            send_digest(platform, chat_id, kind, items) for (platform, chat_id, kind), items in groups.items()
+        ))
+
+    if stats['tenders'] or stats['retrying'] or stats['dead']:
+        logger.info(f"Digests sent: {stats}")
+    return stats
+
+
+def queue_digest(outbox: NotificationOutbox,
+                 agent: NotificationAgent,
+                 tenders: List[Dict],
+                 targets: Optional[List[Tuple[str, str]]] = None) -> int:
+    """Queue tenders to go out with the current digest window"""
+    settings = {**DIGEST_DEFAULTS, **agent.config.get('digest', {})}
+    not_before = digest_window_end(datetime.utcnow(), settings['window_minutes'])
+    return outbox.enqueue(tenders, targets or agent.delivery_targets(), not_before)
+
+
+async def run_digest_worker(outbox: NotificationOutbox,
+                            agent: NotificationAgent,
+                            poll_interval: float = 60.0):
+    """Send digests forever as their windows close"""
+    while True:
+        try:
+            await drain_digests(outbox, agent)
+        except Exception as e:
+            logger.error(f"Digest worker error: {str(e)}")
+            outbox.db_session.rollback()
+        await asyncio.sleep(poll_interval)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Send queued tender notifications as digests")
+    parser.add_argument('--db-url', default="sqlite:///tenders.db")
+    parser.add_argument('--config', default='config.json')
+    parser.add_argument('--once', action='store_true', help="Send due digests and exit")
+    args = parser.parse_args()
+
+    scraper = TenderScraper(args.db_url)
+    outbox = NotificationOutbox(scraper.db_session)
+    agent = NotificationAgent(args.config)
+
+    if args.once:
+        asyncio.run(drain_digests(outbox, agent))
+    else:
+        asyncio.run(run_digest_worker(outbox, agent))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
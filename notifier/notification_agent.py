@@ -1,19 +1,43 @@
 import telegram
 import tweepy
 import logging
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 import json
 import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from telegram.constants import ParseMode
+from telegram.error import RetryAfter
+from telegram.request import HTTPXRequest
+from notifier.rate_limit import TokenBucket
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Published platform limits, overridable under "rate_limits" in the config.
+# Telegram allows about 30 messages/s per bot, 1/s per chat and 20/min per
+# group chat (negative chat ids). Twitter's statuses/update allows 300
+# posts per 3 hours per account.
+RATE_LIMITS = {
+    'telegram': {'rate': 30.0, 'burst': 30, 'chat_rate': 1.0, 'group_rate': 20 / 60, 'concurrency': 16},
+    'twitter': {'rate': 300 / (3 * 3600), 'burst': 10, 'concurrency': 2},
+}
+
 class NotificationAgent:
     def __init__(self, config_path: str = 'config.json'):
         self.config = self._load_config(config_path)
+        overrides = self.config.get('rate_limits', {})
+        self.rate_limits = {
+            platform: {**limits, **overrides.get(platform, {})}
+            for platform, limits in RATE_LIMITS.items()
+        }
         self.telegram_bot = self._setup_telegram()
         self.twitter_api = self._setup_twitter()
+        self._twitter_executor = ThreadPoolExecutor(
+            max_workers=self.rate_limits['twitter']['concurrency'],
+            thread_name_prefix='twitter'
+        )
+        self._limiter_loop = None
         
     def _load_config(self, config_path: str) -> Dict:
         """Load configuration from file or use environment variables"""
@@ -39,7 +63,12 @@ class NotificationAgent:
             logger.warning("Telegram token not configured")
             return None
         try:
-            return telegram.Bot(token=token)
+            # One pooled connection per concurrent send
+            request = HTTPXRequest(connection_pool_size=self.rate_limits['telegram']['concurrency'])
+            base_url = self.config['telegram'].get('base_url')
+            if base_url:
+                return telegram.Bot(token=token, base_url=base_url, request=request)
+            return telegram.Bot(token=token, request=request)
         except Exception as e:
             logger.error(f"Failed to setup Telegram bot: {str(e)}")
             return None
@@ -90,29 +119,65 @@ class NotificationAgent:
             )
         return message
 
+    def _setup_limiters(self):
+        """Create semaphores and token buckets for the running event loop"""
+        loop = asyncio.get_running_loop()
+        if self._limiter_loop is loop:
+            return
+        telegram_limits = self.rate_limits['telegram']
+        twitter_limits = self.rate_limits['twitter']
+        self._telegram_semaphore = asyncio.Semaphore(telegram_limits['concurrency'])
+        self._telegram_bucket = TokenBucket(telegram_limits['rate'], telegram_limits['burst'])
+        self._chat_buckets: Dict[str, TokenBucket] = {}
+        self._twitter_semaphore = asyncio.Semaphore(twitter_limits['concurrency'])
+        self._twitter_bucket = TokenBucket(twitter_limits['rate'], twitter_limits['burst'])
+        self._limiter_loop = loop
+
+    def _chat_bucket(self, chat_id) -> TokenBucket:
+        bucket = self._chat_buckets.get(str(chat_id))
+        if bucket is None:
+            limits = self.rate_limits['telegram']
+            is_group = str(chat_id).startswith('-')
+            bucket = TokenBucket(limits['group_rate'] if is_group else limits['chat_rate'])
+            self._chat_buckets[str(chat_id)] = bucket
+        return bucket
+
+    async def _send_telegram(self, chat_id, message: str) -> bool:
+        """Send one message to one chat within the per-chat and global limits"""
+        await self._chat_bucket(chat_id).acquire()
+        async with self._telegram_semaphore:
+            for _ in range(2):
+                await self._telegram_bucket.acquire()
+                try:
+                    await self.telegram_bot.send_message(
+                        chat_id=chat_id,
+                        text=message,
+                        parse_mode=ParseMode.MARKDOWN
+                    )
+                    logger.info(f"Sent tender notification to Telegram chat {chat_id}")
+                    return True
+                except RetryAfter as e:
+                    # Flood control: hold back every sender, then retry once
+                    logger.warning(f"Telegram rate limited, retrying in {e.retry_after}s")
+                    self._telegram_bucket.pause(e.retry_after)
+                except Exception as e:
+                    logger.error(f"Failed to send Telegram message to {chat_id}: {str(e)}")
+                    return False
+        logger.error(f"Failed to send Telegram message to {chat_id}: still rate limited")
+        return False
+
     async def send_telegram_message(self, tender: Dict) -> bool:
-        """Send tender information to Telegram"""
+        """Send tender information to all Telegram chats concurrently"""
         if not self.telegram_bot:
             logger.error("Telegram bot not configured")
             return False
 
+        self._setup_limiters()
         message = self.format_tender_message(tender, 'telegram')
         chat_ids = self.config['telegram']['chat_ids']
         
-        success = True
-        for chat_id in chat_ids:
-            try:
-                await self.telegram_bot.send_message(
-                    chat_id=chat_id,
-                    text=message,
-                    parse_mode=telegram.ParseMode.MARKDOWN
-                )
-                logger.info(f"Sent tender notification to Telegram chat {chat_id}")
-            except Exception as e:
-                logger.error(f"Failed to send Telegram message to {chat_id}: {str(e)}")
-                success = False
-        
-        return success
+        results = await asyncio.gather(*(self._send_telegram(chat_id, message) for chat_id in chat_ids))
+        return all(results)
 
     def send_twitter_update(self, tender: Dict) -> bool:
         """Send tender information to Twitter"""
@@ -129,17 +194,134 @@ class NotificationAgent:
             logger.error(f"Failed to send Twitter update: {str(e)}")
             return False
 
+    async def send_twitter_update_async(self, tender: Dict) -> bool:
+        """Send a Twitter update from a worker thread within the rate limit"""
+        if not self.twitter_api:
+            logger.error("Twitter API not configured")
+            return False
+
+        self._setup_limiters()
+        async with self._twitter_semaphore:
+            await self._twitter_bucket.acquire()
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._twitter_executor, self.send_twitter_update, tender)
+
+    def delivery_targets(self) -> List[Tuple[str, str]]:
+        """(platform, chat_id) pairs every tender is delivered to"""
+        targets = []
+        if self.telegram_bot:
+            targets.extend(('telegram', str(chat_id)) for chat_id in self.config['telegram']['chat_ids'])
+        if self.twitter_api:
+            targets.append(('twitter', ''))
+        return targets
+
+    def format_reminder_message(self, tender: Dict, days: int, platform: str = 'telegram') -> str:
+        """Format a closing-deadline reminder for different platforms"""
+        when = 'tomorrow' if days == 1 else f"in {days} days"
+        if platform == 'telegram':
+            return (
+                f"*Closing {when}!* ⏰\n\n"
+                f"*Title:* {tender.get('title', 'N/A')}\n"
+                f"*Reference:* `{tender.get('reference', 'N/A')}`\n"
+                f"*Entity:* {tender.get('entity', 'N/A')}\n"
+                f"*Closing Date:* {tender.get('closing_date', 'N/A')}\n\n"
+                f"View more details on our website: {tender.get('url', '')}"
+            )
+        return (
+            f"⏰ Closing {when}!\n"
+            f"{tender.get('title', 'N/A')[:100]}...\n"
+            f"By: {tender.get('entity', 'N/A')}\n"
+            f"Details: {tender.get('url', '')}"
+        )
+
+    def format_notice(self, tender: Dict, kind: str = 'new', platform: str = 'telegram') -> str:
+        """Message for an outbox notice kind: 'new' or 'reminder:<days>'"""
+        if kind.startswith('reminder:'):
+            return self.format_reminder_message(tender, int(kind.split(':', 1)[1]), platform)
+        return self.format_tender_message(tender, platform)
+
+    async def deliver(self, platform: str, chat_id: str, tender: Dict, kind: str = 'new') -> bool:
+        """Send one notice about a tender to one target from ``delivery_targets``"""
+        if platform == 'telegram':
+            if not self.telegram_bot:
+                logger.error("Telegram bot not configured")
+                return False
+            self._setup_limiters()
+            return await self._send_telegram(chat_id, self.format_notice(tender, kind, 'telegram'))
+        if platform == 'twitter':
+            if kind != 'new':
+                return await self.send_messages('twitter', chat_id, [self.format_notice(tender, kind, 'twitter')]) == 1
+            return await self.send_twitter_update_async(tender)
+        logger.error(f"Unknown notification platform: {platform}")
+        return False
+
+    def _post_tweet(self, text: str, in_reply_to: Optional[int] = None) -> Optional[int]:
+        """Post one tweet, optionally as a reply, returning its id"""
+        try:
+            if in_reply_to is None:
+                status = self.twitter_api.update_status(status=text)
+            else:
+                status = self.twitter_api.update_status(
+                    status=text,
+                    in_reply_to_status_id=in_reply_to,
+                    auto_populate_reply_metadata=True
+                )
+            return status.id
+        except Exception as e:
+            logger.error(f"Failed to send Twitter update: {str(e)}")
+            return None
+
+    async def send_messages(self, platform: str, chat_id: str, messages: List[str]) -> int:
+        """Send prepared messages in order, returning how many went out
+        
+        On Twitter the messages form a thread. Sending stops at the first
+        failure so a retry can resume from there.
+        """
+        self._setup_limiters()
+        sent = 0
+        if platform == 'telegram':
+            if not self.telegram_bot:
+                logger.error("Telegram bot not configured")
+                return 0
+            for message in messages:
+                if not await self._send_telegram(chat_id, message):
+                    break
+                sent += 1
+        elif platform == 'twitter':
+            if not self.twitter_api:
+                logger.error("Twitter API not configured")
+                return 0
+            loop = asyncio.get_running_loop()
+            previous = None
+            async with self._twitter_semaphore:
+                for message in messages:
+                    await self._twitter_bucket.acquire()
+                    tweet_id = await loop.run_in_executor(self._twitter_executor, self._post_tweet, message, previous)
+                    if tweet_id is None:
+                        break
+                    previous = tweet_id
+                    sent += 1
+        else:
+            logger.error(f"Unknown notification platform: {platform}")
+        return sent
+
     async def notify_all(self, tenders: List[Dict]) -> Dict[str, int]:
-        """Send notifications for multiple tenders to all platforms"""
+        """Send notifications for multiple tenders to all platforms
+        
+        All sends run concurrently; pacing comes from the per-platform
+        semaphores and token buckets configured in ``RATE_LIMITS``.
+        """
         stats = {
             'telegram_sent': 0,
             'twitter_sent': 0,
             'failed': 0
         }
 
-        for tender in tenders:
-            telegram_success = await self.send_telegram_message(tender)
-            twitter_success = self.send_twitter_update(tender)
+        async def notify(tender: Dict):
+            telegram_success, twitter_success = await asyncio.gather(
+                self.send_telegram_message(tender),
+                self.send_twitter_update_async(tender)
+            )
             
             if telegram_success:
                 stats['telegram_sent'] += 1
@@ -148,9 +330,7 @@ class NotificationAgent:
             if not (telegram_success or twitter_success):
                 stats['failed'] += 1
 
-            # Add delay between notifications to avoid rate limits
-            await asyncio.sleep(1)
-
+        await asyncio.gather(*(notify(tender) for tender in tenders))
         return stats
 
     def save_notification_log(self, tender: Dict, platforms: List[str], success: bool):
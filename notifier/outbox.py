@@ -0,0 +1,298 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import random
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func
+
+from notifier.notification_agent import NotificationAgent
+from scraper.tender_scraper import NotificationOutboxRecord, TenderScraper
+
+logger = logging.getLogger(__name__)
+
+
+def idempotency_key(tender: Dict, platform: str, chat_id: str = '', kind: str = 'new') -> str:
+    """Stable key for delivering one kind of notice about a tender to one platform chat"""
+    reference = tender.get('reference') or tender.get('id')
+    key = f"{reference}|{platform}|{chat_id}"
+    if kind != 'new':
+        key += f"|{kind}"
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+
+class NotificationOutbox:
+    """Durable delivery queue stored next to the tenders table
+
+    ``enqueue`` writes one row per (tender, platform, chat). The row is
+    keyed by ``idempotency_key``, so a tender seen again in a later scrape
+    is never queued twice. Workers ``claim_batch`` due rows under a lease,
+    report the outcome with ``mark_sent`` or ``mark_failed``, and failed
+    rows are retried with exponential backoff until ``max_attempts``, after
+    which they are parked as ``dead``. A worker that crashes mid-batch
+    leaves its rows leased; they become due again once the lease expires.
+    Only a crash between a successful send and ``mark_sent`` can then
+    repeat a message.
+    """
+
+    def __init__(self,
+                 db_session,
+                 max_attempts: int = 6,
+                 base_delay: float = 30.0,
+                 max_delay: float = 3600.0,
+                 lease_seconds: float = 300.0):
+        self.db_session = db_session
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.lease_seconds = lease_seconds
+
+    def enqueue(self,
+                tenders: List[Dict],
+                targets: List[Tuple[str, str]],
+                not_before: Optional[datetime] = None,
+                kind: str = 'new') -> int:
+        """Queue every tender for every target, returning how many rows are new"""
+        return self.enqueue_deliveries(
+            ((tender, platform, chat_id) for tender in tenders for platform, chat_id in targets),
+            not_before,
+            kind
+        )
+
+    def enqueue_deliveries(self,
+                           deliveries: Iterable[Tuple[Dict, str, str]],
+                           not_before: Optional[datetime] = None,
+                           kind: str = 'new') -> int:
+        """Queue (tender, platform, chat_id) deliveries, e.g. subscription matches
+
+        Rows become due at ``not_before`` (UTC), which lets digests collect
+        a window's worth of tenders before anything is sent. ``kind`` tells
+        a new-tender alert ('new') from a deadline reminder ('reminder:7').
+        """
+        rows = {}
+        for tender, platform, chat_id in deliveries:
+            rows[idempotency_key(tender, platform, chat_id, kind)] = (tender, platform, chat_id)
+
+        keys = list(rows)
+        existing = set()
+        # Stay well below SQLite's bound parameter limit
+        for start in range(0, len(keys), 500):
+            existing.update(
+                key for key, in self.db_session.query(NotificationOutboxRecord.idempotency_key).filter(
+                    NotificationOutboxRecord.idempotency_key.in_(keys[start:start + 500])
+                )
+            )
+
+        queued = 0
+        try:
+            for key, (tender, platform, chat_id) in rows.items():
+                if key in existing:
+                    continue
+                self.db_session.add(NotificationOutboxRecord(
+                    idempotency_key=key,
+                    tender_reference=tender.get('reference'),
+                    platform=platform,
+                    chat_id=chat_id,
+                    kind=kind,
+                    payload=json.dumps(tender, default=str),
+                    status='pending',
+                    attempts=0,
+                    next_attempt_at=not_before or datetime.utcnow()
+                ))
+                queued += 1
+            self.db_session.commit()
+        except Exception as e:
+            logger.error(f"Failed to queue notifications: {str(e)}")
+            self.db_session.rollback()
+            return 0
+
+        logger.info(f"Queued {queued} notifications ({len(rows) - queued} already known)")
+        return queued
+
+    def _due_ids(self, now: datetime, limit: int) -> List[int]:
+        return [
+            id for id, in self.db_session.query(NotificationOutboxRecord.id).filter(
+                NotificationOutboxRecord.status.in_(['pending', 'sending']),
+                NotificationOutboxRecord.next_attempt_at <= now
+            ).order_by(
+                NotificationOutboxRecord.next_attempt_at
+            ).limit(limit).with_for_update(skip_locked=True)
+        ]
+
+    def claim_batch(self, limit: int = 100) -> List[Dict]:
+        """Lease up to ``limit`` due deliveries, oldest first
+
+        Each row is leased by an UPDATE that only matches while it is still
+        due, and only rows this worker actually updated are returned. Two
+        workers draining the same outbox therefore never both claim a row,
+        even on SQLite, which ignores ``SKIP LOCKED``.
+        """
+        now = datetime.utcnow()
+        lease_until = now + timedelta(seconds=self.lease_seconds)
+        claimed = []
+        try:
+            for id in self._due_ids(now, limit):
+                updated = self.db_session.query(NotificationOutboxRecord).filter(
+                    NotificationOutboxRecord.id == id,
+                    NotificationOutboxRecord.status.in_(['pending', 'sending']),
+                    NotificationOutboxRecord.next_attempt_at <= now
+                ).update({
+                    NotificationOutboxRecord.status: 'sending',
+                    NotificationOutboxRecord.attempts: func.coalesce(NotificationOutboxRecord.attempts, 0) + 1,
+                    NotificationOutboxRecord.next_attempt_at: lease_until
+                }, synchronize_session=False)
+                if updated:
+                    claimed.append(id)
+            self.db_session.commit()
+        except Exception:
+            self.db_session.rollback()
+            raise
+
+        if not claimed:
+            return []
+        order = {id: position for position, id in enumerate(claimed)}
+        records = self.db_session.query(NotificationOutboxRecord).filter(
+            NotificationOutboxRecord.id.in_(claimed)
+        ).all()
+        records.sort(key=lambda record: order[record.id])
+
+        return [
+            {
+                'id': record.id,
+                'platform': record.platform,
+                'chat_id': record.chat_id,
+                'kind': record.kind or 'new',
+                'attempts': record.attempts,
+                'tender': json.loads(record.payload)
+            }
+            for record in records
+        ]
+
+    def mark_sent(self, ids: List[int]):
+        if not ids:
+            return
+        self.db_session.query(NotificationOutboxRecord).filter(
+            NotificationOutboxRecord.id.in_(ids)
+        ).update({
+            NotificationOutboxRecord.status: 'sent',
+            NotificationOutboxRecord.sent_at: datetime.utcnow(),
+            NotificationOutboxRecord.last_error: None
+        }, synchronize_session=False)
+        self.db_session.commit()
+
+    def mark_failed(self, id: int, error: str) -> str:
+        """Schedule a retry with backoff, or dead-letter; returns the new status"""
+        record = self.db_session.get(NotificationOutboxRecord, id)
+        if record is None:
+            return 'missing'
+
+        record.last_error = error
+        if record.attempts >= self.max_attempts:
+            record.status = 'dead'
+            logger.warning(
+                f"Giving up on {record.platform} notification for {record.tender_reference} "
+                f"after {record.attempts} attempts: {error}"
+            )
+        else:
+            # Exponential backoff with jitter so failed sends do not retry in lockstep
+            delay = min(self.max_delay, self.base_delay * 2 ** (record.attempts - 1))
+            record.status = 'pending'
+            record.next_attempt_at = datetime.utcnow() + timedelta(seconds=delay * random.uniform(0.5, 1.0))
+        self.db_session.commit()
+        return record.status
+
+    def requeue_dead(self, ids: Optional[List[int]] = None) -> int:
+        """Give dead-lettered deliveries a fresh set of attempts"""
+        query = self.db_session.query(NotificationOutboxRecord).filter(
+            NotificationOutboxRecord.status == 'dead'
+        )
+        if ids is not None:
+            query = query.filter(NotificationOutboxRecord.id.in_(ids))
+        requeued = query.update({
+            NotificationOutboxRecord.status: 'pending',
+            NotificationOutboxRecord.attempts: 0,
+            NotificationOutboxRecord.next_attempt_at: datetime.utcnow()
+        }, synchronize_session=False)
+        self.db_session.commit()
+        return requeued
+
+    def stats(self) -> Dict[str, int]:
+        """Number of deliveries in each status"""
+        return dict(
+            self.db_session.query(
+                NotificationOutboxRecord.status, func.count(NotificationOutboxRecord.id)
+            ).group_by(NotificationOutboxRecord.status).all()
+        )
+
+
+async def drain(outbox: NotificationOutbox, agent: NotificationAgent, batch_size: int = 100) -> Dict[str, int]:
+    """Deliver every due notification, one leased batch at a time"""
+    stats = {'sent': 0, 'retrying': 0, 'dead': 0}
+
+    while True:
+        batch = outbox.claim_batch(batch_size)
+        if not batch:
+            break
+
+        results = await asyncio.gather(
+            *(agent.deliver(item['platform'], item['chat_id'], item['tender'], item['kind']) for item in batch),
+            return_exceptions=True
+        )
+
+        outbox.mark_sent([item['id'] for item, result in zip(batch, results) if result is True])
+        stats['sent'] += sum(1 for result in results if result is True)
+        for item, result in zip(batch, results):
+            if result is True:
+                continue
+            error = str(result) if isinstance(result, Exception) else "delivery failed"
+            status = outbox.mark_failed(item['id'], error)
+            stats['dead' if status == 'dead' else 'retrying'] += 1
+
+    if any(stats.values()):
+        logger.info(f"Outbox drained: {stats}")
+    return stats
+
+
+async def run_worker(outbox: NotificationOutbox,
+                     agent: NotificationAgent,
+                     batch_size: int = 100,
+                     poll_interval: float = 15.0):
+    """Drain the outbox forever, polling for newly due deliveries"""
+    while True:
+        try:
+            await drain(outbox, agent, batch_size)
+        except Exception as e:
+            logger.error(f"Outbox worker error: {str(e)}")
+            outbox.db_session.rollback()
+        await asyncio.sleep(poll_interval)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Deliver queued tender notifications")
+    parser.add_argument('--db-url', default="sqlite:///tenders.db")
+    parser.add_argument('--config', default='config.json')
+    parser.add_argument('--batch-size', type=int, default=100)
+    parser.add_argument('--once', action='store_true', help="Drain due deliveries and exit")
+    parser.add_argument('--requeue-dead', action='store_true', help="Retry dead-lettered deliveries")
+    args = parser.parse_args()
+
+    scraper = TenderScraper(args.db_url)
+    outbox = NotificationOutbox(scraper.db_session)
+    agent = NotificationAgent(args.config)
+
+    if args.requeue_dead:
+        logger.info(f"Requeued {outbox.requeue_dead()} dead notifications")
+
+    if args.once:
+        asyncio.run(drain(outbox, agent, args.batch_size))
+        logger.info(f"Outbox status: {outbox.stats()}")
+    else:
+        asyncio.run(run_worker(outbox, agent, args.batch_size))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
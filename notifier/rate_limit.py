@@ -0,0 +1,38 @@
+import asyncio
+import time
+
+
+class TokenBucket:
+    """Asyncio token bucket allowing ``rate`` sends per second on average
+
+    Up to ``capacity`` tokens accumulate while idle, so short bursts go out
+    immediately. Waiters are served in arrival order, which keeps messages
+    to the same destination in the order they were queued.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, tokens: float = 1.0):
+        """Wait until ``tokens`` are available and take them"""
+        async with self._lock:
+            self._refill()
+            while self._tokens < tokens:
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= tokens
+
+    def pause(self, seconds: float):
+        """Hold back all senders for ``seconds``, e.g. after a 429 Retry-After"""
+        self._refill()
+        # Concurrent 429s report the same window, so they must not add up
+        self._tokens = min(self._tokens, -seconds * self.rate)
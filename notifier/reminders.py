@@ -0,0 +1,247 @@
+import argparse
+import asyncio
+import heapq
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import pytz
+
+from notifier.notification_agent import NotificationAgent
+from notifier.outbox import NotificationOutbox, drain
+from notifier.subscriptions import SubscriptionIndex
+from scraper.tender_scraper import TenderRecord, TenderScraper
+
+logger = logging.getLogger(__name__)
+
+EAT = pytz.timezone('Africa/Nairobi')
+
+# Days before closing_date at which subscribers are reminded
+REMINDER_DAYS = (7, 3, 1)
+
+DAY_SECONDS = 86400
+
+
+def _timestamp(value: datetime) -> float:
+    """Epoch seconds of a stored closing date, read as EAT when naive"""
+    if value.tzinfo is None:
+        value = EAT.localize(value)
+    return value.timestamp()
+
+
+class ReminderScheduler:
+    """Upcoming closing-date reminders kept in a binary heap
+
+    Every (tender, reminder) pair is one heap entry ordered by due time, so
+    scheduling and popping cost O(log n) and finding what is due never
+    scans the tenders table. When a closing date changes, the tender's
+    current closing time is replaced and its old entries go stale. Stale
+    entries are skipped on pop and compacted away once they dominate the
+    heap. Listener callbacks can arrive from scraper threads, so every
+    operation holds a lock.
+    """
+
+    def __init__(self, reminder_days: Sequence[int] = REMINDER_DAYS):
+        self.reminder_days = sorted(set(reminder_days), reverse=True)
+        self._heap: List[Tuple[float, str, int, float]] = []
+        self._closing: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._closing)
+
+    def _entries(self, reference: str, closing_ts: float, now: float, catch_up: bool) -> List[Tuple]:
+        entries = []
+        missed = None
+        for days in self.reminder_days:
+            due = closing_ts - days * DAY_SECONDS
+            if due > now:
+                entries.append((due, reference, days, closing_ts))
+            elif closing_ts > now:
+                missed = (now, reference, days, closing_ts)
+        # After downtime, send the latest reminder that came due meanwhile
+        if catch_up and missed is not None:
+            entries.append(missed)
+        return entries
+
+    def schedule(self, reference: str, closing_date: datetime, now: Optional[float] = None, catch_up: bool = False):
+        """(Re)schedule reminders for a tender, replacing earlier ones
+
+        An unchanged closing time keeps the reminders already scheduled.
+        """
+        now = time.time() if now is None else now
+        closing_ts = _timestamp(closing_date)
+        with self._lock:
+            if self._closing.get(reference) == closing_ts:
+                return
+            self._closing[reference] = closing_ts
+            for entry in self._entries(reference, closing_ts, now, catch_up):
+                heapq.heappush(self._heap, entry)
+            self._compact()
+
+    def cancel(self, reference: str):
+        with self._lock:
+            self._closing.pop(reference, None)
+
+    def on_closing_date_changed(self, reference: str, old: Optional[datetime], new: Optional[datetime]):
+        """Closing-date listener for TenderScraper"""
+        if new is None:
+            self.cancel(reference)
+        else:
+            self.schedule(reference, new)
+
+    def rebuild(self, db_session, now: Optional[float] = None) -> int:
+        """Load every open tender from the database in one pass"""
+        now = time.time() if now is None else now
+        horizon = datetime.fromtimestamp(now, EAT).replace(tzinfo=None)
+        rows = db_session.query(TenderRecord.reference, TenderRecord.closing_date).filter(
+            TenderRecord.closing_date > horizon
+        ).all()
+
+        closing = {}
+        entries = []
+        for reference, closing_date in rows:
+            closing_ts = _timestamp(closing_date)
+            closing[reference] = closing_ts
+            entries.extend(self._entries(reference, closing_ts, now, catch_up=True))
+        heapq.heapify(entries)
+
+        with self._lock:
+            self._closing = closing
+            self._heap = entries
+        logger.info(f"Scheduled {len(entries)} reminders for {len(closing)} open tenders")
+        return len(entries)
+
+    def apply_changes(self, db_session, since: datetime, now: Optional[float] = None) -> datetime:
+        """Reschedule tenders stored or updated after ``since`` (naive UTC)
+
+        Picks up closing dates changed by scrapers in other processes
+        without reloading every open tender. Returns the watermark to pass
+        next time.
+        """
+        rows = db_session.query(
+            TenderRecord.reference, TenderRecord.closing_date, TenderRecord.updated_at
+        ).filter(TenderRecord.updated_at > since).all()
+
+        for reference, closing_date, updated_at in rows:
+            if closing_date is None:
+                self.cancel(reference)
+            else:
+                # A deadline moved closer may already have a reminder due
+                self.schedule(reference, closing_date, now, catch_up=True)
+            since = max(since, updated_at)
+        if rows:
+            logger.info(f"Rescheduled reminders for {len(rows)} changed tenders")
+        return since
+
+    def _compact(self):
+        if len(self._heap) > 2 * len(self.reminder_days) * len(self._closing) + 1024:
+            self._heap = [entry for entry in self._heap if self._closing.get(entry[1]) == entry[3]]
+            heapq.heapify(self._heap)
+
+    def next_due(self) -> Optional[float]:
+        """Due time of the earliest live reminder"""
+        with self._lock:
+            while self._heap and self._closing.get(self._heap[0][1]) != self._heap[0][3]:
+                heapq.heappop(self._heap)
+            return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now: Optional[float] = None) -> List[Tuple[str, int]]:
+        """Remove and return (reference, days before closing) of due reminders"""
+        now = time.time() if now is None else now
+        due = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                _, reference, days, closing_ts = heapq.heappop(self._heap)
+                if self._closing.get(reference) == closing_ts:
+                    due.append((reference, days))
+                    if days == self.reminder_days[-1]:
+                        del self._closing[reference]
+        return due
+
+
+def queue_reminders(scraper: TenderScraper,
+                    outbox: NotificationOutbox,
+                    agent: NotificationAgent,
+                    due: List[Tuple[str, int]],
+                    index: Optional[SubscriptionIndex] = None) -> int:
+    """Queue due reminders in the outbox, once per tender, reminder and target
+
+    Targets are the matching subscribers when ``index`` is given and the
+    agent's broadcast chats otherwise. The outbox idempotency key includes
+    the reminder, so a reminder replayed after a restart is not sent again.
+    """
+    queued = 0
+    for reference, days in due:
+        tender = scraper.get_tender_by_reference(reference)
+        if not tender:
+            continue
+        if index is not None:
+            deliveries = index.match_targets([tender])
+        else:
+            deliveries = [(tender, platform, chat_id) for platform, chat_id in agent.delivery_targets()]
+        queued += outbox.enqueue_deliveries(deliveries, kind=f"reminder:{days}")
+    return queued
+
+
+async def run_reminders(scraper: TenderScraper,
+                        scheduler: ReminderScheduler,
+                        outbox: NotificationOutbox,
+                        agent: NotificationAgent,
+                        index: Optional[SubscriptionIndex] = None,
+                        max_sleep: float = 60.0,
+                        rebuild_interval: Optional[float] = None,
+                        since: Optional[datetime] = None):
+    """Hand reminders to the outbox as they come due, sleeping in between
+
+    Every pass first applies closing dates changed since the last one, by
+    this or any other process, so a scrape is reflected within
+    ``max_sleep`` seconds. ``since`` is when the heap was last loaded (naive
+    UTC), and ``rebuild_interval`` (seconds) also reloads it periodically.
+    """
+    last_rebuild = time.time()
+    watermark = since or datetime.utcnow()
+    while True:
+        try:
+            if rebuild_interval and time.time() - last_rebuild >= rebuild_interval:
+                watermark = datetime.utcnow()
+                scheduler.rebuild(scraper.db_session)
+                last_rebuild = time.time()
+            watermark = scheduler.apply_changes(scraper.db_session, watermark)
+            due = scheduler.pop_due()
+            if due:
+                queued = queue_reminders(scraper, outbox, agent, due, index)
+                logger.info(f"{len(due)} reminders due, {queued} notifications queued")
+                await drain(outbox, agent)
+        except Exception as e:
+            logger.error(f"Reminder worker error: {str(e)}")
+            scraper.db_session.rollback()
+
+        next_due = scheduler.next_due()
+        delay = max_sleep if next_due is None else min(max_sleep, max(0.0, next_due - time.time()))
+        await asyncio.sleep(delay)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Send closing-deadline reminders")
+    parser.add_argument('--db-url', default="sqlite:///tenders.db")
+    parser.add_argument('--config', default='config.json')
+    parser.add_argument('--subscriptions', action='store_true', help="Remind matching subscribers only")
+    args = parser.parse_args()
+
+    scraper = TenderScraper(args.db_url)
+    scheduler = ReminderScheduler()
+    since = datetime.utcnow()
+    scheduler.rebuild(scraper.db_session)
+
+    outbox = NotificationOutbox(scraper.db_session)
+    agent = NotificationAgent(args.config)
+    index = SubscriptionIndex.from_db(scraper.db_session) if args.subscriptions else None
+    asyncio.run(run_reminders(scraper, scheduler, outbox, agent, index, rebuild_interval=6 * 3600, since=since))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -0,0 +1,227 @@
+import json
+import logging
+import re
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+import pytz
+
+from scraper.tender_scraper import SubscriptionRecord
+
+logger = logging.getLogger(__name__)
+
+RULE_FIELDS = ['categories', 'entities', 'keywords', 'min_value', 'max_value', 'closing_within_days']
+
+_TOKEN = re.compile(r'[a-z0-9]+')
+_ENTITY_PREFIX = re.compile(r'^the\s+')
+
+
+def _tokens(text: Optional[str]) -> List[str]:
+    return _TOKEN.findall((text or '').lower())
+
+
+def _normalize_entity(entity: Optional[str]) -> str:
+    return _ENTITY_PREFIX.sub('', ' '.join(_tokens(entity)))
+
+
+def _tender_value(tender: Dict) -> Optional[float]:
+    for field in ('value', 'estimated_value'):
+        try:
+            return float(tender[field])
+        except (KeyError, TypeError, ValueError):
+            continue
+    return None
+
+
+def _closing_date(tender: Dict) -> Optional[datetime]:
+    closing_date = tender.get('closing_date')
+    if isinstance(closing_date, str):
+        try:
+            closing_date = datetime.fromisoformat(closing_date)
+        except ValueError:
+            return None
+    if not isinstance(closing_date, datetime):
+        return None
+    if closing_date.tzinfo is None:
+        closing_date = pytz.timezone('Africa/Nairobi').localize(closing_date)
+    return closing_date
+
+
+class SubscriptionIndex:
+    """Inverted index from tender terms to the alert rules that mention them
+
+    A rule matches a tender when every criterion it sets holds: one of its
+    categories, one of its procuring entities, one of its keywords (a word
+    or phrase in the title or description), a value within range and a
+    closing date within ``closing_within_days``.
+
+    Each rule is posted under every (keyword, entity, category)
+    combination it accepts, with None standing for an unset criterion. A
+    tender looks up the combinations of its own phrases, entity and
+    category, so every rule found already satisfies the term criteria.
+    The value and closing-date bounds of each posting list are kept in
+    numpy arrays and filtered in one vectorized step, so Python work per
+    tender does not grow with the number of subscriptions.
+    """
+
+    def __init__(self):
+        self.rules: List[Dict] = []
+        self.targets: List[Tuple[str, str]] = []
+        self._target_codes: Dict[Tuple[str, str], int] = {}
+        self._rule_targets: List[int] = []
+        self._postings: Dict[Tuple, List[int]] = defaultdict(list)
+        self._keywords: Set[str] = set()
+        self._compiled: Optional[Dict[Tuple, Tuple[np.ndarray, ...]]] = None
+        self._max_phrase = 1
+
+    @classmethod
+    def from_db(cls, db_session) -> 'SubscriptionIndex':
+        """Index every active subscription in the database"""
+        index = cls()
+        records = db_session.query(SubscriptionRecord).filter(SubscriptionRecord.is_active == True).all()  # noqa: E712
+        for record in records:
+            index.add(
+                (record.platform, record.chat_id),
+                categories=json.loads(record.categories or '[]'),
+                entities=json.loads(record.entities or '[]'),
+                keywords=json.loads(record.keywords or '[]'),
+                min_value=record.min_value,
+                max_value=record.max_value,
+                closing_within_days=record.closing_within_days
+            )
+        logger.info(f"Indexed {len(index.rules)} subscriptions")
+        return index
+
+    def add(self,
+            target: Tuple[str, str],
+            categories: Iterable[str] = (),
+            entities: Iterable[str] = (),
+            keywords: Iterable[str] = (),
+            min_value: Optional[float] = None,
+            max_value: Optional[float] = None,
+            closing_within_days: Optional[int] = None) -> int:
+        """Index one rule for a (platform, chat_id) target, returning its position"""
+        rule = {
+            'categories': sorted({c.strip().lower() for c in categories if c and c.strip()}),
+            'entities': sorted({_normalize_entity(e) for e in entities if _normalize_entity(e)}),
+            'keywords': sorted({' '.join(_tokens(k)) for k in keywords if _tokens(k)}),
+            'min_value': min_value,
+            'max_value': max_value,
+            'closing_within_days': closing_within_days,
+        }
+        position = len(self.rules)
+        self.rules.append(rule)
+        self.targets.append(target)
+        self._rule_targets.append(self._target_codes.setdefault(target, len(self._target_codes)))
+
+        for keyword in rule['keywords'] or [None]:
+            if keyword:
+                self._keywords.add(keyword)
+                self._max_phrase = max(self._max_phrase, keyword.count(' ') + 1)
+            for entity in rule['entities'] or [None]:
+                for category in rule['categories'] or [None]:
+                    self._postings[(keyword, entity, category)].append(position)
+        self._compiled = None
+        return position
+
+    def _compile(self) -> Dict[Tuple, Tuple[np.ndarray, ...]]:
+        """Rule ids and value/closing bounds of every posting list as arrays"""
+        if self._compiled is None:
+            compiled = {}
+            for key, positions in self._postings.items():
+                ids = np.array(positions, dtype=np.int64)
+                bounds = np.array([
+                    [
+                        self.rules[i]['min_value'] if self.rules[i]['min_value'] is not None else np.nan,
+                        self.rules[i]['max_value'] if self.rules[i]['max_value'] is not None else np.nan,
+                        self.rules[i]['closing_within_days'] if self.rules[i]['closing_within_days'] is not None else np.nan,
+                    ]
+                    for i in positions
+                ], dtype=float)
+                compiled[key] = (ids, bounds)
+            self._compiled = compiled
+        return self._compiled
+
+    def _phrases(self, tokens: List[str]) -> Set[str]:
+        """Every run of up to the longest indexed keyword's length in words"""
+        return {
+            ' '.join(tokens[start:start + length])
+            for length in range(1, self._max_phrase + 1)
+            for start in range(len(tokens) - length + 1)
+        }
+
+    @staticmethod
+    def _within_bounds(bounds: np.ndarray, value: Optional[float], days_left: Optional[float]) -> np.ndarray:
+        min_value, max_value, window = bounds[:, 0], bounds[:, 1], bounds[:, 2]
+        if value is None:
+            ok = np.isnan(min_value) & np.isnan(max_value)
+        else:
+            ok = ~(min_value > value) & ~(max_value < value)
+        if days_left is None or days_left < 0:
+            ok &= np.isnan(window)
+        else:
+            ok &= ~(window < days_left)
+        return ok
+
+    def match(self, tender: Dict, now: Optional[datetime] = None) -> np.ndarray:
+        """Positions of the rules a tender satisfies"""
+        compiled = self._compile()
+        now = now or datetime.now(pytz.timezone('Africa/Nairobi'))
+        tokens = _tokens(f"{tender.get('title') or ''} {tender.get('description') or ''}")
+        category = (tender.get('category') or '').strip().lower() or None
+        entity = _normalize_entity(tender.get('procuring_entity') or tender.get('entity')) or None
+        value = _tender_value(tender)
+        closing_date = _closing_date(tender)
+        days_left = (closing_date - now).total_seconds() / 86400 if closing_date else None
+
+        entities = {entity, None}
+        categories = {category, None}
+        keywords = (self._phrases(tokens) & self._keywords) | {None}
+        # A rule with several matching keywords is posted more than once
+        matched = np.zeros(len(self.rules), dtype=bool)
+        for keyword in keywords:
+            for e in entities:
+                for c in categories:
+                    posting = compiled.get((keyword, e, c))
+                    if posting is not None:
+                        ids, bounds = posting
+                        matched[ids[self._within_bounds(bounds, value, days_left)]] = True
+        return np.flatnonzero(matched)
+
+    def match_targets(self, tenders: List[Dict], now: Optional[datetime] = None) -> List[Tuple[Dict, str, str]]:
+        """(tender, platform, chat_id) for every subscriber a tender should reach
+
+        A subscriber with several matching rules is listed once per tender.
+        """
+        rule_targets = np.array(self._rule_targets, dtype=np.int64)
+        targets = list(self._target_codes)
+        deliveries = []
+        for tender in tenders:
+            for code in np.unique(rule_targets[self.match(tender, now)]):
+                platform, chat_id = targets[code]
+                deliveries.append((tender, platform, chat_id))
+        return deliveries
+
+
+def add_subscription(db_session, chat_id: str, platform: str = 'telegram', **rule) -> int:
+    """Store an alert rule for a subscriber, returning its id"""
+    unknown = set(rule) - set(RULE_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown subscription criteria: {sorted(unknown)}")
+
+    record = SubscriptionRecord(
+        platform=platform,
+        chat_id=str(chat_id),
+        categories=json.dumps(list(rule.get('categories') or [])),
+        entities=json.dumps(list(rule.get('entities') or [])),
+        keywords=json.dumps(list(rule.get('keywords') or [])),
+        min_value=rule.get('min_value'),
+        max_value=rule.get('max_value'),
+        closing_within_days=rule.get('closing_within_days'),
+        is_active=True
+    )
+    db_session.add(record)
+    db_session.commit()
+    return record.id
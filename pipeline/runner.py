@@ -0,0 +1,419 @@
+"""Scrape → dedupe → classify → notify as one streaming run
+
+Usage: python -m pipeline.runner [--model tender_classifier_model.joblib]
+           [--classify-workers 2 [--classify-processes]] [--subscriptions]
+           [--digest] [--record fixtures/ | --dry-run fixtures/]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from classifier.classification_cache import ClassificationCache, fingerprint
+from classifier.tender_classifier import TenderClassifier
+from notifier.digest import DIGEST_DEFAULTS, digest_window_end
+from notifier.notification_agent import NotificationAgent
+from notifier.outbox import NotificationOutbox, drain
+from notifier.subscriptions import SubscriptionIndex
+from scraper.deduplicator import StreamingDeduplicator
+from scraper.snapshot import DEFAULT_SNAPSHOT_PATH, publish_snapshot
+from scraper.tender_scraper import TenderScraper
+
+logger = logging.getLogger(__name__)
+
+# Scraper method behind each source, in the order they are started
+SOURCES = {'mygov': 'scrape_mygov_tenders', 'ppip': 'scrape_ppip_tenders'}
+
+# Ends a stage's input; the stage passes it on once it has drained
+_DONE = None
+
+# Classifier of a classification worker process, loaded by its initializer
+_worker_classifier: Optional[TenderClassifier] = None
+
+
+def _load_worker_classifier(model_path: str):
+    global _worker_classifier
+    _worker_classifier = TenderClassifier()
+    _worker_classifier.load_model(model_path, mmap_mode='r')
+
+
+def classify_in_worker(tenders: List[Dict]) -> List[Dict]:
+    """Classify a batch in a process started with ``classification_pool``"""
+    return _worker_classifier.classify_tenders(tenders)
+
+
+def classification_pool(model_path: str, workers: int) -> ProcessPoolExecutor:
+    """Processes that each load the model once, for ``classify_in_worker``"""
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_load_worker_classifier,
+        initargs=(model_path,)
+    )
+
+
+def _read_fixture(path: str) -> List[Dict]:
+    with open(path) as f:
+        return json.load(f)
+
+
+def load_fixtures(directory: str) -> Dict[str, Callable[[], List[Dict]]]:
+    """Sources replaying the ``<source>.json`` files written by ``record_sources``"""
+    sources = {}
+    for name in sorted(os.listdir(directory)):
+        if name.endswith('.json'):
+            path = os.path.join(directory, name)
+            sources[name[:-len('.json')]] = lambda path=path: _read_fixture(path)
+    if not sources:
+        raise ValueError(f"No recorded fixtures in {directory}")
+    return sources
+
+
+def record_sources(sources: Dict[str, Callable[[], List[Dict]]],
+                   directory: str) -> Dict[str, Callable[[], List[Dict]]]:
+    """Wrap sources so each run also saves what they returned as fixtures"""
+    os.makedirs(directory, exist_ok=True)
+
+    def recording(name: str, scrape: Callable[[], List[Dict]]) -> Callable[[], List[Dict]]:
+        def run() -> List[Dict]:
+            tenders = scrape()
+            with open(os.path.join(directory, f"{name}.json"), 'w') as f:
+                json.dump(tenders, f, default=str)
+            return tenders
+        return run
+
+    return {name: recording(name, scrape) for name, scrape in sources.items()}
+
+
+class StageMetrics:
+    """Throughput counters of one pipeline stage"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.items_in = 0
+        self.items_out = 0
+        self.batches = 0
+        # Seconds spent working (summed over concurrent workers), and waiting
+        # for room in the next queue
+        self.busy = 0.0
+        self.blocked = 0.0
+        self.max_backlog = 0
+        self.first_out: Optional[float] = None
+        self.finished: Optional[float] = None
+
+    def as_dict(self) -> Dict:
+        return {
+            'items_in': self.items_in,
+            'items_out': self.items_out,
+            'batches': self.batches,
+            'busy_s': round(self.busy, 3),
+            'blocked_s': round(self.blocked, 3),
+            'items_per_s': round(self.items_in / self.busy, 1) if self.busy else None,
+            'max_backlog': self.max_backlog,
+            'first_out_s': None if self.first_out is None else round(self.first_out, 3),
+            'finished_s': None if self.finished is None else round(self.finished, 3),
+        }
+
+
+class TenderPipeline:
+    """Scrape → dedupe → classify → notify, joined by bounded queues
+
+    Every source is scraped on its own thread and its tenders enter the
+    pipeline in batches of ``batch_size``. Stages are joined by queues of
+    ``queue_size`` batches, so a slow stage makes the ones before it wait
+    instead of piling batches up in memory, while batches from a finished
+    source are classified and queued for delivery as the other sources are
+    still being scraped. Classification keeps ``classify_workers`` batches
+    in flight on ``classify_executor``, a thread or process pool; cached
+    results are reused and new ones stored. Deliveries go through the
+    outbox, to matching subscribers when ``index`` is given and to the
+    agent's broadcast chats otherwise. With ``send`` off they are only
+    queued, which is what a dry run does.
+    """
+
+    def __init__(self,
+                 scraper: TenderScraper,
+                 sources: Dict[str, Callable[[], List[Dict]]],
+                 classifier: Optional[TenderClassifier] = None,
+                 outbox: Optional[NotificationOutbox] = None,
+                 agent: Optional[NotificationAgent] = None,
+                 index: Optional[SubscriptionIndex] = None,
+                 classify_executor: Optional[Executor] = None,
+                 classify_batch: Optional[Callable[[List[Dict]], List[Dict]]] = None,
+                 classify_workers: int = 1,
+                 batch_size: int = 50,
+                 queue_size: int = 4,
+                 digest: bool = False,
+                 send: bool = True):
+        self.scraper = scraper
+        self.sources = sources
+        self.classifier = classifier
+        self.cache = ClassificationCache(scraper.db_session) if classifier else None
+        self.outbox = outbox
+        self.agent = agent
+        self.index = index
+        self.classify_executor = classify_executor
+        self.classify_batch = classify_batch or (classifier.classify_tenders if classifier else None)
+        self.classify_workers = classify_workers
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+        self.digest = digest
+        self.send = send
+
+        self.tenders: List[Dict] = []
+        self.metrics = {name: StageMetrics(name) for name in ('scrape', 'dedupe', 'classify', 'notify')}
+        self.delivery_stats = {'queued': 0, 'sent': 0, 'retrying': 0, 'dead': 0}
+        self._started = 0.0
+
+    def _elapsed(self) -> float:
+        return time.perf_counter() - self._started
+
+    async def _get(self, queue: asyncio.Queue, metrics: StageMetrics):
+        metrics.max_backlog = max(metrics.max_backlog, queue.qsize())
+        return await queue.get()
+
+    async def _put(self, queue: asyncio.Queue, batch: List[Dict], metrics: StageMetrics):
+        start = time.perf_counter()
+        await queue.put(batch)
+        metrics.blocked += time.perf_counter() - start
+        if batch is not _DONE:
+            metrics.items_out += len(batch)
+            if metrics.first_out is None:
+                metrics.first_out = self._elapsed()
+
+    async def _scrape(self, output: asyncio.Queue, executor: Executor):
+        metrics = self.metrics['scrape']
+        loop = asyncio.get_running_loop()
+
+        async def scrape(name: str, source: Callable[[], List[Dict]]):
+            start = time.perf_counter()
+            try:
+                tenders = await loop.run_in_executor(executor, source)
+            except Exception as e:
+                logger.error(f"Failed to scrape {name}: {str(e)}")
+                return
+            finally:
+                metrics.busy += time.perf_counter() - start
+            metrics.items_in += len(tenders)
+            logger.info(f"Scraped {len(tenders)} tenders from {name}")
+            for offset in range(0, len(tenders), self.batch_size):
+                metrics.batches += 1
+                await self._put(output, tenders[offset:offset + self.batch_size], metrics)
+
+        await asyncio.gather(*(scrape(name, source) for name, source in self.sources.items()))
+        await self._put(output, _DONE, metrics)
+        metrics.finished = self._elapsed()
+
+    async def _dedupe(self, inbox: asyncio.Queue, output: asyncio.Queue):
+        metrics = self.metrics['dedupe']
+        dedup = StreamingDeduplicator(self.scraper.deduplicator)
+        while (batch := await self._get(inbox, metrics)) is not _DONE:
+            start = time.perf_counter()
+            self.tenders.extend(batch)
+            fresh = [tender for tender in batch if dedup.add(tender) is None]
+            metrics.items_in += len(batch)
+            metrics.batches += 1
+            metrics.busy += time.perf_counter() - start
+            if fresh:
+                await self._put(output, fresh, metrics)
+        await self._put(output, _DONE, metrics)
+        metrics.finished = self._elapsed()
+
+    async def _classify_one(self, batch: List[Dict]):
+        version = self.classifier.model_version
+        fingerprints = [fingerprint(tender) for tender in batch]
+        results = self.cache.get_many(list(set(fingerprints)), version)
+
+        misses = {fp: tender for tender, fp in zip(batch, fingerprints) if fp not in results}
+        if misses:
+            loop = asyncio.get_running_loop()
+            classified = await loop.run_in_executor(
+                self.classify_executor, self.classify_batch, list(misses.values())
+            )
+            new_entries = [{**result, 'fingerprint': fp} for fp, result in zip(misses, classified)]
+            # Another worker may have stored the same text meanwhile
+            stored = self.cache.get_many(list(misses), version)
+            self.cache.put_many([entry for entry in new_entries if entry['fingerprint'] not in stored], version)
+            results.update(zip(misses, classified))
+
+        for tender, fp in zip(batch, fingerprints):
+            result = results[fp]
+            tender['classification'] = {
+                key: result[key] for key in ('category', 'confidence', 'risk_level', 'estimated_value')
+            }
+            for key in ('category', 'risk_level', 'estimated_value'):
+                if tender.get(key) in (None, ''):
+                    tender[key] = result[key]
+
+    async def _classify(self, inbox: asyncio.Queue, output: asyncio.Queue):
+        metrics = self.metrics['classify']
+
+        async def worker():
+            while (batch := await self._get(inbox, metrics)) is not _DONE:
+                start = time.perf_counter()
+                if self.classifier is not None:
+                    try:
+                        await self._classify_one(batch)
+                    except Exception as e:
+                        logger.error(f"Failed to classify batch: {str(e)}")
+                        self.scraper.db_session.rollback()
+                metrics.items_in += len(batch)
+                metrics.batches += 1
+                metrics.busy += time.perf_counter() - start
+                await self._put(output, batch, metrics)
+            # Let the next worker see the end of input too
+            await inbox.put(_DONE)
+
+        workers = self.classify_workers if self.classifier is not None else 1
+        await asyncio.gather(*(worker() for _ in range(workers)))
+        await self._put(output, _DONE, metrics)
+        metrics.finished = self._elapsed()
+
+    async def _notify(self, inbox: asyncio.Queue):
+        metrics = self.metrics['notify']
+        not_before = None
+        if self.digest:
+            settings = {**DIGEST_DEFAULTS, **self.agent.config.get('digest', {})}
+            not_before = digest_window_end(datetime.utcnow(), settings['window_minutes'])
+        targets = self.agent.delivery_targets() if self.index is None else None
+
+        while (batch := await self._get(inbox, metrics)) is not _DONE:
+            start = time.perf_counter()
+            if self.index is not None:
+                deliveries = self.index.match_targets(batch)
+            else:
+                deliveries = [(tender, platform, chat_id) for tender in batch for platform, chat_id in targets]
+            self.delivery_stats['queued'] += self.outbox.enqueue_deliveries(deliveries, not_before)
+            if self.send and not self.digest:
+                for key, count in (await drain(self.outbox, self.agent)).items():
+                    self.delivery_stats[key] += count
+            metrics.items_in += len(batch)
+            metrics.items_out += len(batch)
+            metrics.batches += 1
+            metrics.busy += time.perf_counter() - start
+            if metrics.first_out is None:
+                metrics.first_out = self._elapsed()
+        metrics.finished = self._elapsed()
+
+    async def _discard(self, inbox: asyncio.Queue):
+        while await inbox.get() is not _DONE:
+            pass
+
+    async def run(self) -> Dict:
+        """Run every stage to completion and return the per-stage metrics"""
+        self._started = time.perf_counter()
+        scraped, fresh, classified = (asyncio.Queue(self.queue_size) for _ in range(3))
+        stages = [self._dedupe(scraped, fresh), self._classify(fresh, classified)]
+        if self.outbox is not None:
+            stages.append(self._notify(classified))
+        else:
+            stages.append(self._discard(classified))
+
+        with ThreadPoolExecutor(max_workers=len(self.sources), thread_name_prefix='scrape') as executor:
+            tasks = [asyncio.ensure_future(stage) for stage in [self._scrape(scraped, executor)] + stages]
+            try:
+                await asyncio.gather(*tasks)
+            except BaseException:
+                for task in tasks:
+                    task.cancel()
+                raise
+
+        # Store the canonical clusters picked from the whole run
+        unique = self.scraper.deduplicator.deduplicate(self.tenders, db_session=self.scraper.db_session)
+
+        return {
+            'seconds': round(self._elapsed(), 3),
+            'scraped': len(self.tenders),
+            'unique': len(unique),
+            'deliveries': dict(self.delivery_stats),
+            'stages': {name: metrics.as_dict() for name, metrics in self.metrics.items()},
+        }
+
+
+def log_report(report: Dict):
+    logger.info(
+        f"Pipeline finished in {report['seconds']}s: {report['scraped']} scraped, "
+        f"{report['unique']} unique, deliveries {report['deliveries']}"
+    )
+    for name, stats in report['stages'].items():
+        logger.info(f"  {name:<9} {stats}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scrape, deduplicate, classify and notify in one streaming run")
+    parser.add_argument('--db-url', default="sqlite:///tenders.db")
+    parser.add_argument('--config', default='config.json')
+    parser.add_argument('--model', default=os.environ.get('CLASSIFIER_MODEL_PATH', 'tender_classifier_model.joblib'))
+    parser.add_argument('--batch-size', type=int, default=50)
+    parser.add_argument('--queue-size', type=int, default=4, help="Batches each stage may queue for the next")
+    parser.add_argument('--classify-workers', type=int, default=1, help="Batches classified concurrently")
+    parser.add_argument('--classify-processes', action='store_true',
+                        help="Classify in worker processes instead of threads")
+    parser.add_argument('--subscriptions', action='store_true', help="Notify matching subscribers only")
+    parser.add_argument('--digest', action='store_true', help="Queue for the current digest window instead of sending")
+    parser.add_argument('--snapshot', default=DEFAULT_SNAPSHOT_PATH)
+    fixtures = parser.add_mutually_exclusive_group()
+    fixtures.add_argument('--record', metavar='DIR', help="Also save what each source returned as fixtures")
+    fixtures.add_argument('--dry-run', metavar='DIR',
+                          help="Replay fixtures into an in-memory database; nothing is sent or published")
+    args = parser.parse_args()
+
+    # A dry run keeps everything on one thread, which an in-memory SQLite needs
+    scraper = TenderScraper("sqlite://" if args.dry_run else args.db_url)
+    if args.dry_run:
+        sources = load_fixtures(args.dry_run)
+    else:
+        sources = {name: getattr(scraper, method) for name, method in SOURCES.items()}
+        if args.record:
+            sources = record_sources(sources, args.record)
+
+    classifier = TenderClassifier()
+    try:
+        classifier.load_model(args.model, mmap_mode='r')
+    except Exception as e:
+        logger.warning(f"Classifier not loaded, tenders pass through unclassified: {str(e)}")
+        classifier = None
+
+    executor = None
+    classify_batch = None
+    if classifier is not None:
+        if args.classify_processes:
+            executor = classification_pool(args.model, args.classify_workers)
+            classify_batch = classify_in_worker
+        else:
+            executor = ThreadPoolExecutor(max_workers=args.classify_workers, thread_name_prefix='classify')
+
+    agent = NotificationAgent(args.config)
+    pipeline = TenderPipeline(
+        scraper,
+        sources,
+        classifier=classifier,
+        outbox=NotificationOutbox(scraper.db_session),
+        agent=agent,
+        index=SubscriptionIndex.from_db(scraper.db_session) if args.subscriptions else None,
+        classify_executor=executor,
+        classify_batch=classify_batch,
+        classify_workers=args.classify_workers,
+        batch_size=args.batch_size,
+        queue_size=args.queue_size,
+        digest=args.digest,
+        send=not args.dry_run
+    )
+    try:
+        report = asyncio.run(pipeline.run())
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    log_report(report)
+    if not args.dry_run:
+        publish_snapshot(scraper.db_session, args.snapshot)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
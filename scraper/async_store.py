@@ -0,0 +1,103 @@
+import asyncio
+import functools
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncTenderStore:
+    """Async facade over the blocking tender data sources
+
+    SQLAlchemy queries, snapshot reads and scraping all block, so calling
+    them from an ``async def`` handler stalls every request on the worker.
+    This store runs them on a bounded thread pool instead. At most
+    ``max_workers`` calls run at once; further callers wait on the event
+    loop rather than piling up in the executor queue.
+
+    Pass ``scraper_factory`` instead of ``scraper`` to defer creating the
+    scraper (and importing its dependencies) until a call first needs it.
+    The factory then runs on a worker thread, not on the event loop.
+    """
+
+    def __init__(self,
+                 scraper=None,
+                 snapshot=None,
+                 max_workers: int = 8,
+                 scraper_factory: Optional[Callable] = None):
+        self._scraper = scraper
+        self._scraper_factory = scraper_factory
+        self._scraper_lock = threading.Lock()
+        self.snapshot = snapshot
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='tender-store')
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._max_workers = max_workers
+
+    @property
+    def scraper(self):
+        """The scraper, created on first use when only a factory was given"""
+        if self._scraper is None:
+            with self._scraper_lock:
+                if self._scraper is None:
+                    self._scraper = self._scraper_factory()
+        return self._scraper
+
+    async def run(self, func: Callable, *args, **kwargs):
+        """Run a blocking callable on the store's thread pool"""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self._max_workers)
+        loop = asyncio.get_running_loop()
+        async with self._semaphore:
+            return await loop.run_in_executor(
+                self._executor, functools.partial(func, *args, **kwargs)
+            )
+
+    def _with_session(self, method: str, *args, **kwargs):
+        """Call a scraper method and release the worker thread's session"""
+        try:
+            return getattr(self.scraper, method)(*args, **kwargs)
+        finally:
+            self.scraper.db_session.remove()
+
+    async def get_mobile_tenders(self,
+                                 status: Optional[str] = None,
+                                 category: Optional[str] = None,
+                                 entity: Optional[str] = None,
+                                 days_remaining: Optional[int] = None,
+                                 offline: bool = False) -> List[Dict]:
+        """Async equivalent of ``TenderScraper.get_mobile_tenders``"""
+        return await self.run(
+            self._with_session, 'get_mobile_tenders',
+            status=status, category=category, entity=entity,
+            days_remaining=days_remaining, offline=offline
+        )
+
+    async def get_tender_stats(self) -> Dict:
+        """Async equivalent of ``TenderScraper.get_tender_stats``"""
+        return await self.run(self._with_session, 'get_tender_stats')
+
+    async def get_tender_by_reference(self, reference: str) -> Optional[Dict]:
+        """Async equivalent of ``TenderScraper.get_tender_by_reference``"""
+        return await self.run(self._with_session, 'get_tender_by_reference', reference)
+
+    async def scrape_all_tenders(self) -> List[Dict]:
+        """Scrape both sources without blocking the event loop"""
+        return await self.run(self._with_session, 'scrape_all_tenders')
+
+    async def query_snapshot(self, **filters) -> Tuple[int, List[Dict]]:
+        """Async equivalent of ``SnapshotReader.query_tenders``"""
+        return await self.run(self.snapshot.query_tenders, **filters)
+
+    async def get_snapshot_tender(self, reference: str) -> Optional[Dict]:
+        """Async equivalent of ``SnapshotReader.get_tender``"""
+        return await self.run(self.snapshot.get_tender, reference)
+
+    async def get_snapshot_stats(self) -> Dict:
+        """Async equivalent of ``SnapshotReader.get_stats``"""
+        return await self.run(self.snapshot.get_stats)
+
+    def close(self):
+        """Stop the worker threads"""
+        self._executor.shutdown(wait=False)
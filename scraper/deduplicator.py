@@ -0,0 +1,282 @@
+import logging
+import re
+import zlib
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Largest 31-bit prime; keeps (a * h + b) inside uint64 for 32-bit shingle hashes
+_MERSENNE_PRIME = np.uint64((1 << 31) - 1)
+
+# Words that differ between MyGov and PPIP listings of the same tender
+_TITLE_STOPWORDS = {
+    'a', 'an', 'and', 'for', 'in', 'of', 'on', 'the', 'to', 'at', 'by', 'with',
+    'tender', 'no', 'ref', 'reference'
+}
+_ENTITY_STOPWORDS = {'the', 'of', 'for', 'and', 'state', 'department'}
+_NON_ALNUM = re.compile(r'[^a-z0-9 ]+')
+_WHITESPACE = re.compile(r'\s+')
+
+
+class _UnionFind:
+    """Disjoint sets over tender indices"""
+
+    def __init__(self, size: int):
+        self.parent = list(range(size))
+
+    def find(self, i: int) -> int:
+        while self.parent[i] != i:
+            self.parent[i] = self.parent[self.parent[i]]
+            i = self.parent[i]
+        return i
+
+    def union(self, i: int, j: int):
+        root_i, root_j = self.find(i), self.find(j)
+        if root_i != root_j:
+            self.parent[max(root_i, root_j)] = min(root_i, root_j)
+
+
+class TenderDeduplicator:
+    """Find the same tender listed by several sources
+
+    Tenders are first blocked by procuring entity and closing date, then
+    MinHash signatures of their normalized titles are banded into an LSH
+    table so only likely matches are ever compared. Candidate pairs are
+    confirmed with the exact Jaccard similarity of their title shingles.
+    """
+
+    def __init__(self,
+                 num_perm: int = 64,
+                 bands: int = 16,
+                 threshold: float = 0.7,
+                 shingle_size: int = 4,
+                 seed: int = 42):
+        if num_perm % bands != 0:
+            raise ValueError("num_perm must be divisible by bands")
+
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, int(_MERSENNE_PRIME), size=num_perm).astype(np.uint64)
+        self._b = rng.randint(0, int(_MERSENNE_PRIME), size=num_perm).astype(np.uint64)
+
+    def normalize_title(self, title: Optional[str]) -> str:
+        """Lowercase, strip punctuation and drop filler words from a title"""
+        if not title:
+            return ''
+        text = _NON_ALNUM.sub(' ', title.lower().replace('&', ' and '))
+        tokens = [t for t in text.split() if t not in _TITLE_STOPWORDS]
+        return ' '.join(tokens)
+
+    def blocking_key(self, tender: Dict) -> Tuple[str, str]:
+        """Block on normalized procuring entity and closing day"""
+        entity = _NON_ALNUM.sub(' ', (tender.get('procuring_entity') or '').lower())
+        entity = ' '.join(t for t in entity.split() if t not in _ENTITY_STOPWORDS)
+
+        closing_date = tender.get('closing_date')
+        if isinstance(closing_date, datetime):
+            closing_day = closing_date.date().isoformat()
+        else:
+            closing_day = str(closing_date)[:10] if closing_date else ''
+
+        return entity, closing_day
+
+    def shingles(self, text: str) -> Set[int]:
+        """Hash character n-grams of a normalized title"""
+        text = _WHITESPACE.sub(' ', text)
+        if len(text) <= self.shingle_size:
+            return {zlib.crc32(text.encode('utf-8'))} if text else set()
+        return {
+            zlib.crc32(text[i:i + self.shingle_size].encode('utf-8'))
+            for i in range(len(text) - self.shingle_size + 1)
+        }
+
+    def minhash(self, shingles: Set[int]) -> np.ndarray:
+        """MinHash signature of a shingle set"""
+        if not shingles:
+            return np.full(self.num_perm, _MERSENNE_PRIME, dtype=np.uint64)
+        hashes = np.fromiter(shingles, dtype=np.uint64, count=len(shingles))
+        permuted = (np.outer(self._a, hashes) + self._b[:, None]) % _MERSENNE_PRIME
+        return permuted.min(axis=1)
+
+    @staticmethod
+    def jaccard(left: Set[int], right: Set[int]) -> float:
+        if not left or not right:
+            return 0.0
+        return len(left & right) / len(left | right)
+
+    def find_clusters(self, tenders: List[Dict]) -> List[List[int]]:
+        """Group tender indices into clusters of near-duplicates
+
+        Only clusters with more than one member are returned.
+        """
+        shingle_sets = [
+            self.shingles(self.normalize_title(t.get('title'))) for t in tenders
+        ]
+
+        buckets: Dict[Tuple, List[int]] = defaultdict(list)
+        for idx, (tender, shingles) in enumerate(zip(tenders, shingle_sets)):
+            if not shingles:
+                continue
+            block = self.blocking_key(tender)
+            signature = self.minhash(shingles)
+            for band in range(self.bands):
+                band_slice = signature[band * self.rows:(band + 1) * self.rows]
+                buckets[(block, band, band_slice.tobytes())].append(idx)
+
+        union_find = _UnionFind(len(tenders))
+        compared: Set[Tuple[int, int]] = set()
+        for members in buckets.values():
+            if len(members) < 2:
+                continue
+            for pos, i in enumerate(members):
+                for j in members[pos + 1:]:
+                    if (i, j) in compared:
+                        continue
+                    compared.add((i, j))
+                    if self.jaccard(shingle_sets[i], shingle_sets[j]) >= self.threshold:
+                        union_find.union(i, j)
+
+        groups: Dict[int, List[int]] = defaultdict(list)
+        for idx in range(len(tenders)):
+            groups[union_find.find(idx)].append(idx)
+
+        clusters = [members for members in groups.values() if len(members) > 1]
+        logger.debug(
+            f"Compared {len(compared)} candidate pairs, found {len(clusters)} duplicate clusters"
+        )
+        return clusters
+
+    @staticmethod
+    def choose_canonical(tenders: List[Dict], members: Iterable[int]) -> int:
+        """Pick the most complete listing as the canonical tender"""
+        return max(
+            members,
+            key=lambda idx: (
+                sum(1 for v in tenders[idx].values() if v not in (None, '')),
+                tenders[idx].get('source') == 'ppip',
+                -idx
+            )
+        )
+
+    def deduplicate(self, tenders: List[Dict], db_session=None) -> List[Dict]:
+        """Collapse cross-source duplicates, keeping one canonical tender each
+
+        The canonical tender lists the other listings under ``duplicates``.
+        When ``db_session`` is given the clusters are stored as well.
+        """
+        clusters = self.find_clusters(tenders)
+        if not clusters:
+            return tenders
+
+        dropped = set()
+        canonical_clusters = []
+        for members in clusters:
+            canonical = self.choose_canonical(tenders, members)
+            others = [idx for idx in members if idx != canonical]
+            tenders[canonical]['duplicates'] = [
+                {'reference': tenders[idx].get('reference'), 'source': tenders[idx].get('source')}
+                for idx in others
+            ]
+            dropped.update(others)
+            canonical_clusters.append((canonical, others))
+
+        if db_session is not None:
+            self.save_clusters(db_session, tenders, canonical_clusters)
+
+        logger.info(f"Collapsed {len(dropped)} duplicate tenders into {len(clusters)} clusters")
+        return [t for idx, t in enumerate(tenders) if idx not in dropped]
+
+    def save_clusters(self, db_session, tenders: List[Dict], clusters: List[Tuple[int, List[int]]]):
+        """Persist canonical clusters to the tender_clusters table"""
+        from scraper.tender_scraper import TenderClusterRecord
+
+        try:
+            for canonical, others in clusters:
+                canonical_tender = tenders[canonical]
+                canonical_shingles = self.shingles(self.normalize_title(canonical_tender.get('title')))
+                for idx in [canonical] + others:
+                    member = tenders[idx]
+                    similarity = self.jaccard(
+                        canonical_shingles,
+                        self.shingles(self.normalize_title(member.get('title')))
+                    )
+                    record = db_session.query(TenderClusterRecord).filter_by(
+                        member_reference=member.get('reference'),
+                        member_source=member.get('source')
+                    ).first()
+                    if not record:
+                        record = TenderClusterRecord(
+                            member_reference=member.get('reference'),
+                            member_source=member.get('source')
+                        )
+                        db_session.add(record)
+                    record.canonical_reference = canonical_tender.get('reference')
+                    record.canonical_source = canonical_tender.get('source')
+                    record.similarity = similarity
+                    record.updated_at = datetime.utcnow()
+            db_session.commit()
+        except Exception as e:
+            logger.error(f"Failed to save duplicate clusters: {str(e)}")
+            db_session.rollback()
+
+
+class StreamingDeduplicator:
+    """Duplicate check for tenders that arrive a few at a time
+
+    Keeps the LSH buckets of every tender seen so far, so each new tender
+    is only compared with earlier candidates in its block. The first
+    listing of a tender wins; a later listing is added to its
+    ``duplicates`` and reported by ``add``. Which listing is stored as
+    canonical is still decided by ``TenderDeduplicator.deduplicate`` once
+    every tender is in.
+    """
+
+    def __init__(self, deduplicator: Optional[TenderDeduplicator] = None):
+        self.deduplicator = deduplicator or TenderDeduplicator()
+        self._buckets: Dict[Tuple, List[int]] = defaultdict(list)
+        self._seen: List[Tuple[Dict, Set[int]]] = []
+
+    def __len__(self) -> int:
+        return len(self._seen)
+
+    def add(self, tender: Dict) -> Optional[Dict]:
+        """The earlier tender this one duplicates, or None when it is new"""
+        dedup = self.deduplicator
+        shingles = dedup.shingles(dedup.normalize_title(tender.get('title')))
+        if not shingles:
+            return None
+
+        block = dedup.blocking_key(tender)
+        signature = dedup.minhash(shingles)
+        keys = [
+            (block, band, signature[band * dedup.rows:(band + 1) * dedup.rows].tobytes())
+            for band in range(dedup.bands)
+        ]
+
+        compared: Set[int] = set()
+        for key in keys:
+            for idx in self._buckets.get(key, ()):
+                if idx in compared:
+                    continue
+                compared.add(idx)
+                earlier, earlier_shingles = self._seen[idx]
+                if dedup.jaccard(shingles, earlier_shingles) >= dedup.threshold:
+                    earlier.setdefault('duplicates', []).append(
+                        {'reference': tender.get('reference'), 'source': tender.get('source')}
+                    )
+                    return earlier
+
+        idx = len(self._seen)
+        self._seen.append((tender, shingles))
+        for key in keys:
+            self._buckets[key].append(idx)
+        return None
@@ -0,0 +1,68 @@
+"""One-time schema setup for the tenders database
+
+Creates missing tables and adds columns and indexes that newer models
+define but an existing database lacks. Run it on deploy rather than at
+API start-up:
+
+    python -m scraper.migrate --db-url sqlite:///tenders.db
+"""
+import argparse
+import logging
+from typing import List
+
+from sqlalchemy import create_engine, inspect, text
+
+from scraper.tender_scraper import Base
+
+logger = logging.getLogger(__name__)
+
+
+def migrate(db_url: str = "sqlite:///tenders.db") -> List[str]:
+    """Bring the schema up to date and return the columns and indexes that were added"""
+    engine = create_engine(db_url)
+    Base.metadata.create_all(engine)
+
+    inspector = inspect(engine)
+    added = []
+    with engine.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            existing = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                ddl = f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(engine.dialect)}"
+                default = column.default.arg if column.default is not None and column.default.is_scalar else None
+                if isinstance(default, str):
+                    ddl += " DEFAULT '" + default.replace("'", "''") + "'"
+                elif isinstance(default, (bool, int, float)):
+                    ddl += f" DEFAULT {int(default) if isinstance(default, bool) else default}"
+                connection.execute(text(ddl))
+                added.append(f"{table.name}.{column.name}")
+
+        # create_all skips tables that exist, so add their new indexes too
+        existing_indexes = {
+            table.name: {index['name'] for index in inspector.get_indexes(table.name)}
+            for table in Base.metadata.sorted_tables
+        }
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                if index.name not in existing_indexes[table.name]:
+                    index.create(connection)
+                    added.append(index.name)
+
+    engine.dispose()
+    for name in added:
+        logger.info(f"Added {name}")
+    return added
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Create or upgrade the tenders database schema")
+    parser.add_argument('--db-url', default="sqlite:///tenders.db")
+    args = parser.parse_args()
+    migrate(args.db_url)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -0,0 +1,414 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import textwrap
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import pytz
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SNAPSHOT_PATH = os.environ.get('TENDERS_SNAPSHOT_PATH', 'tenders_snapshot.db')
+
+EAT = pytz.timezone('Africa/Nairobi')
+DAY_SECONDS = 86400
+
+# Columns served by the API; everything else stays in the ingest database
+HOT_COLUMNS = [
+    'reference', 'title', 'description', 'procuring_entity', 'procurement_method',
+    'category', 'value', 'currency', 'document_url', 'closing_date',
+    'published_date', 'source'
+]
+
+# Fields a query can be projected onto; the last two are derived from closing_ts
+TENDER_FIELDS = HOT_COLUMNS + ['duplicates', 'days_remaining', 'status']
+_DERIVED_FIELDS = {'days_remaining', 'status'}
+
+_SCHEMA = """
+CREATE TABLE tenders (
+    reference TEXT NOT NULL,
+    title TEXT,
+    description TEXT,
+    procuring_entity TEXT,
+    procurement_method TEXT,
+    category TEXT,
+    value TEXT,
+    currency TEXT,
+    document_url TEXT,
+    closing_date TEXT,
+    published_date TEXT,
+    source TEXT,
+    closing_ts INTEGER,
+    duplicates TEXT
+);
+CREATE TABLE aliases (
+    reference TEXT PRIMARY KEY,
+    canonical_reference TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE stats (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+) WITHOUT ROWID;
+"""
+
+_INDEXES = """
+CREATE INDEX ix_tenders_reference ON tenders (reference);
+CREATE INDEX ix_tenders_closing_ts ON tenders (closing_ts);
+CREATE INDEX ix_tenders_entity ON tenders (procuring_entity COLLATE NOCASE);
+CREATE INDEX ix_tenders_category ON tenders (category COLLATE NOCASE);
+"""
+
+
+def _to_eat(value) -> Optional[datetime]:
+    """Interpret stored datetimes as EAT, matching the mobile formatter"""
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        return EAT.localize(value)
+    return value.astimezone(EAT)
+
+
+def _snapshot_row(record) -> Tuple:
+    closing = _to_eat(record.closing_date)
+    published = _to_eat(record.published_date)
+    return (
+        record.reference,
+        textwrap.shorten(record.title, width=100, placeholder="...") if record.title else record.title,
+        textwrap.shorten(record.description, width=200, placeholder="...") if record.description else record.description,
+        record.procuring_entity,
+        record.procurement_method,
+        record.category,
+        record.value,
+        record.currency,
+        record.document_url,
+        closing.isoformat() if closing else None,
+        published.isoformat() if published else None,
+        record.source,
+        int(closing.timestamp()) if closing else None,
+    )
+
+
+def publish_snapshot(db_session, path: str = DEFAULT_SNAPSHOT_PATH) -> str:
+    """Build a read-optimized snapshot of the tenders table and swap it into place
+
+    Only canonical tenders (see ``tender_clusters``) and the hot columns are
+    copied. Indexes and the time-independent stats are built before the file
+    is atomically renamed over ``path``, so readers only ever see a complete
+    snapshot. Returns the snapshot version, a hash of its content.
+    """
+    from scraper.tender_scraper import TenderRecord, TenderClusterRecord
+
+    # Non-canonical cluster members are served through their canonical tender
+    duplicates: Dict[Tuple[str, str], List[Dict]] = {}
+    hidden = set()
+    for cluster in db_session.query(TenderClusterRecord).all():
+        canonical = (cluster.canonical_reference, cluster.canonical_source)
+        member = (cluster.member_reference, cluster.member_source)
+        if member != canonical:
+            hidden.add(member)
+            duplicates.setdefault(canonical, []).append(
+                {'reference': cluster.member_reference, 'source': cluster.member_source}
+            )
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix='.snapshot-', suffix='.db', dir=directory)
+    os.close(fd)
+
+    digest = hashlib.sha1()
+    try:
+        conn = sqlite3.connect(tmp_path)
+        conn.execute('PRAGMA journal_mode=OFF')
+        conn.execute('PRAGMA synchronous=OFF')
+        conn.executescript(_SCHEMA)
+
+        rows = []
+        aliases = []
+        entities = set()
+        categories = set()
+        by_source: Dict[str, int] = {}
+        by_category: Dict[str, int] = {}
+
+        records = db_session.query(TenderRecord).order_by(TenderRecord.id).yield_per(1000)
+        for record in records:
+            key = (record.reference, record.source)
+            if not record.reference or key in hidden:
+                continue
+
+            row_duplicates = duplicates.get(key)
+            row = _snapshot_row(record) + (json.dumps(row_duplicates) if row_duplicates else None,)
+            rows.append(row)
+            digest.update(repr(row).encode('utf-8'))
+            for duplicate in row_duplicates or []:
+                aliases.append((duplicate['reference'], record.reference))
+
+            if record.procuring_entity:
+                entities.add(record.procuring_entity)
+            if record.category:
+                categories.add(record.category)
+                by_category[record.category] = by_category.get(record.category, 0) + 1
+            by_source[record.source] = by_source.get(record.source, 0) + 1
+
+            if len(rows) >= 1000:
+                conn.executemany(f'INSERT INTO tenders VALUES ({",".join("?" * 14)})', rows)
+                rows = []
+
+        if rows:
+            conn.executemany(f'INSERT INTO tenders VALUES ({",".join("?" * 14)})', rows)
+        conn.executemany('INSERT OR REPLACE INTO aliases VALUES (?, ?)', aliases)
+        conn.executescript(_INDEXES)
+
+        version = digest.hexdigest()[:16]
+        published_at = datetime.now(EAT).isoformat()
+        top_categories = dict(sorted(by_category.items(), key=lambda kv: kv[1], reverse=True)[:5])
+        conn.executemany('INSERT INTO stats VALUES (?, ?)', [
+            ('unique_entities', json.dumps(len(entities))),
+            ('unique_categories', json.dumps(len(categories))),
+            ('by_source', json.dumps(by_source)),
+            ('by_category', json.dumps(top_categories)),
+        ])
+        conn.executemany('INSERT INTO meta VALUES (?, ?)', [
+            ('version', version),
+            ('published_at', published_at),
+        ])
+        conn.execute('ANALYZE')
+        conn.commit()
+        conn.close()
+
+        with open(tmp_path, 'rb') as f:
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    logger.info(f"Published snapshot {version} to {path}")
+    return version
+
+
+class SnapshotReader:
+    """Lock-free, read-only access to the published tenders snapshot
+
+    Each thread holds its own connection opened in SQLite's immutable mode,
+    so reads take no locks. The snapshot file is re-checked at most every
+    ``check_interval`` seconds; when a new one has been swapped in, every
+    thread reopens on its next read while in-flight reads finish on the old
+    file.
+    """
+
+    def __init__(self, path: str = DEFAULT_SNAPSHOT_PATH, check_interval: float = 1.0):
+        self.path = path
+        self.check_interval = check_interval
+        self.version: Optional[str] = None
+        self.published_at: Optional[str] = None
+        self._file_id = None
+        self._generation = 0
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def available(self) -> bool:
+        """Whether a snapshot has been published"""
+        self._check_for_update()
+        return self._file_id is not None
+
+    def _check_for_update(self):
+        now = time.monotonic()
+        if now < self._next_check:
+            return
+        with self._lock:
+            if now < self._next_check:
+                return
+            self._next_check = now + self.check_interval
+            try:
+                stat = os.stat(self.path)
+            except FileNotFoundError:
+                self._file_id = None
+                return
+            file_id = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+            if file_id == self._file_id:
+                return
+
+            conn = self._open()
+            meta = dict(conn.execute('SELECT key, value FROM meta').fetchall())
+            conn.close()
+            self.version = meta.get('version')
+            self.published_at = meta.get('published_at')
+            self._file_id = file_id
+            self._generation += 1
+            logger.info(f"Loaded tenders snapshot {self.version}")
+
+    def _open(self) -> sqlite3.Connection:
+        uri = f"file:{os.path.abspath(self.path)}?mode=ro&immutable=1"
+        conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _connection(self) -> sqlite3.Connection:
+        self._check_for_update()
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.generation != self._generation:
+            if conn is not None:
+                conn.close()
+            conn = self._open()
+            self._local.conn = conn
+            self._local.generation = self._generation
+        return conn
+
+    @staticmethod
+    def _select_list(fields: Optional[Sequence[str]]) -> str:
+        """Columns to read for a projection onto ``fields`` (all when None)"""
+        if fields is None:
+            return '*'
+        unknown = [field for field in fields if field not in TENDER_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown tender fields: {', '.join(unknown)}")
+        columns = [field for field in fields if field not in _DERIVED_FIELDS]
+        if _DERIVED_FIELDS.intersection(fields):
+            columns.append('closing_ts')
+        return ', '.join(columns)
+
+    @staticmethod
+    def _format_row(row: sqlite3.Row, now: float, fields: Optional[Sequence[str]] = None) -> Dict:
+        tender = dict(row)
+        closing_ts = tender.pop('closing_ts', None)
+        if 'duplicates' in tender:
+            duplicates = tender.pop('duplicates')
+            if duplicates:
+                tender['duplicates'] = json.loads(duplicates)
+
+        # Derived fields are only computed when requested
+        if fields is None or _DERIVED_FIELDS.intersection(fields):
+            if closing_ts is not None:
+                days_remaining = int((closing_ts - now) // DAY_SECONDS)
+                status = 'closed' if days_remaining < 0 else 'closing_soon' if days_remaining <= 7 else 'open'
+            else:
+                days_remaining, status = None, 'unknown'
+            if fields is None or 'days_remaining' in fields:
+                tender['days_remaining'] = days_remaining
+            if fields is None or 'status' in fields:
+                tender['status'] = status
+        return tender
+
+    @staticmethod
+    def _status_clause(status: Optional[str], now: float) -> Tuple[str, List]:
+        closing_soon_end = now + 8 * DAY_SECONDS
+        if status == 'closed':
+            return 'closing_ts < ?', [now]
+        if status == 'closing_soon':
+            return 'closing_ts >= ? AND closing_ts < ?', [now, closing_soon_end]
+        if status == 'open':
+            return 'closing_ts >= ?', [closing_soon_end]
+        if status == 'active':
+            return 'closing_ts >= ?', [now]
+        return '', []
+
+    def query_tenders(self,
+                      status: Optional[str] = None,
+                      entity: Optional[str] = None,
+                      category: Optional[str] = None,
+                      days_remaining: Optional[int] = None,
+                      offset: int = 0,
+                      limit: Optional[int] = None,
+                      fields: Optional[Sequence[str]] = None) -> Tuple[int, List[Dict]]:
+        """Filter and page tenders, returning (total matches, page)
+
+        ``fields`` limits each tender to the given ``TENDER_FIELDS``; only
+        their columns are read from the snapshot.
+        """
+        now = time.time()
+        select_list = self._select_list(fields)
+        clauses = []
+        params: List = []
+
+        status_clause, status_params = self._status_clause(status, now)
+        if status_clause:
+            clauses.append(status_clause)
+            params.extend(status_params)
+        if entity:
+            clauses.append("procuring_entity LIKE ? ESCAPE '\\'")
+            params.append(f"%{_escape_like(entity)}%")
+        if category:
+            clauses.append("category LIKE ? ESCAPE '\\'")
+            params.append(f"%{_escape_like(category)}%")
+        if days_remaining is not None:
+            clauses.append('closing_ts < ?')
+            params.append(now + (days_remaining + 1) * DAY_SECONDS)
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+        conn = self._connection()
+        total = conn.execute(f'SELECT COUNT(*) FROM tenders {where}', params).fetchone()[0]
+
+        page_sql = f'SELECT {select_list} FROM tenders {where} ORDER BY closing_ts IS NULL, closing_ts, rowid'
+        page_params = list(params)
+        if limit is not None:
+            page_sql += ' LIMIT ? OFFSET ?'
+            page_params.extend([limit, offset])
+        rows = conn.execute(page_sql, page_params).fetchall()
+        return total, [self._format_row(row, now, fields) for row in rows]
+
+    def get_tender(self, reference: str) -> Optional[Dict]:
+        """Look up a tender by its reference or a duplicate listing's reference"""
+        conn = self._connection()
+        row = conn.execute('SELECT * FROM tenders WHERE reference = ?', (reference,)).fetchone()
+        if row is None:
+            alias = conn.execute(
+                'SELECT canonical_reference FROM aliases WHERE reference = ?', (reference,)
+            ).fetchone()
+            if alias is None:
+                return None
+            row = conn.execute(
+                'SELECT * FROM tenders WHERE reference = ?', (alias[0],)
+            ).fetchone()
+        return self._format_row(row, time.time()) if row else None
+
+    def get_stats(self) -> Dict:
+        """Precomputed stats plus status counts for the current time"""
+        now = time.time()
+        conn = self._connection()
+        stats = {key: json.loads(value) for key, value in conn.execute('SELECT key, value FROM stats')}
+
+        counts = {}
+        for status in ('open', 'closing_soon', 'closed'):
+            clause, params = self._status_clause(status, now)
+            counts[status] = conn.execute(
+                f'SELECT COUNT(*) FROM tenders WHERE {clause}', params
+            ).fetchone()[0]
+
+        return {
+            "total_tenders": conn.execute('SELECT COUNT(*) FROM tenders').fetchone()[0],
+            "open_tenders": counts['open'],
+            "closing_soon": counts['closing_soon'],
+            "closed_tenders": counts['closed'],
+            "unique_entities": stats.get('unique_entities', 0),
+            "unique_categories": stats.get('unique_categories', 0),
+            "by_source": stats.get('by_source', {}),
+            "by_category": stats.get('by_category', {}),
+            "last_updated": self.published_at
+        }
+
+
+def _escape_like(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def main():
+    from scraper.tender_scraper import TenderScraper
+
+    scraper = TenderScraper()
+    publish_snapshot(scraper.db_session, DEFAULT_SNAPSHOT_PATH)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -4,17 +4,21 @@ import pandas as pd
 from datetime import datetime
 import json
 import logging
+import os
 import time
-from typing import List, Dict, Optional
+from typing import Callable, List, Dict, Optional
 import urllib3
 from urllib3.exceptions import InsecureRequestWarning
 import re
-from sqlalchemy import create_engine, Column, String, DateTime, Integer, Text, Boolean, func
+from sqlalchemy import create_engine, Column, String, DateTime, Integer, Text, Boolean, Float, UniqueConstraint, func
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import sessionmaker, scoped_session
 import pytz
 from dateutil import parser
 import textwrap
+from classifier.value_extraction import extract_amount_column
+from scraper.deduplicator import TenderDeduplicator
+from scraper.snapshot import DEFAULT_SNAPSHOT_PATH, publish_snapshot
 
 # Configure logging
 logging.basicConfig(
@@ -47,14 +51,84 @@ class TenderRecord(Base):
     source = Column(String(50))
     is_processed = Column(Boolean, default=False)
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+    # When category was last set; incremental training reads labels by it
+    category_updated_at = Column(DateTime)
+
+class TenderClassificationRecord(Base):
+    """Cached classifier output, keyed by tender text fingerprint and model version"""
+    __tablename__ = 'tender_classifications'
+    __table_args__ = (UniqueConstraint('fingerprint', 'model_version'),)
+
+    id = Column(Integer, primary_key=True)
+    tender_id = Column(Integer, index=True)
+    fingerprint = Column(String(64))
+    model_version = Column(String(64), index=True)
+    category = Column(String(100))
+    confidence = Column(Float)
+    entities = Column(Text)
+    risk_level = Column(String(20))
+    estimated_value = Column(Float)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class TenderClusterRecord(Base):
+    """Membership of a tender listing in a cross-source duplicate cluster"""
+    __tablename__ = 'tender_clusters'
+    __table_args__ = (UniqueConstraint('member_reference', 'member_source'),)
+
+    id = Column(Integer, primary_key=True)
+    canonical_reference = Column(String(100), index=True)
+    canonical_source = Column(String(50))
+    member_reference = Column(String(100))
+    member_source = Column(String(50))
+    similarity = Column(Float)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class NotificationOutboxRecord(Base):
+    """One pending or completed delivery of a tender to a platform chat"""
+    __tablename__ = 'notification_outbox'
+
+    id = Column(Integer, primary_key=True)
+    idempotency_key = Column(String(64), unique=True)
+    tender_reference = Column(String(100), index=True)
+    platform = Column(String(20))
+    chat_id = Column(String(100))
+    kind = Column(String(30), default='new')
+    payload = Column(Text)
+    status = Column(String(20), default='pending', index=True)
+    attempts = Column(Integer, default=0)
+    next_attempt_at = Column(DateTime, default=datetime.utcnow, index=True)
+    last_error = Column(Text)
+    sent_at = Column(DateTime)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class SubscriptionRecord(Base):
+    """Alert rule of one subscriber; empty criteria match any tender"""
+    __tablename__ = 'subscriptions'
+
+    id = Column(Integer, primary_key=True)
+    platform = Column(String(20), default='telegram')
+    chat_id = Column(String(100), index=True)
+    categories = Column(Text)
+    entities = Column(Text)
+    keywords = Column(Text)
+    min_value = Column(Float)
+    max_value = Column(Float)
+    closing_within_days = Column(Integer)
+    is_active = Column(Boolean, default=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 class TenderScraper:
-    def __init__(self, db_url="sqlite:///tenders.db"):
-        # Site configurations
+    def __init__(self, db_url="sqlite:///tenders.db", create_schema: bool = True):
+        # Site configurations; the URLs can be pointed at local stand-ins,
+        # see benchmarks/bench_api_load.py
+        ppip_base_url = os.environ.get('PPIP_BASE_URL', 'https://tenders.go.ke').rstrip('/')
         self.sites = {
             'mygov': {
-                'url': 'https://www.mygov.go.ke/all-tenders',
+                'url': os.environ.get('MYGOV_TENDERS_URL', 'https://www.mygov.go.ke/all-tenders'),
                 'table_id': 'datatable',
                 'selectors': {
                     'reference': {'class': 'views-field-counter'},
@@ -65,8 +139,8 @@ class TenderScraper:
                 }
             },
             'ppip': {
-                'base_url': 'https://tenders.go.ke',
-                'ocds_url': 'https://tenders.go.ke/api/ocds/tenders',
+                'base_url': ppip_base_url,
+                'ocds_url': f"{ppip_base_url}/api/ocds/tenders",
                 'headers': {
                     'Accept': 'application/json',
                     'User-Agent': 'Mozilla/5.0 (Linux; Android 10; Mobile) AppleWebKit/537.36'
@@ -93,9 +167,19 @@ class TenderScraper:
         
         # Initialize database
         self.engine = create_engine(db_url)
-        Base.metadata.create_all(self.engine)
+        # Skipped where the schema is set up once by ``python -m scraper.migrate``
+        if create_schema:
+            Base.metadata.create_all(self.engine)
+        # Thread-local sessions, so reads can be offloaded to a thread pool
         Session = sessionmaker(bind=self.engine)
-        self.db_session = Session()
+        self.db_session = scoped_session(Session)
+
+        # Collapses the same tender listed on both MyGov and PPIP
+        self.deduplicator = TenderDeduplicator()
+
+        # Called with (reference, old closing date, new closing date) when a
+        # tender is added or its closing date changes, e.g. by reminders
+        self.closing_date_listeners: List[Callable[[str, Optional[datetime], Optional[datetime]], None]] = []
 
     def _make_request(self, url: str, params: Optional[Dict] = None, headers: Optional[Dict] = None) -> Optional[requests.Response]:
         """Make HTTP request with mobile optimization and offline support"""
@@ -266,16 +350,24 @@ class TenderScraper:
                 tender['source'] = 'mygov'
                 tender['scraped_at'] = datetime.now().isoformat()
                 
-                # Format for mobile display
-                tender = self._format_tender_for_mobile(tender)
-                
                 tenders.append(tender)
-                self._save_to_db(tender)
                 
             except Exception as e:
                 logger.error(f"Error parsing tender row: {str(e)}")
                 continue
         
+        # MyGov lists no amount field; pull values out of the full titles in
+        # one vectorized pass, before they are truncated for mobile
+        values = extract_amount_column(pd.Series([tender['title'] for tender in tenders], dtype=object))
+        for idx, (tender, value) in enumerate(zip(tenders, values)):
+            if pd.notna(value):
+                tender['value'] = float(value)
+                tender['currency'] = 'KES'
+            
+            # Format for mobile display
+            tenders[idx] = self._format_tender_for_mobile(tender)
+            self._save_to_db(tenders[idx])
+        
         logger.info(f"Scraped {len(tenders)} tenders from MyGov")
         return tenders
 
@@ -360,6 +452,16 @@ class TenderScraper:
             
         return tenders
 
+    def scrape_all_tenders(self) -> List[Dict]:
+        """Scrape both sources and collapse cross-source duplicates"""
+        tenders = self.scrape_mygov_tenders() + self.scrape_ppip_tenders()
+        return self.deduplicator.deduplicate(tenders, db_session=self.db_session)
+
+    def refresh(self, snapshot_path: str = DEFAULT_SNAPSHOT_PATH) -> str:
+        """Ingest both sources and publish a fresh read-only snapshot for the API"""
+        self.scrape_all_tenders()
+        return publish_snapshot(self.db_session, snapshot_path)
+
     def _save_to_db(self, tender: Dict):
         """Save tender to database with improved date handling"""
         try:
@@ -376,6 +478,11 @@ class TenderScraper:
             if 'published_date' in tender:
                 published_date = self._parse_kenyan_date(tender['published_date'])
 
+            # Stored dates are naive EAT; comparing them with aware parsed
+            # dates would report every re-scraped tender as changed
+            closing_date = self._to_naive_eat(closing_date)
+            published_date = self._to_naive_eat(published_date)
+
             record = TenderRecord(
                 reference=tender.get('reference'),
                 title=tender.get('title'),
@@ -389,7 +496,8 @@ class TenderScraper:
                 closing_date=closing_date,
                 published_date=published_date,
                 source=tender.get('source'),
-                is_processed=False
+                is_processed=False,
+                category_updated_at=datetime.utcnow() if tender.get('category') else None
             )
             
             # Check for existing record
@@ -402,13 +510,42 @@ class TenderScraper:
                 self.db_session.add(record)
                 self.db_session.commit()
                 logger.debug(f"Added new tender: {tender.get('reference')}")
+                if closing_date:
+                    self._closing_date_changed(tender.get('reference'), None, closing_date)
             else:
+                changed = False
+                previous_closing_date = existing.closing_date
+                
                 # Update if closing date changed
                 if closing_date and existing.closing_date != closing_date:
                     existing.closing_date = closing_date
+                    changed = True
+                    logger.debug(f"Updated tender {tender.get('reference')} closing date")
+                
+                # A new or corrected label is new training data
+                if tender.get('category') and existing.category != tender.get('category'):
+                    existing.category = tender.get('category')
+                    existing.category_updated_at = datetime.utcnow()
+                    changed = True
+
+                # Fill in or correct the amount once a scrape yields one
+                value = tender.get('value')
+                if value is not None and (existing.value is None or str(existing.value) != str(value)):
+                    existing.value = value
+                    changed = True
+
+                # Changed text needs to be classified again
+                for field in ('title', 'description'):
+                    if tender.get(field) and getattr(existing, field) != tender.get(field):
+                        setattr(existing, field, tender.get(field))
+                        existing.is_processed = False
+                        changed = True
+                
+                if changed:
                     existing.updated_at = datetime.utcnow()
                     self.db_session.commit()
-                    logger.debug(f"Updated tender {tender.get('reference')} closing date")
+                    if existing.closing_date != previous_closing_date:
+                        self._closing_date_changed(tender.get('reference'), previous_closing_date, existing.closing_date)
                 else:
                     logger.debug(f"Tender {tender.get('reference')} already exists")
                 
@@ -416,6 +553,24 @@ class TenderScraper:
             logger.error(f"Database error: {str(e)}")
             self.db_session.rollback()
 
+    @staticmethod
+    def _to_naive_eat(value) -> Optional[datetime]:
+        """Naive EAT datetime, the way dates are stored in the tenders table"""
+        if value is None or pd.isna(value):
+            return None
+        if isinstance(value, pd.Timestamp):
+            value = value.to_pydatetime()
+        if value.tzinfo is not None:
+            value = value.astimezone(pytz.timezone('Africa/Nairobi')).replace(tzinfo=None)
+        return value
+
+    def _closing_date_changed(self, reference: str, old: Optional[datetime], new: Optional[datetime]):
+        for listener in self.closing_date_listeners:
+            try:
+                listener(reference, old, new)
+            except Exception as e:
+                logger.error(f"Closing date listener failed for {reference}: {str(e)}")
+
     def get_unprocessed_tenders(self) -> List[TenderRecord]:
         """Get tenders that haven't been processed yet"""
         return self.db_session.query(TenderRecord).filter_by(is_processed=False).all()
@@ -428,6 +583,53 @@ class TenderScraper:
             tender.updated_at = datetime.utcnow()
             self.db_session.commit()
 
+    def mark_many_as_processed(self, tender_ids: List[int], commit: bool = True):
+        """Mark tenders as processed with one UPDATE"""
+        if tender_ids:
+            self.db_session.query(TenderRecord).filter(TenderRecord.id.in_(tender_ids)).update(
+                {TenderRecord.is_processed: True, TenderRecord.updated_at: datetime.utcnow()},
+                synchronize_session=False
+            )
+        if commit:
+            self.db_session.commit()
+
+    def get_tender_by_reference(self, reference: str) -> Optional[Dict]:
+        """Get a single tender in mobile format, following duplicate listings
+        to their canonical tender"""
+        record = self.db_session.query(TenderRecord).filter_by(reference=reference).first()
+        if record:
+            cluster = self.db_session.query(TenderClusterRecord).filter_by(
+                member_reference=record.reference,
+                member_source=record.source
+            ).first()
+        else:
+            cluster = self.db_session.query(TenderClusterRecord).filter_by(
+                member_reference=reference
+            ).first()
+        if cluster and (cluster.canonical_reference, cluster.canonical_source) != (cluster.member_reference, cluster.member_source):
+            record = self.db_session.query(TenderRecord).filter_by(
+                reference=cluster.canonical_reference,
+                source=cluster.canonical_source
+            ).first() or record
+        if not record:
+            return None
+        
+        tender = {
+            'reference': record.reference,
+            'title': record.title,
+            'description': record.description,
+            'procuring_entity': record.procuring_entity,
+            'procurement_method': record.procurement_method,
+            'category': record.category,
+            'value': record.value,
+            'currency': record.currency,
+            'closing_date': record.closing_date.isoformat() if record.closing_date else None,
+            'published_date': record.published_date.isoformat() if record.published_date else None,
+            'document_url': record.document_url,
+            'source': record.source
+        }
+        return self._format_tender_for_mobile(tender)
+
     def get_mobile_tenders(self, 
                           status: Optional[str] = None,
                           category: Optional[str] = None,
@@ -488,7 +690,7 @@ class TenderScraper:
                 'title': record.title,
                 'procuring_entity': record.procuring_entity,
                 'category': record.category,
-                'closing_date': record.closing_date,
+                'closing_date': record.closing_date.isoformat() if record.closing_date else None,
                 'document_url': record.document_url,
                 'source': record.source
             }
@@ -570,6 +772,10 @@ def main():
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     scraper.save_to_csv(mygov_tenders, f'mygov_tenders_{timestamp}.csv')
     scraper.save_to_csv(ppip_tenders, f'ppip_tenders_{timestamp}.csv')
+    
+    # Collapse duplicates and publish the snapshot served by the API
+    scraper.deduplicator.deduplicate(mygov_tenders + ppip_tenders, db_session=scraper.db_session)
+    publish_snapshot(scraper.db_session, DEFAULT_SNAPSHOT_PATH)
 
 if __name__ == "__main__":
     main()
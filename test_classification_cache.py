@@ -0,0 +1,73 @@
+"""Classifying pending tenders through the classification cache"""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from classifier.classification_cache import ClassificationCache, classify_pending
+from scraper.tender_scraper import TenderClassificationRecord, TenderRecord, TenderScraper
+
+
+class StubClassifier:
+    """Labels every tender by the first word of its title"""
+    is_trained = True
+
+    def __init__(self, model_version):
+        self.model_version = model_version
+        self.calls = 0
+
+    def classify_tenders(self, tenders, batch_size=256):
+        self.calls += 1
+        return [
+            {'tender_id': tender['id'], 'category': tender['title'].split()[0].lower(), 'confidence': 0.9,
+             'entities': {}, 'risk_level': 'low', 'estimated_value': None}
+            for tender in tenders
+        ]
+
+
+@pytest.fixture
+def scraper(tmp_path):
+    scraper = TenderScraper(f"sqlite:///{tmp_path / 'tenders.db'}")
+    scraper.db_session.add_all(
+        TenderRecord(reference=f'T/{i}', title=f'{word} tender {i}', is_processed=False)
+        for i, word in enumerate(['Supply', 'Construction', 'Consultancy', 'Supply', 'Repair'])
+    )
+    scraper.db_session.commit()
+    return scraper
+
+
+def count_commits(session):
+    commits = []
+    event.listen(session, 'after_commit', lambda s: commits.append(1))
+    return commits
+
+
+def test_commits_once_per_batch(scraper):
+    commits = count_commits(scraper.db_session)
+    stats = classify_pending(scraper, StubClassifier('v1'), batch_size=2)
+    assert stats == {'processed': 5, 'cached': 0, 'classified': 5, 'failed': 0}
+    assert len(commits) == 3
+    assert scraper.get_unprocessed_tenders() == []
+
+
+def test_new_model_reclassifies_once_and_keeps_old_results(scraper):
+    classify_pending(scraper, StubClassifier('v1'))
+
+    classifier = StubClassifier('v2')
+    assert classify_pending(scraper, classifier)['classified'] == 5
+    assert classify_pending(scraper, classifier)['processed'] == 0
+    assert classifier.calls == 1
+
+    versions = scraper.db_session.query(TenderClassificationRecord.model_version).distinct()
+    assert sorted(version for version, in versions) == ['v1', 'v2']
+
+
+def test_purge_stale_only_drops_old_entries_of_other_versions(scraper):
+    classify_pending(scraper, StubClassifier('v1'))
+    classify_pending(scraper, StubClassifier('v2'))
+    cache = ClassificationCache(scraper.db_session)
+
+    assert cache.purge_stale('v2', older_than=datetime.utcnow() - timedelta(days=7)) == 0
+    assert cache.purge_stale('v2', older_than=datetime.utcnow() + timedelta(seconds=1)) == 5
+    assert cache.has_version('v2')
+    assert not cache.has_stale('v2')
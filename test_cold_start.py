@@ -0,0 +1,61 @@
+"""Cold-start budget for the API, measured with ``python -X importtime``
+
+Imports ``api.main`` in a fresh interpreter the way a serverless cold start
+does. The import must not pull in the scraper or model dependencies and
+must stay within COLD_START_BUDGET_MS (default 1500 ms of import time).
+
+Run with ``python test_cold_start.py`` for a report of the slowest imports.
+"""
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# Loaded on first use only, never by importing the API
+HEAVY_MODULES = ['pandas', 'bs4', 'sqlalchemy', 'dateutil', 'sklearn', 'spacy', 'scipy', 'joblib']
+
+BUDGET_MS = float(os.environ.get('COLD_START_BUDGET_MS', 1500))
+
+_PROBE = (
+    "import sys, json; before = set(sys.modules); import api.main; "
+    "print(json.dumps(sorted(set(sys.modules) - before)))"
+)
+
+
+def measure_cold_start():
+    """Modules loaded by ``import api.main`` and per-module import times in ms"""
+    env = {**os.environ, 'API_LAZY_START': '1'}
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', _PROBE],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    )
+    loaded = json.loads(result.stdout.strip().splitlines()[-1])
+
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        times[name.strip()] = (int(self_us) / 1000, int(cumulative_us) / 1000)
+    return loaded, times
+
+
+def test_api_import_skips_heavy_modules():
+    loaded, _ = measure_cold_start()
+    heavy = sorted({name.split('.')[0] for name in loaded} & set(HEAVY_MODULES))
+    assert not heavy, f"api.main imports {heavy} at start-up"
+
+
+def test_api_import_within_budget():
+    _, times = measure_cold_start()
+    total_ms = times['api.main'][1]
+    assert total_ms <= BUDGET_MS, f"api.main took {total_ms:.0f} ms to import (budget {BUDGET_MS:.0f} ms)"
+
+
+if __name__ == "__main__":
+    loaded, times = measure_cold_start()
+    print(f"import api.main: {times['api.main'][1]:.0f} ms, {len(loaded)} modules")
+    for name, (self_ms, _) in sorted(times.items(), key=lambda item: -item[1][0])[:15]:
+        print(f"{self_ms:8.1f} ms  {name}")
@@ -0,0 +1,106 @@
+"""Cross-source tender deduplication"""
+from scraper.deduplicator import StreamingDeduplicator, TenderDeduplicator
+from scraper.tender_scraper import TenderClusterRecord, TenderScraper
+
+MEDICAL_MYGOV = {
+    'reference': 'KNH/T/12/2024',
+    'title': 'Supply and Delivery of Medical Equipment to Kenyatta National Hospital',
+    'procuring_entity': 'Kenyatta National Hospital',
+    'closing_date': '2024-04-01T10:00:00+03:00',
+    'source': 'mygov',
+}
+MEDICAL_PPIP = {
+    'reference': 'ocds-12-2024',
+    'title': 'Tender for Supply & Delivery of Medical Equipment - Kenyatta National Hospital',
+    'procuring_entity': 'The Kenyatta National Hospital',
+    'closing_date': '2024-04-01T12:00:00+03:00',
+    'description': 'Theatre and ICU equipment',
+    'value': 12000000,
+    'source': 'ppip',
+}
+FURNITURE = {
+    'reference': 'KNH/T/13/2024',
+    'title': 'Supply and Delivery of Office Furniture',
+    'procuring_entity': 'Kenyatta National Hospital',
+    'closing_date': '2024-04-01',
+    'source': 'mygov',
+}
+STATIONERY = {
+    'reference': 'ocds-13-2024',
+    'title': 'Supply and Delivery of Office Stationery',
+    'procuring_entity': 'Kenyatta National Hospital',
+    'closing_date': '2024-04-01',
+    'source': 'ppip',
+}
+
+
+def copies(*tenders):
+    return [dict(tender) for tender in tenders]
+
+
+def test_blocking_key_normalizes_entity_and_day():
+    dedup = TenderDeduplicator()
+    assert dedup.blocking_key(MEDICAL_MYGOV) == dedup.blocking_key(MEDICAL_PPIP)
+    assert dedup.blocking_key(MEDICAL_MYGOV) == ('kenyatta national hospital', '2024-04-01')
+
+
+def test_cross_source_duplicate_collapses_to_most_complete_listing():
+    tenders = copies(MEDICAL_MYGOV, FURNITURE, MEDICAL_PPIP)
+    dedup = TenderDeduplicator()
+
+    assert dedup.find_clusters(tenders) == [[0, 2]]
+    unique = dedup.deduplicate(tenders)
+
+    assert [t['reference'] for t in unique] == ['KNH/T/13/2024', 'ocds-12-2024']
+    assert unique[1]['duplicates'] == [{'reference': 'KNH/T/12/2024', 'source': 'mygov'}]
+
+
+def test_near_miss_below_threshold_is_kept():
+    dedup = TenderDeduplicator()
+    tenders = copies(FURNITURE, STATIONERY)
+    assert dedup.find_clusters(tenders) == []
+    assert dedup.deduplicate(tenders) == tenders
+
+
+def test_same_title_in_another_block_is_kept():
+    other_day = dict(MEDICAL_PPIP, closing_date='2024-05-01')
+    assert TenderDeduplicator().find_clusters(copies(MEDICAL_MYGOV, other_day)) == []
+
+
+def test_choose_canonical_prefers_ppip_on_ties():
+    tenders = copies(MEDICAL_MYGOV, dict(MEDICAL_MYGOV, reference='ocds-1', source='ppip'))
+    assert TenderDeduplicator.choose_canonical(tenders, [0, 1]) == 1
+
+
+def test_save_clusters_is_idempotent(tmp_path):
+    session = TenderScraper(f"sqlite:///{tmp_path / 'tenders.db'}").db_session
+    dedup = TenderDeduplicator()
+    for _ in range(2):
+        dedup.deduplicate(copies(MEDICAL_MYGOV, MEDICAL_PPIP), db_session=session)
+
+    records = {
+        (r.member_reference, r.canonical_reference): r.similarity
+        for r in session.query(TenderClusterRecord).all()
+    }
+    assert set(records) == {('KNH/T/12/2024', 'ocds-12-2024'), ('ocds-12-2024', 'ocds-12-2024')}
+    assert records[('ocds-12-2024', 'ocds-12-2024')] == 1.0
+    assert records[('KNH/T/12/2024', 'ocds-12-2024')] >= dedup.threshold
+
+
+def test_streaming_first_listing_wins():
+    stream = StreamingDeduplicator()
+    first, furniture, second = copies(MEDICAL_MYGOV, FURNITURE, MEDICAL_PPIP)
+
+    assert stream.add(first) is None
+    assert stream.add(furniture) is None
+    assert stream.add(second) is first
+    assert first['duplicates'] == [{'reference': 'ocds-12-2024', 'source': 'ppip'}]
+    assert len(stream) == 2
+
+
+def test_streaming_keeps_near_misses_and_untitled():
+    stream = StreamingDeduplicator()
+    assert stream.add(dict(FURNITURE)) is None
+    assert stream.add(dict(STATIONERY)) is None
+    assert stream.add({'reference': 'X', 'title': ''}) is None
+    assert len(stream) == 2
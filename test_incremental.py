@@ -0,0 +1,123 @@
+"""Resuming incremental training from a saved checkpoint"""
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from classifier import tender_classifier
+from classifier.incremental import IncrementalTenderClassifier, iter_db_chunks
+from scraper.tender_scraper import Base, TenderRecord
+
+CHUNK = pd.DataFrame([
+    {'title': 'Supply of laptops and printers', 'description': 'ICT equipment', 'category': 'ict',
+     'labelled_at': '2024-01-01'},
+    {'title': 'Construction of county road', 'description': 'Tarmac and drainage works', 'category': 'works',
+     'labelled_at': '2024-01-02'},
+    {'title': 'Supply of desktop computers', 'description': 'ICT hardware', 'category': 'ict',
+     'labelled_at': '2024-01-03'},
+    {'title': 'Rehabilitation of bridge', 'description': 'Civil works', 'category': 'works',
+     'labelled_at': '2024-01-04'},
+])
+
+
+def test_checkpoint_resumes_training(tmp_path):
+    path = str(tmp_path / 'checkpoint.joblib')
+    classifier = IncrementalTenderClassifier(n_features=2 ** 10)
+    classifier.train(CHUNK)
+    classifier.save_model(path)
+
+    resumed = IncrementalTenderClassifier(n_features=2 ** 10)
+    resumed.load_model(path)
+    assert resumed.samples_seen == len(CHUNK)
+    coef_before = np.array(resumed.classifier.coef_)
+
+    assert resumed.partial_train(CHUNK) == len(CHUNK)
+    assert not np.array_equal(resumed.classifier.coef_, coef_before)
+    resumed.save_model(path)
+
+    reloaded = IncrementalTenderClassifier()
+    reloaded.load_model(path)
+    assert reloaded.samples_seen == 2 * len(CHUNK)
+
+
+def test_mapped_load_is_opt_in(tmp_path):
+    path = str(tmp_path / 'checkpoint.joblib')
+    classifier = IncrementalTenderClassifier(n_features=2 ** 10)
+    classifier.train(CHUNK)
+    classifier.save_model(path)
+
+    loaded = IncrementalTenderClassifier()
+    loaded.load_model(path)
+    assert not isinstance(loaded.classifier.coef_, np.memmap)
+
+    mapped = IncrementalTenderClassifier()
+    mapped.load_model(path, mmap_mode='r')
+    assert isinstance(mapped.classifier.coef_, np.memmap)
+
+
+def test_unknown_category_is_not_dropped():
+    classifier = IncrementalTenderClassifier(n_features=2 ** 10)
+    classifier.partial_train(CHUNK)
+    later = pd.DataFrame([{'title': 'Supply of drugs', 'description': 'Pharmaceuticals',
+                           'category': 'health', 'labelled_at': '2024-02-01'}])
+    with pytest.raises(ValueError, match='health'):
+        classifier.partial_train(later)
+    assert classifier.samples_seen == len(CHUNK)
+
+
+def test_db_watermark_follows_labels_not_updates(tmp_path):
+    db_url = f"sqlite:///{tmp_path / 'tenders.db'}"
+    engine = create_engine(db_url)
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    labelled = datetime(2024, 1, 1)
+    session.add_all([
+        TenderRecord(reference='T/1', title='Supply of laptops', category='ict',
+                     created_at=labelled, category_updated_at=labelled),
+        TenderRecord(reference='T/2', title='Road works', category='works', created_at=labelled),
+    ])
+    session.commit()
+
+    chunks = list(iter_db_chunks(db_url))
+    assert sum(len(chunk) for chunk in chunks) == 2
+    watermark = max(chunk['labelled_at'].max() for chunk in chunks).to_pydatetime()
+
+    # Marking as processed or re-scraping bumps updated_at only
+    for record in session.query(TenderRecord):
+        record.is_processed = True
+    session.commit()
+    assert sum(len(chunk) for chunk in iter_db_chunks(db_url, since=watermark)) == 0
+
+    relabelled = session.query(TenderRecord).filter_by(reference='T/2').one()
+    relabelled.category = 'consultancy'
+    relabelled.category_updated_at = labelled + timedelta(days=1)
+    session.commit()
+    chunks = list(iter_db_chunks(db_url, since=watermark))
+    assert [row for chunk in chunks for row in chunk['category']] == ['consultancy']
+    session.close()
+
+
+def test_batches_share_one_pipe(monkeypatch):
+    classifier = IncrementalTenderClassifier(n_features=2 ** 10)
+    classifier.train(CHUNK)
+    load_pipeline = tender_classifier.load_pipeline
+    calls = []
+
+    class CountingPipeline:
+        def __init__(self, nlp):
+            self._nlp = nlp
+
+        def pipe(self, *args, **kwargs):
+            calls.append(kwargs)
+            return self._nlp.pipe(*args, **kwargs)
+
+    monkeypatch.setattr(tender_classifier, 'load_pipeline',
+                        lambda profile: CountingPipeline(load_pipeline(profile)))
+    tenders = CHUNK.to_dict('records') * 3
+    results = classifier.classify_tenders(tenders, batch_size=4)
+    assert len(calls) == 1
+    assert len(results) == len(tenders)
+    assert results[:4] == classifier.classify_tenders(tenders[:4])
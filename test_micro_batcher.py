@@ -0,0 +1,51 @@
+"""Flushing the micro-batcher queue on shutdown"""
+import asyncio
+import logging
+import threading
+
+import pytest
+
+from classifier.micro_batcher import MicroBatcher
+
+
+def test_stop_flushes_queued_items():
+    batches = []
+
+    def process(items):
+        batches.append(items)
+        return [item * 2 for item in items]
+
+    async def run():
+        batcher = MicroBatcher(process, max_batch_size=2, max_wait_ms=50)
+        submitted = [asyncio.ensure_future(batcher.submit(i)) for i in range(5)]
+        await asyncio.sleep(0)
+        await batcher.stop()
+        return await asyncio.gather(*submitted)
+
+    assert asyncio.run(run()) == [0, 2, 4, 6, 8]
+    assert sum(len(batch) for batch in batches) == 5
+
+
+def test_items_left_after_timeout_fail_and_are_logged(caplog):
+    release = threading.Event()
+
+    def process(items):
+        release.wait(5)
+        return items
+
+    async def run():
+        batcher = MicroBatcher(process, max_batch_size=2, max_wait_ms=0)
+        submitted = [asyncio.ensure_future(batcher.submit(i)) for i in range(3)]
+        await asyncio.sleep(0.05)
+        stopping = asyncio.ensure_future(batcher.stop(drain_timeout=0.05))
+        await asyncio.sleep(0)
+        with pytest.raises(RuntimeError, match='stopping'):
+            await batcher.submit(99)
+        await stopping
+        release.set()
+        return await asyncio.gather(*submitted, return_exceptions=True)
+
+    with caplog.at_level(logging.WARNING, logger='classifier.micro_batcher'):
+        results = asyncio.run(run())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert 'Dropped 3 queued items on shutdown' in caplog.text
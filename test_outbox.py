@@ -0,0 +1,121 @@
+"""Outbox state machine: idempotency, leases, backoff and dead-lettering"""
+from datetime import datetime, timedelta
+
+import pytest
+
+from notifier.outbox import NotificationOutbox, idempotency_key
+from scraper.tender_scraper import NotificationOutboxRecord, TenderScraper
+
+TENDERS = [{'reference': f"T/{i}", 'title': f"Tender {i}"} for i in range(3)]
+TARGETS = [('telegram', '1'), ('telegram', '2')]
+
+
+@pytest.fixture
+def db_url(tmp_path):
+    return f"sqlite:///{tmp_path / 'outbox.db'}"
+
+
+@pytest.fixture
+def outbox(db_url):
+    return NotificationOutbox(TenderScraper(db_url).db_session)
+
+
+def make_due(outbox: NotificationOutbox):
+    """Move every retry into the past"""
+    outbox.db_session.query(NotificationOutboxRecord).filter(
+        NotificationOutboxRecord.status == 'pending'
+    ).update({NotificationOutboxRecord.next_attempt_at: datetime.utcnow() - timedelta(seconds=1)})
+    outbox.db_session.commit()
+
+
+def test_enqueue_is_idempotent(outbox):
+    assert outbox.enqueue(TENDERS, TARGETS) == 6
+    assert outbox.enqueue(TENDERS, TARGETS) == 0
+    # A reminder about the same tender is a different notice
+    assert outbox.enqueue(TENDERS[:1], TARGETS, kind='reminder:3') == 2
+    assert outbox.stats() == {'pending': 8}
+
+
+def test_idempotency_key_distinguishes_target_and_kind():
+    tender = TENDERS[0]
+    keys = {
+        idempotency_key(tender, 'telegram', '1'),
+        idempotency_key(tender, 'telegram', '2'),
+        idempotency_key(tender, 'twitter'),
+        idempotency_key(tender, 'telegram', '1', 'reminder:1'),
+    }
+    assert len(keys) == 4
+    assert idempotency_key(tender, 'telegram', '1') == idempotency_key(dict(tender), 'telegram', '1')
+
+
+def test_claim_leases_and_mark_sent(outbox):
+    outbox.enqueue(TENDERS, TARGETS)
+    batch = outbox.claim_batch(4)
+    assert len(batch) == 4
+    assert all(item['attempts'] == 1 for item in batch)
+    # Leased rows are not handed out again while the lease holds
+    assert len(outbox.claim_batch(10)) == 2
+    assert outbox.claim_batch(10) == []
+
+    outbox.mark_sent([item['id'] for item in batch])
+    assert outbox.stats() == {'sent': 4, 'sending': 2}
+
+
+def test_expired_lease_is_claimed_again(db_url):
+    outbox = NotificationOutbox(TenderScraper(db_url).db_session, lease_seconds=0)
+    outbox.enqueue(TENDERS[:1], TARGETS[:1])
+    first = outbox.claim_batch()
+    second = outbox.claim_batch()
+    assert [item['id'] for item in second] == [item['id'] for item in first]
+    assert second[0]['attempts'] == 2
+
+
+def test_failed_delivery_backs_off_then_dead_letters(db_url):
+    outbox = NotificationOutbox(TenderScraper(db_url).db_session, max_attempts=3, base_delay=60)
+    outbox.enqueue(TENDERS[:1], TARGETS[:1])
+
+    delays = []
+    for attempt in range(1, 3):
+        (item,) = outbox.claim_batch()
+        before = datetime.utcnow()
+        assert outbox.mark_failed(item['id'], "boom") == 'pending'
+        record = outbox.db_session.get(NotificationOutboxRecord, item['id'])
+        delays.append((record.next_attempt_at - before).total_seconds())
+        # Not due until the backoff has passed
+        assert outbox.claim_batch() == []
+        make_due(outbox)
+
+    # 60s then 120s, each with up to 50% jitter taken off
+    assert 29 <= delays[0] <= 60
+    assert 59 <= delays[1] <= 120
+
+    (item,) = outbox.claim_batch()
+    assert outbox.mark_failed(item['id'], "boom") == 'dead'
+    make_due(outbox)
+    assert outbox.claim_batch() == []
+
+    assert outbox.requeue_dead() == 1
+    assert outbox.claim_batch()[0]['attempts'] == 1
+
+
+def test_concurrent_drainers_never_share_a_row(db_url):
+    first = NotificationOutbox(TenderScraper(db_url).db_session)
+    second = NotificationOutbox(TenderScraper(db_url).db_session)
+    first.enqueue(TENDERS, TARGETS)
+
+    # The second drainer leases everything between the first one's
+    # SELECT and its UPDATE, as can happen on SQLite
+    select_due = first._due_ids
+    stolen = []
+
+    def racing_due_ids(now, limit):
+        ids = select_due(now, limit)
+        first.db_session.commit()
+        stolen.extend(second.claim_batch(limit))
+        return ids
+
+    first._due_ids = racing_due_ids
+    claimed = first.claim_batch(100)
+
+    assert len(stolen) == 6
+    assert claimed == []
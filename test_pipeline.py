@@ -0,0 +1,82 @@
+"""Dry run of the streaming pipeline against the recorded fixtures"""
+import asyncio
+import json
+import os
+
+from notifier.notification_agent import NotificationAgent
+from notifier.outbox import NotificationOutbox
+from pipeline.runner import TenderPipeline, load_fixtures, record_sources
+from scraper.tender_scraper import NotificationOutboxRecord, TenderClusterRecord, TenderScraper
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'pipeline', 'fixtures')
+
+
+def dry_run(tmp_path, **options):
+    config = tmp_path / 'config.json'
+    config.write_text(json.dumps({
+        'telegram': {'token': '123:test', 'chat_ids': [1, 2]},
+        'twitter': {'consumer_key': '', 'consumer_secret': '', 'access_token': '', 'access_token_secret': ''},
+    }))
+    scraper = TenderScraper("sqlite://")
+    outbox = NotificationOutbox(scraper.db_session)
+    pipeline = TenderPipeline(
+        scraper,
+        load_fixtures(FIXTURES),
+        outbox=outbox,
+        agent=NotificationAgent(str(config)),
+        send=False,
+        **options
+    )
+    return pipeline, asyncio.run(pipeline.run())
+
+
+def test_dry_run_dedupes_and_queues(tmp_path):
+    pipeline, report = dry_run(tmp_path, batch_size=2, queue_size=1)
+    session = pipeline.scraper.db_session
+
+    assert report['scraped'] == 8
+    # Two tenders are listed by both portals
+    assert report['unique'] == 6
+    assert report['stages']['dedupe']['items_out'] == 6
+    assert len(session.query(TenderClusterRecord).all()) == 4
+
+    # Every unique tender goes to both chats, nothing is sent
+    assert report['deliveries'] == {'queued': 12, 'sent': 0, 'retrying': 0, 'dead': 0}
+    assert pipeline.outbox.stats() == {'pending': 12}
+    assert {record.chat_id for record in session.query(NotificationOutboxRecord)} == {'1', '2'}
+
+
+def test_stage_metrics_are_filled_in(tmp_path):
+    _, report = dry_run(tmp_path, batch_size=2, queue_size=1)
+    stages = report['stages']
+
+    assert list(stages) == ['scrape', 'dedupe', 'classify', 'notify']
+    assert stages['scrape']['items_in'] == stages['scrape']['items_out'] == 8
+    assert stages['scrape']['batches'] == 4
+    assert stages['dedupe']['items_in'] == 8
+    assert stages['classify']['items_in'] == stages['classify']['items_out'] == 6
+    assert stages['notify']['items_in'] == 6
+    for name, stats in stages.items():
+        assert stats['batches'] > 0, name
+        assert stats['busy_s'] >= 0, name
+        assert stats['first_out_s'] is not None, name
+        assert stats['finished_s'] >= stats['first_out_s'], name
+    assert report['seconds'] >= stages['notify']['finished_s']
+
+
+def test_digest_mode_queues_for_the_window(tmp_path):
+    pipeline, report = dry_run(tmp_path, digest=True)
+    assert report['deliveries']['queued'] == 12
+    # Not due until the digest window closes
+    assert pipeline.outbox.claim_batch() == []
+
+
+def test_record_then_replay(tmp_path):
+    sources = load_fixtures(FIXTURES)
+    recorded = record_sources(sources, str(tmp_path / 'recorded'))
+    for scrape in recorded.values():
+        scrape()
+
+    replayed = load_fixtures(str(tmp_path / 'recorded'))
+    assert sorted(replayed) == ['mygov', 'ppip']
+    assert replayed['ppip']() == sources['ppip']()
@@ -0,0 +1,87 @@
+"""Closing-deadline reminder scheduling"""
+from datetime import datetime, timedelta
+
+import pytest
+
+from notifier.reminders import DAY_SECONDS, EAT, ReminderScheduler
+from scraper.migrate import migrate
+from scraper.tender_scraper import TenderRecord, TenderScraper
+
+NOW = EAT.localize(datetime(2024, 3, 1, 9, 0)).timestamp()
+
+
+def closing_in(days: float) -> datetime:
+    """Naive EAT closing date, as stored in the tenders table"""
+    return datetime.fromtimestamp(NOW + days * DAY_SECONDS, EAT).replace(tzinfo=None)
+
+
+def test_schedule_and_pop_due_in_order():
+    scheduler = ReminderScheduler()
+    scheduler.schedule('A', closing_in(10), now=NOW)
+    scheduler.schedule('B', closing_in(5), now=NOW)
+
+    assert scheduler.next_due() == pytest.approx(NOW + 2 * DAY_SECONDS)
+    assert scheduler.pop_due(NOW + DAY_SECONDS) == []
+    assert scheduler.pop_due(NOW + 3 * DAY_SECONDS) == [('B', 3), ('A', 7)]
+    assert scheduler.pop_due(NOW + 10 * DAY_SECONDS) == [('B', 1), ('A', 3), ('A', 1)]
+    assert scheduler.next_due() is None
+    assert len(scheduler) == 0
+
+
+def test_reschedule_replaces_old_reminders():
+    scheduler = ReminderScheduler()
+    scheduler.schedule('A', closing_in(10), now=NOW)
+    scheduler.schedule('A', closing_in(20), now=NOW)
+
+    assert scheduler.pop_due(NOW + 10 * DAY_SECONDS) == []
+    assert scheduler.pop_due(NOW + 13 * DAY_SECONDS) == [('A', 7)]
+
+
+def test_unchanged_closing_date_is_not_scheduled_twice():
+    scheduler = ReminderScheduler()
+    scheduler.schedule('A', closing_in(10), now=NOW)
+    scheduler.schedule('A', closing_in(10), now=NOW)
+    assert scheduler.pop_due(NOW + 4 * DAY_SECONDS) == [('A', 7)]
+
+
+def test_cancel_drops_pending_reminders():
+    scheduler = ReminderScheduler()
+    scheduler.schedule('A', closing_in(10), now=NOW)
+    scheduler.on_closing_date_changed('A', closing_in(10), None)
+    assert scheduler.next_due() is None
+    assert scheduler.pop_due(NOW + 10 * DAY_SECONDS) == []
+
+
+def test_catch_up_sends_latest_missed_reminder():
+    scheduler = ReminderScheduler()
+    scheduler.schedule('A', closing_in(2), now=NOW, catch_up=True)
+    assert scheduler.pop_due(NOW) == [('A', 3)]
+    assert scheduler.pop_due(NOW + 1.5 * DAY_SECONDS) == [('A', 1)]
+
+
+def test_apply_changes_picks_up_other_processes(tmp_path):
+    db_url = f"sqlite:///{tmp_path / 'tenders.db'}"
+    migrate(db_url)
+    session = TenderScraper(db_url, create_schema=False).db_session
+
+    scheduler = ReminderScheduler()
+    since = datetime.utcnow() - timedelta(seconds=1)
+    scheduler.rebuild(session, now=NOW)
+    assert len(scheduler) == 0
+
+    # Another process stores a tender and later moves its deadline closer
+    writer = TenderScraper(db_url, create_schema=False).db_session
+    writer.add(TenderRecord(reference='A', source='ppip', closing_date=closing_in(20)))
+    writer.commit()
+    since = scheduler.apply_changes(session, since, now=NOW)
+    assert scheduler.next_due() == pytest.approx(NOW + 13 * DAY_SECONDS)
+
+    record = writer.query(TenderRecord).filter_by(reference='A').one()
+    record.closing_date = closing_in(2)
+    record.updated_at = datetime.utcnow() + timedelta(seconds=1)
+    writer.commit()
+    since = scheduler.apply_changes(session, since, now=NOW)
+    assert scheduler.pop_due(NOW) == [('A', 3)]
+
+    # Nothing new since the watermark
+    assert scheduler.apply_changes(session, since, now=NOW) == since
@@ -0,0 +1,156 @@
+"""Publishing and querying the read-only tenders snapshot"""
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+from scraper.snapshot import EAT, SnapshotReader, publish_snapshot
+from scraper.tender_scraper import TenderClusterRecord, TenderRecord, TenderScraper
+
+
+def closing_in(days: float) -> datetime:
+    return (datetime.now(EAT) + timedelta(days=days)).replace(tzinfo=None)
+
+
+@pytest.fixture
+def session():
+    session = TenderScraper("sqlite://").db_session
+    session.add_all([
+        TenderRecord(reference='ROADS/1', title='Construction of Thika road bypass', procuring_entity='Kenya Rural Roads Authority',
+                     category='Works', source='ppip', closing_date=closing_in(30)),
+        TenderRecord(reference='KNH/2', title='Supply of medical equipment', procuring_entity='Kenyatta National Hospital',
+                     category='Goods', source='ppip', closing_date=closing_in(3.5)),
+        TenderRecord(reference='KNH-MYGOV/2', title='Supply of medical equipment', procuring_entity='Kenyatta National Hospital',
+                     category='Goods', source='mygov', closing_date=closing_in(3.5)),
+        TenderRecord(reference='ICT/3', title='Supply of laptops', procuring_entity='ICT Authority',
+                     category='Goods', source='mygov', closing_date=closing_in(-2)),
+        TenderRecord(reference='MISC/4', title='Consultancy services', procuring_entity='Treasury',
+                     category='Services', source='mygov', closing_date=None),
+    ])
+    session.add_all([
+        TenderClusterRecord(canonical_reference='KNH/2', canonical_source='ppip',
+                            member_reference='KNH/2', member_source='ppip', similarity=1.0),
+        TenderClusterRecord(canonical_reference='KNH/2', canonical_source='ppip',
+                            member_reference='KNH-MYGOV/2', member_source='mygov', similarity=1.0),
+    ])
+    session.commit()
+    return session
+
+
+@pytest.fixture
+def reader(session, tmp_path):
+    path = str(tmp_path / 'snapshot.db')
+    publish_snapshot(session, path)
+    return SnapshotReader(path, check_interval=0)
+
+
+def references(page):
+    return [tender['reference'] for tender in page]
+
+
+def test_publish_serves_canonical_tenders_ordered_by_closing(reader):
+    total, page = reader.query_tenders()
+    assert total == 4
+    # Soonest closing first, tenders without a closing date last
+    assert references(page) == ['ICT/3', 'KNH/2', 'ROADS/1', 'MISC/4']
+    assert page[1]['duplicates'] == [{'reference': 'KNH-MYGOV/2', 'source': 'mygov'}]
+
+
+def test_status_and_text_filters(reader):
+    assert references(reader.query_tenders(status='closed')[1]) == ['ICT/3']
+    assert references(reader.query_tenders(status='closing_soon')[1]) == ['KNH/2']
+    assert references(reader.query_tenders(status='open')[1]) == ['ROADS/1']
+    assert references(reader.query_tenders(status='active')[1]) == ['KNH/2', 'ROADS/1']
+    assert references(reader.query_tenders(entity='kenyatta')[1]) == ['KNH/2']
+    assert references(reader.query_tenders(category='goods')[1]) == ['ICT/3', 'KNH/2']
+    assert references(reader.query_tenders(days_remaining=5)[1]) == ['ICT/3', 'KNH/2']
+    # LIKE wildcards in user input are matched literally
+    assert reader.query_tenders(entity='%')[0] == 0
+
+
+def test_paging_keeps_total(reader):
+    total, page = reader.query_tenders(offset=1, limit=2)
+    assert total == 4
+    assert references(page) == ['KNH/2', 'ROADS/1']
+
+
+def test_derived_fields(reader):
+    _, page = reader.query_tenders()
+    by_reference = {tender['reference']: tender for tender in page}
+    assert by_reference['ICT/3']['status'] == 'closed'
+    assert by_reference['KNH/2']['status'] == 'closing_soon'
+    assert by_reference['KNH/2']['days_remaining'] == 3
+    assert by_reference['ROADS/1']['status'] == 'open'
+    assert by_reference['MISC/4']['status'] == 'unknown'
+    assert by_reference['MISC/4']['days_remaining'] is None
+
+
+def test_projection_reads_only_requested_fields(reader):
+    _, page = reader.query_tenders(status='closing_soon', fields=['reference', 'title'])
+    assert page == [{'reference': 'KNH/2', 'title': 'Supply of medical equipment'}]
+
+    _, page = reader.query_tenders(status='closing_soon', fields=['reference', 'status'])
+    assert page == [{'reference': 'KNH/2', 'status': 'closing_soon'}]
+
+    _, page = reader.query_tenders(status='closing_soon', fields=['duplicates'])
+    assert page == [{'duplicates': [{'reference': 'KNH-MYGOV/2', 'source': 'mygov'}]}]
+
+
+def test_unknown_projection_field_is_rejected(reader):
+    with pytest.raises(ValueError, match='nonsense'):
+        reader.query_tenders(fields=['reference', 'nonsense'])
+
+
+def test_get_tender_resolves_duplicate_references(reader):
+    assert reader.get_tender('KNH/2')['reference'] == 'KNH/2'
+    assert reader.get_tender('KNH-MYGOV/2')['reference'] == 'KNH/2'
+    assert reader.get_tender('NOPE') is None
+
+
+def test_stats(reader):
+    stats = reader.get_stats()
+    assert stats['total_tenders'] == 4
+    assert (stats['open_tenders'], stats['closing_soon'], stats['closed_tenders']) == (1, 1, 1)
+    assert stats['by_source'] == {'ppip': 2, 'mygov': 2}
+    assert stats['last_updated'] == reader.published_at
+
+
+def test_republish_swaps_atomically_and_bumps_version(session, tmp_path):
+    path = str(tmp_path / 'snapshot.db')
+    first = publish_snapshot(session, path)
+    reader = SnapshotReader(path, check_interval=0)
+    assert not SnapshotReader(str(tmp_path / 'missing.db')).available()
+    assert reader.available() and reader.version == first
+    assert publish_snapshot(session, path) == first
+
+    session.add(TenderRecord(reference='NEW/5', title='Fencing works', source='ppip', closing_date=closing_in(20)))
+    session.commit()
+    second = publish_snapshot(session, path)
+
+    assert second != first
+    assert reader.query_tenders()[0] == 5
+    assert reader.version == second
+    # Only the snapshot itself is left behind, no temporary files
+    assert os.listdir(tmp_path) == ['snapshot.db']
+
+
+def test_api_rejects_unknown_fields(reader, monkeypatch):
+    from fastapi.testclient import TestClient
+    import api.main
+
+    monkeypatch.setattr(api.main.snapshot, 'path', reader.path)
+    monkeypatch.setattr(api.main.snapshot, '_next_check', 0.0)
+    client = TestClient(api.main.app)
+
+    response = client.get('/tenders', params={'fields': 'title,nonsense'})
+    assert response.status_code == 400
+    assert 'nonsense' in response.json()['detail']
+
+    response = client.get('/tenders', params={'fields': 'title', 'status': 'closing_soon'})
+    assert response.status_code == 200
+    assert response.json()['tenders'] == [{'reference': 'KNH/2', 'title': 'Supply of medical equipment'}]
+
+    response = client.get('/tenders', params={'view': 'compact', 'status': 'open'})
+    assert set(response.json()['tenders'][0]) == {
+        'reference', 'title', 'procuring_entity', 'closing_date', 'days_remaining', 'status'
+    }
@@ -0,0 +1,84 @@
+"""Storing scraped tenders"""
+from datetime import datetime
+
+import pytest
+
+from scraper.tender_scraper import TenderRecord, TenderScraper
+
+TENDER = {
+    'reference': 'ocds-knh-12-2024',
+    'title': 'Supply of Medical Equipment',
+    'description': 'Theatre and ICU equipment',
+    'procuring_entity': 'Kenyatta National Hospital',
+    'closing_date': '2030-04-01T12:00:00+03:00',
+    'published_date': '2030-03-01T09:00:00+03:00',
+    'source': 'ppip',
+}
+
+
+@pytest.fixture
+def scraper(tmp_path):
+    scraper = TenderScraper(f"sqlite:///{tmp_path / 'tenders.db'}")
+    scraper.changes = []
+    scraper.closing_date_listeners.append(lambda reference, old, new: scraper.changes.append((reference, old, new)))
+    return scraper
+
+
+def stored(scraper: TenderScraper) -> TenderRecord:
+    scraper.db_session.expire_all()
+    return scraper.db_session.query(TenderRecord).filter_by(reference=TENDER['reference']).one()
+
+
+def test_dates_are_stored_as_naive_eat(scraper):
+    scraper._save_to_db(dict(TENDER))
+    record = stored(scraper)
+    assert record.closing_date == datetime(2030, 4, 1, 12, 0)
+    assert record.published_date == datetime(2030, 3, 1, 9, 0)
+    assert scraper.changes == [(TENDER['reference'], None, datetime(2030, 4, 1, 12, 0))]
+
+
+def test_rescraping_an_unchanged_tender_changes_nothing(scraper):
+    scraper._save_to_db(dict(TENDER))
+    updated_at = stored(scraper).updated_at
+    scraper.changes.clear()
+
+    scraper._save_to_db(dict(TENDER))
+    # The same instant written with another offset is not a change either
+    scraper._save_to_db(dict(TENDER, closing_date='2030-04-01T09:00:00+00:00'))
+
+    assert stored(scraper).updated_at == updated_at
+    assert scraper.changes == []
+
+
+def test_moved_closing_date_updates_and_notifies(scraper):
+    scraper._save_to_db(dict(TENDER))
+    updated_at = stored(scraper).updated_at
+    scraper.changes.clear()
+
+    scraper._save_to_db(dict(TENDER, closing_date='2030-03-25T12:00:00+03:00'))
+
+    record = stored(scraper)
+    assert record.closing_date == datetime(2030, 3, 25, 12, 0)
+    assert record.updated_at > updated_at
+    assert scraper.changes == [
+        (TENDER['reference'], datetime(2030, 4, 1, 12, 0), datetime(2030, 3, 25, 12, 0))
+    ]
+
+
+def test_value_is_filled_in_and_updated_on_existing_rows(scraper):
+    scraper._save_to_db(dict(TENDER))
+    assert stored(scraper).value is None
+
+    scraper._save_to_db(dict(TENDER, value=12000000.0))
+    assert float(stored(scraper).value) == 12000000.0
+    updated_at = stored(scraper).updated_at
+
+    # Re-scraping the same amount is not a change
+    scraper._save_to_db(dict(TENDER, value=12000000.0))
+    assert stored(scraper).updated_at == updated_at
+
+    scraper._save_to_db(dict(TENDER, value=13500000.0))
+    assert float(stored(scraper).value) == 13500000.0
+    # No amount in a later scrape keeps the known one
+    scraper._save_to_db(dict(TENDER))
+    assert float(stored(scraper).value) == 13500000.0
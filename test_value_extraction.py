@@ -0,0 +1,37 @@
+"""Amount parsing for Kenyan tender texts"""
+import math
+
+import pandas as pd
+import pytest
+
+from classifier.value_extraction import extract_amount_column, extract_amounts, parse_amount
+
+CASES = [
+    ("Supply of laptops KES 5.5M", 5.5e6),
+    ("Ksh 1,200,000.50 for road repairs", 1200000.5),
+    ("Tender 2024 KES 1,000,000", 1e6),
+    ("Lot 3 KES 5M", 5e6),
+    ("supply of 20 Ksh 500,000 worth", 5e5),
+    ("Estimated at 5,000,000/= Kenya Shillings", 5e6),
+    ("Supply of 20 desks", None),
+]
+
+
+@pytest.mark.parametrize("text, expected", CASES)
+def test_parse_amount(text, expected):
+    assert parse_amount(text) == expected
+
+
+def test_batch_modes_agree_with_parse_amount():
+    texts = [text for text, _ in CASES] + [None]
+    expected = [value for _, value in CASES] + [None]
+
+    assert extract_amounts(texts) == expected
+
+    column = extract_amount_column(pd.Series(texts, dtype=object))
+    assert [None if math.isnan(value) else value for value in column] == expected
+
+
+def test_bare_amounts_only_when_currency_not_required():
+    assert parse_amount("2.5 million") is None
+    assert parse_amount("2.5 million", require_currency=False) == 2.5e6